@@ -1,5 +1,83 @@
+import re
+import time
+from typing import Dict, Tuple
+
+import numpy as np
 import pandas as pd
 #from scrape_accounts.return_post_id import extract_facebook_ids
+from return_post_id import PATTERNS
+
+
+VIDEO_PATTERNS = ["watch/?v=", "/videos/", "/reel/","/v/","/r/"]
+
+# Same priority as extract_id_from_url: query based kinds first, then path based kinds
+_KIND_ORDER = ["watch", "photo", "permalink_story_fbid", "video", "reel", "post_pfbid"]
+_KIND_REGEX = dict(PATTERNS)
+
+_QUERY_KINDS = {"watch", "photo", "permalink_story_fbid"}
+
+# urlsplit as one regex: optional scheme, optional //netloc, then path ? query # fragment
+_URL_PARTS = re.compile(r"^(?:[A-Za-z][A-Za-z0-9+.\-]*:)?(?://[^/?#]*)?(?P<path>[^?#]*)(?:\?(?P<query>[^#]*))?(?:#(?P<fragment>.*))?$")
+
+# share links carry no id until they are resolved, so they get their own buckets
+_SHARE_PATTERNS = [
+    ("share_post", re.compile(r"/share/p/")),
+    ("share_video", re.compile(r"/share/(?:v|r)/")),
+]
+
+FB_URL_KINDS = _KIND_ORDER + [k for k, _ in _SHARE_PATTERNS] + ["unknown"]
+
+
+def classify_fb_urls_batch(df: pd.DataFrame, as_indices: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Classify the whole 'accounts' column at once.
+
+    Every url gets exactly one kind from FB_URL_KINDS (first matching kind wins,
+    in the same order extract_id_from_url tries them). As there, the url is
+    split first: query kinds are matched against the query only, path kinds
+    (and share links) against the path only. The extra keys
+    'is_video' / 'is_post' keep the old video-vs-post split of classify_fb_urls.
+
+    Args:
+        df (pd.DataFrame): must contain the column 'accounts'
+        as_indices (bool): return positional index arrays instead of boolean masks
+
+    Returns:
+        dict: {kind: boolean mask (or index array), ...}
+    """
+    urls = df["accounts"].astype(str)
+    # like urlsplit: leading control chars / spaces dropped, tabs and newlines removed
+    parts = (
+        urls.str.lstrip("".join(map(chr, range(0x21))))
+        .str.replace(r"[\t\r\n]", "", regex=True)
+        .str.extract(_URL_PARTS)
+    )
+    path = parts["path"].fillna("")
+    # extract_id_from_url matches the query kinds against "?" + query
+    query = "?" + parts["query"].fillna("")
+    remaining = np.ones(len(urls), dtype=bool)
+    out = {}
+
+    for kind in _KIND_ORDER:
+        part = query if kind in _QUERY_KINDS else path
+        hit = part.str.contains(_KIND_REGEX[kind], regex=True).to_numpy()
+        out[kind] = hit & remaining
+        remaining &= ~hit
+
+    for kind, rx in _SHARE_PATTERNS:
+        hit = path.str.contains(rx, regex=True).to_numpy()
+        out[kind] = hit & remaining
+        remaining &= ~hit
+
+    out["unknown"] = remaining
+
+    video_rx = "|".join(re.escape(pat) for pat in VIDEO_PATTERNS)
+    out["is_video"] = urls.str.contains(video_rx, regex=True).to_numpy()
+    out["is_post"] = ~out["is_video"]
+
+    if as_indices:
+        return {k: np.flatnonzero(m) for k, m in out.items()}
+    return out
 
 
 def classify_fb_urls(df: pd.DataFrame):
@@ -13,8 +91,19 @@ def classify_fb_urls(df: pd.DataFrame):
         video_urls (list of tuples): [(url, news_id), ...]
         post_urls (list of tuples): [(url, news_id), ...]
     """
-    video_patterns = ["watch/?v=", "/videos/", "/reel/","/v/","/r/"]
+    masks = classify_fb_urls_batch(df)
+    urls = df["accounts"].astype(str).to_numpy()
+    news_ids = df["news_id"].to_numpy()
+
+    is_video = masks["is_video"]
+    video_urls = list(zip(urls[is_video].tolist(), news_ids[is_video].tolist()))
+    post_urls = list(zip(urls[~is_video].tolist(), news_ids[~is_video].tolist()))
 
+    return video_urls, post_urls
+
+
+def _classify_fb_urls_rowwise(df: pd.DataFrame):
+    """Old iterrows implementation, kept only as the benchmark baseline."""
     video_urls = []
     post_urls = []
 
@@ -22,7 +111,7 @@ def classify_fb_urls(df: pd.DataFrame):
         url = str(row["accounts"])
         news_id = row["news_id"]
 
-        if any(pat in url for pat in video_patterns):
+        if any(pat in url for pat in VIDEO_PATTERNS):
             video_urls.append((url, news_id))
         else:
             post_urls.append((url, news_id))
@@ -30,6 +119,47 @@ def classify_fb_urls(df: pd.DataFrame):
     return video_urls, post_urls
 
 
+def make_synthetic_urls(n: int, seed: int = 0) -> pd.DataFrame:
+    """Build a DataFrame of n fake FB links covering every kind."""
+    rng = np.random.default_rng(seed)
+    templates = [
+        "https://www.facebook.com/page{}/posts/pfbid02z7JFKj8bXH1gmdrbu{}",
+        "https://www.facebook.com/watch/?v={}{}",
+        "https://www.facebook.com/page{}/videos/{}",
+        "https://www.facebook.com/photo/?fbid={}{}&set=a.277160342298910",
+        "https://www.facebook.com/permalink.php?story_fbid=pfbid0Wt{}&id={}",
+        "https://www.facebook.com/reel/{}{}",
+        "https://www.facebook.com/share/p/{}dWFe{}/",
+        "https://www.facebook.com/share/v/{}UHz{}/",
+        "https://www.facebook.com/groups/{}/permalink/{}/",
+    ]
+    picks = rng.integers(0, len(templates), size=n)
+    a = rng.integers(100000, 999999, size=n)
+    b = rng.integers(100000, 999999, size=n)
+    urls = [templates[t].format(x, y) for t, x, y in zip(picks, a, b)]
+    return pd.DataFrame({"news_id": np.arange(1, n + 1), "accounts": urls})
+
+
+def benchmark_classify(n: int = 1_000_000) -> Tuple[float, float]:
+    """Time the row-wise and the batch classifier on n synthetic urls."""
+    df = make_synthetic_urls(n)
+
+    start = time.perf_counter()
+    old_video, old_post = _classify_fb_urls_rowwise(df)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_video, new_post = classify_fb_urls(df)
+    new_time = time.perf_counter() - start
+
+    assert old_video == new_video and old_post == new_post, "batch result differs from row-wise result"
+
+    print(f"rows: {n}")
+    print(f"row-wise classify_fb_urls: {old_time:.2f} s")
+    print(f"batch classify_fb_urls:    {new_time:.2f} s  (x{old_time / new_time:.1f})")
+    return old_time, new_time
+
+
 # test_urls = [
 #     "https://www.facebook.com/shikhwsaad1/posts/pfbid02z7JFKj8bXH1gmdrbu1m89V23gXrBfb74Qs7jGwGvqiwhg6wQo34uZp3Q1RXtQ6sBl",
 #     "https://www.facebook.com/watch/?v=613121104542133",
@@ -46,4 +176,8 @@ def classify_fb_urls(df: pd.DataFrame):
 
 # from selenium.webdriver.chrome.service import Service
 # from selenium.webdriver.chrome.options import Options
-# from selenium import webdriver
\ No newline at end of file
+# from selenium import webdriver
+
+
+if __name__ == "__main__":
+    benchmark_classify(1_000_000)
@@ -0,0 +1,330 @@
+import os
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional, Iterator, Tuple, Sequence
+
+from return_post_id import (
+    extract_id_from_url,
+    make_id_record,
+    resolve_with_cache,
+    store_in_cache,
+    resolve_url_with_requests,
+    resolve_url_with_selenium,
+)
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+# RateLimiter / HostLimiter / make_session are shared with the Misbar crawler
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http_limits import RateLimiter, HostLimiter, make_session  # noqa: E402
+
+
+def resolve_urls_concurrently(
+    urls: List[str],
+    workers: int = 16,
+    per_host: int = 4,
+    rate: float = 10.0,
+    timeout: int = 10,
+    cache=None,
+) -> List[Optional[str]]:
+    """
+    Resolve every url through one pooled session on a thread pool.
+    Returns the final urls (None on failure) in the same order as `urls`.
+    """
+    if requests is None:
+        return [None] * len(urls)
+
+    session = make_session(workers)
+    limiter = RateLimiter(rate, burst=workers)
+    hosts = HostLimiter(per_host)
+
+    def fetch(u: str) -> Optional[str]:
+        with hosts.get(u):
+            limiter.acquire()
+            return resolve_url_with_requests(u, timeout=timeout, session=session)
+
+    def resolve(u: str) -> Optional[str]:
+        # cache hits skip the host / rate limits entirely
+        return resolve_with_cache(cache, u, "requests", lambda: fetch(u))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(resolve, urls))
+    finally:
+        if session is not None:
+            session.close()
+
+
+def extract_facebook_ids_concurrent(
+    urls: List[str],
+    driver=None,
+    use_requests: bool = True,
+    workers: int = 16,
+    per_host: int = 4,
+    rate: float = 10.0,
+    cache=None,
+    tabs: int = 1,
+) -> List[Dict[str, str]]:
+    """
+    Same output as extract_facebook_ids, but the urls that need a redirect
+    lookup are resolved concurrently. The selenium fallback (driver is not
+    thread safe) only gets what requests missed, in `tabs` browser tabs.
+    """
+    final_urls: List[Optional[str]] = list(urls)
+    pending = [i for i, u in enumerate(urls) if extract_id_from_url(u) is None]
+
+    for i in pending:
+        final_urls[i] = None
+
+    if use_requests and pending:
+        resolved = resolve_urls_concurrently([urls[i] for i in pending], workers, per_host, rate, cache=cache)
+        for i, final_url in zip(pending, resolved):
+            final_urls[i] = final_url
+
+    if driver is not None:
+        missing = [i for i in pending if final_urls[i] is None]
+        if tabs > 1:
+            resolved, _ = resolve_urls_with_selenium_tabs([urls[i] for i in missing], driver, tabs=tabs, cache=cache)
+            for i, final_url in zip(missing, resolved):
+                final_urls[i] = final_url
+        else:
+            for i in missing:
+                final_urls[i] = resolve_url_with_selenium(urls[i], driver, cache=cache)
+
+    if cache is not None:
+        cache.report()
+    return [make_id_record(u, final_url) for u, final_url in zip(urls, final_urls)]
+
+
+def iter_resolve_with_selenium_tabs(
+    urls: List[str],
+    driver,
+    tabs: int = 8,
+    settle: float = 0.75,
+    timeout: float = 15.0,
+    poll: float = 0.1,
+    cache=None,
+) -> Iterator[Tuple[int, Optional[str], float]]:
+    """
+    Resolve urls in up to `tabs` browser tabs at once.
+
+    A tab is done when document.readyState is 'complete' and current_url has
+    not changed for `settle` seconds (or after `timeout`, keeping whatever url
+    it reached). Yields (index in urls, final_url or None, seconds) as soon as
+    each tab settles, so results come out of order.
+    """
+    base = driver.current_window_handle
+    todo = list(enumerate(urls))
+    todo.reverse()
+    open_tabs: Dict[str, dict] = {}
+    done: List[Tuple[int, Optional[str], float]] = []
+
+    def open_next() -> None:
+        while todo:
+            i, u = todo.pop()
+            if cache is not None:
+                hit, final_url = cache.get(u, "selenium")
+                if hit:
+                    done.append((i, final_url, 0.0))
+                    continue
+            before = set(driver.window_handles)
+            driver.switch_to.window(base)
+            driver.execute_script("window.open(arguments[0], '_blank');", u)
+            new = [h for h in driver.window_handles if h not in before]
+            if not new:
+                done.append((i, None, 0.0))
+                continue
+            now = time.monotonic()
+            open_tabs[new[0]] = {"index": i, "url": u, "start": now, "last_url": "", "changed": now}
+            return
+
+    def finish(handle: str, final_url: Optional[str]) -> None:
+        tab = open_tabs.pop(handle)
+        try:
+            driver.switch_to.window(handle)
+            driver.close()
+        except Exception:
+            pass
+        if cache is not None:
+            store_in_cache(cache, tab["url"], "selenium", final_url)
+        done.append((tab["index"], final_url, time.monotonic() - tab["start"]))
+
+    try:
+        while todo or open_tabs:
+            while todo and len(open_tabs) < tabs:
+                open_next()
+
+            for handle in list(open_tabs):
+                tab = open_tabs[handle]
+                now = time.monotonic()
+                try:
+                    driver.switch_to.window(handle)
+                    current = driver.current_url
+                    state = driver.execute_script("return document.readyState")
+                except Exception:
+                    finish(handle, None)
+                    continue
+
+                if current != tab["last_url"]:
+                    tab["last_url"], tab["changed"] = current, now
+
+                loaded = current not in ("", "about:blank")
+                if loaded and state == "complete" and now - tab["changed"] >= settle:
+                    finish(handle, current)
+                elif now - tab["start"] >= timeout:
+                    finish(handle, current if loaded else None)
+
+            while done:
+                yield done.pop(0)
+
+            if open_tabs:
+                time.sleep(poll)
+    finally:
+        for handle in list(open_tabs):
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+        driver.switch_to.window(base)
+
+
+def resolve_urls_with_selenium_tabs(urls: List[str], driver, tabs: int = 8, cache=None, **kwargs):
+    """
+    Ordered version of iter_resolve_with_selenium_tabs.
+    Returns (final_urls, latencies) both aligned with `urls`.
+    """
+    final_urls: List[Optional[str]] = [None] * len(urls)
+    latencies = [0.0] * len(urls)
+    for i, final_url, seconds in iter_resolve_with_selenium_tabs(urls, driver, tabs=tabs, cache=cache, **kwargs):
+        final_urls[i] = final_url
+        latencies[i] = seconds
+    return final_urls, latencies
+
+
+def latency_histogram(latencies: Sequence[float], edges: Sequence[float] = (0.25, 0.5, 1, 2, 3.5, 5, 10)) -> Dict[str, int]:
+    """Count latencies per bucket and print a small text histogram."""
+    labels = [f"<{e}s" for e in edges] + [f">={edges[-1]}s"]
+    counts = dict.fromkeys(labels, 0)
+    for t in latencies:
+        for e, label in zip(edges, labels):
+            if t < e:
+                counts[label] += 1
+                break
+        else:
+            counts[labels[-1]] += 1
+
+    width = max(counts.values()) if latencies else 1
+    for label, c in counts.items():
+        print(f"{label:>7} {c:6d} {'#' * round(40 * c / width)}")
+    return counts
+
+
+# --------------Local redirect stub (for testing and benchmarking)---------------
+
+class _RedirectHandler(BaseHTTPRequestHandler):
+    """
+    /share/p/<x>/ -> /page/posts/pfbid<x>
+    /share/v/<x>/ -> /reel/<digits of x>
+    anything else -> 200
+    """
+    delay = 0.0
+
+    def _answer(self):
+        time.sleep(self.delay)
+        parts = [p for p in self.path.split("/") if p]
+        if len(parts) == 3 and parts[0] == "share":
+            if parts[1] == "p":
+                target = f"/page/posts/pfbid{parts[2]}"
+            else:
+                target = "/reel/" + str(zlib.crc32(parts[2].encode())).zfill(15)
+            self.send_response(302)
+            self.send_header("Location", target)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_HEAD = _answer
+    do_GET = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+def start_redirect_stub(port: int = 0, delay: float = 0.05) -> ThreadingHTTPServer:
+    """Start the stub server in a background thread; server.server_address has the port."""
+    handler = type("RedirectHandler", (_RedirectHandler,), {"delay": delay})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark_resolver(n: int = 500, delay: float = 0.05, workers: int = 16) -> None:
+    """Serial vs concurrent resolution of n share links against the local stub."""
+    server = start_redirect_stub(delay=delay)
+    host, port = server.server_address
+    urls = [f"http://{host}:{port}/share/{'pv'[i % 2]}/{i:06d}/" for i in range(n)]
+
+    try:
+        start = time.perf_counter()
+        serial = [resolve_url_with_requests(u) for u in urls]
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = resolve_urls_concurrently(urls, workers=workers, per_host=workers, rate=10_000)
+        concurrent_time = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    assert serial == concurrent, "concurrent results are not in input order"
+    print(f"urls: {n}, server delay: {delay * 1000:.0f} ms")
+    print(f"serial:     {n / serial_time:.1f} urls/s")
+    print(f"concurrent: {n / concurrent_time:.1f} urls/s  ({workers} workers)")
+
+
+def benchmark_selenium_tabs(n: int = 40, tabs: int = 8, delay: float = 0.2) -> None:
+    """
+    Old one-tab resolver (fixed 3.5 s per url) vs the multi-tab resolver,
+    with headless Chrome against the local redirect stub.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    driver = webdriver.Chrome(options=options)
+    server = start_redirect_stub(delay=delay)
+    host, port = server.server_address
+    urls = [f"http://{host}:{port}/share/{'pv'[i % 2]}/{i:06d}/" for i in range(n)]
+
+    try:
+        driver.get(f"http://{host}:{port}/")
+        sample = urls[: min(n, 5)]
+        start = time.perf_counter()
+        old = [resolve_url_with_selenium(u, driver) for u in sample]
+        old_per_url = (time.perf_counter() - start) / len(sample)
+
+        start = time.perf_counter()
+        new, latencies = resolve_urls_with_selenium_tabs(urls, driver, tabs=tabs)
+        new_time = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        driver.quit()
+
+    assert old == new[: len(sample)], "multi-tab resolver gave different final urls"
+    print(f"one tab:  {old_per_url:.2f} s/url")
+    print(f"{tabs} tabs:  {new_time / n:.2f} s/url")
+    latency_histogram(latencies)
+
+
+if __name__ == "__main__":
+    benchmark_resolver()
+    benchmark_selenium_tabs()
@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+DAY = 24 * 60 * 60
+
+
+class ResolveCache:
+    """
+    On-disk cache of redirect resolutions, keyed by the original url.
+
+    Each resolver ("requests", "selenium") stores its own outcome:
+      - a success from any resolver is reused by all of them (for `ttl` seconds)
+      - a failure is only reused by the resolver that failed (for `negative_ttl`
+        seconds), so a requests failure does not stop the selenium fallback.
+
+    Safe to share between threads.
+
+    hits / misses count urls, not get() calls: a url that goes through
+    requests and then the selenium fallback is one lookup, and a hit only
+    if neither resolver had to go to the network.
+    """
+
+    def __init__(self, path: str = "resolve_cache.sqlite", ttl: float = 30 * DAY, negative_ttl: float = DAY):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # url -> True while every get() for it was a hit
+        self.lookups: Dict[str, bool] = {}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resolutions (
+                original_url TEXT NOT NULL,
+                resolver     TEXT NOT NULL,
+                final_url    TEXT,
+                kind         TEXT,
+                id           TEXT,
+                resolved_at  REAL NOT NULL,
+                failed       INTEGER NOT NULL,
+                PRIMARY KEY (original_url, resolver)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, url: str, resolver: str) -> Tuple[bool, Optional[str]]:
+        """
+        Returns (hit, final_url). On a negative hit final_url is None.
+        On a miss the caller should resolve the url and call put().
+        """
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT resolver, final_url, resolved_at, failed FROM resolutions WHERE original_url = ?",
+                (url,),
+            ).fetchall()
+
+            for row_resolver, final_url, resolved_at, failed in rows:
+                if not failed and now - resolved_at < self.ttl:
+                    self.lookups.setdefault(url, True)
+                    return True, final_url
+
+            for row_resolver, final_url, resolved_at, failed in rows:
+                if failed and row_resolver == resolver and now - resolved_at < self.negative_ttl:
+                    self.lookups.setdefault(url, True)
+                    return True, None
+
+            self.lookups[url] = False
+            return False, None
+
+    def put(self, url: str, resolver: str, final_url: Optional[str], kind: str = "", id_str: str = "") -> None:
+        """Store the outcome of one resolution; final_url=None records a failure."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO resolutions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, resolver, final_url, kind, id_str, time.time(), int(final_url is None)),
+            )
+            self.conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returns how many were removed."""
+        now = time.time()
+        with self.lock:
+            cur = self.conn.execute(
+                "DELETE FROM resolutions WHERE (failed = 0 AND resolved_at < ?) OR (failed = 1 AND resolved_at < ?)",
+                (now - self.ttl, now - self.negative_ttl),
+            )
+            self.conn.commit()
+            return cur.rowcount
+
+    @property
+    def hits(self) -> int:
+        return sum(self.lookups.values())
+
+    @property
+    def misses(self) -> int:
+        return len(self.lookups) - self.hits
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self) -> None:
+        lookups = self.hits + self.misses
+        print(f"resolve cache: {self.hits} hits / {lookups} lookups ({self.hit_rate():.1%})")
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -1,7 +1,11 @@
 import re
 import time
+import random
 import urllib.parse as urlparse
-from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator
+
+from resolve_cache import ResolveCache
 
 
 try:
@@ -28,10 +32,68 @@ PATTERNS = [
     # 7) Sometimes the canonical final URL includes: .../videos/<id>/?v=<id> (fallback repeats ok)
 ]
 
+_PATTERN_BY_KIND = dict(PATTERNS)
+
+# Precompiled (kind, substring that must be present, regex) in the same order
+# extract_id_from_url used to try them. The substring test is a cheap
+# prefilter so most regexes are never run.
+_QUERY_MATCHERS = [
+    ("watch", "v=", _PATTERN_BY_KIND["watch"]),
+    ("photo", "fbid=", _PATTERN_BY_KIND["photo"]),
+    ("permalink_story_fbid", "story_fbid=", _PATTERN_BY_KIND["permalink_story_fbid"]),
+]
+_PATH_MATCHERS = [
+    ("video", "/videos/", _PATTERN_BY_KIND["video"]),
+    ("reel", "/reel/", _PATTERN_BY_KIND["reel"]),
+    ("post_pfbid", "/posts/pfbid", _PATTERN_BY_KIND["post_pfbid"]),
+]
+
+EXTRACT_CACHE_SIZE = 100_000
+
+
+@lru_cache(maxsize=EXTRACT_CACHE_SIZE)
 def extract_id_from_url(final_url: str) -> Optional[Tuple[str, str]]:
     """
     Try known patterns in order and return (kind, id_str).
     If no match, returns None.
+    Results are memoized per url (bounded LRU, see extract_id_from_url.cache_info()).
+    """
+    parsed = urlparse.urlsplit(final_url)
+
+    # query patterns first (watch?v=..., photo?fbid=..., permalink story_fbid)
+    query = parsed.query
+    if query:
+        query = "?" + query
+        for kind, needle, rx in _QUERY_MATCHERS:
+            if needle in query:
+                m = rx.search(query)
+                if m:
+                    return (kind, m.group(1))
+
+    # then path patterns (videos, reel, posts/pfbid)
+    path = parsed.path
+    for kind, needle, rx in _PATH_MATCHERS:
+        if needle in path:
+            m = rx.search(path)
+            if m:
+                return (kind, m.group(1))
+
+    return None
+
+
+def extract_ids(urls: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (kind, id_str) for every url, in input order.
+    Urls without a known pattern give ("unknown", "").
+    """
+    for u in urls:
+        found = extract_id_from_url(u)
+        yield found if found is not None else ("unknown", "")
+
+
+def _extract_id_from_url_reference(final_url: str) -> Optional[Tuple[str, str]]:
+    """
+    Original implementation, kept to check extract_id_from_url against it.
     """
     # First check query patterns separatedly (watch?v=..., photo?fbid=..., permalink story_fbid)
     parsed = urlparse.urlsplit(final_url)
@@ -54,31 +116,65 @@ def extract_id_from_url(final_url: str) -> Optional[Tuple[str, str]]:
     # Nothing matched
     return None
 
-def resolve_url_with_requests(u: str, timeout: int = 10) -> Optional[str]:
+def resolve_with_cache(cache, u: str, resolver: str, resolve) -> Optional[str]:
+    """
+    Look `u` up in the ResolveCache first; on a miss call resolve()
+    and store its outcome (failures included) for the next run.
+    """
+    if cache is None:
+        return resolve()
+
+    hit, final_url = cache.get(u, resolver)
+    if hit:
+        return final_url
+
+    final_url = resolve()
+    store_in_cache(cache, u, resolver, final_url)
+    return final_url
+
+def store_in_cache(cache, u: str, resolver: str, final_url: Optional[str]) -> None:
+    kind, id_str = "", ""
+    if final_url is not None:
+        kind, id_str = extract_id_from_url(final_url) or ("unknown", "")
+    cache.put(u, resolver, final_url, kind, id_str)
+
+def resolve_url_with_requests(u: str, timeout: int = 10, session=None, cache=None) -> Optional[str]:
     """
     Follow redirects cheaply to get the canonical URL.
     Tries HEAD first; if blocked, falls back to GET (streamed).
+    Pass a requests.Session to reuse its keep-alive connections,
+    and a ResolveCache to skip urls resolved in earlier runs.
     """
     if requests is None:
         return None
+    return resolve_with_cache(cache, u, "requests", lambda: _resolve_with_requests(u, timeout, session))
+
+def _resolve_with_requests(u: str, timeout: int, session) -> Optional[str]:
+    http = session if session is not None else requests
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
     }
     try:
-        r = requests.head(u, allow_redirects=True, headers=headers, timeout=timeout)
+        r = http.head(u, allow_redirects=True, headers=headers, timeout=timeout)
+        r.close()
         if r.url:
             return r.url
     except Exception:
         pass
     try:
-        r = requests.get(u, allow_redirects=True, headers=headers, timeout=timeout, stream=True)
+        r = http.get(u, allow_redirects=True, headers=headers, timeout=timeout, stream=True)
+        # give the connection back to the pool without reading the body
+        r.close()
         if r.url:
             return r.url
     except Exception:
         pass
     return None
 
-def resolve_url_with_selenium(u: str, driver) -> Optional[str]:
+def resolve_url_with_selenium(u: str, driver, cache=None) -> Optional[str]:
+    return resolve_with_cache(cache, u, "selenium", lambda: _resolve_with_selenium(u, driver))
+
+def _resolve_with_selenium(u: str, driver) -> Optional[str]:
 
     try:
         current_handles = list(driver.window_handles)
@@ -102,49 +198,106 @@ def resolve_url_with_selenium(u: str, driver) -> Optional[str]:
             pass
         return None
 
+def make_id_record(u: str, final_url: Optional[str]) -> Dict[str, str]:
+    """
+    Build the output record of extract_facebook_ids for url `u`
+    once its final url is known (None when it could not be resolved).
+    """
+    rec = {"original_url": u, "kind": "unknown", "id": "", "final_url": final_url or ""}
+    if final_url is None:
+        return rec
+
+    direct = extract_id_from_url(final_url)
+    if direct:
+        rec["kind"], rec["id"] = direct
+    return rec
+
 def extract_facebook_ids(
     urls: List[str],
     driver=None,
-    use_requests: bool = True
+    use_requests: bool = True,
+    cache=None
 ) -> List[Dict[str, str]]:
     out = []
     for u in urls:
-        rec = {"original_url": u, "kind": "", "id": "", "final_url": ""}
-       
-        direct = extract_id_from_url(u)
         final_url = u
 
-        if direct is None:
-           
+        if extract_id_from_url(u) is None:
             final_url = None
             if use_requests:
-                final_url = resolve_url_with_requests(u)
+                final_url = resolve_url_with_requests(u, cache=cache)
             if final_url is None and driver is not None:
-                final_url = resolve_url_with_selenium(u, driver)
-            if final_url is None:
-               
-                rec["kind"] = "unknown"
-                rec["id"] = ""
-                rec["final_url"] = ""
-                out.append(rec)
-                continue
-
-            direct = extract_id_from_url(final_url)
-
-        if direct:
-            kind, id_str = direct
-            rec["kind"] = kind
-            rec["id"] = id_str
-            rec["final_url"] = final_url
-        else:
-            rec["kind"] = "unknown"
-            rec["id"] = ""
-            rec["final_url"] = final_url or ""
-        out.append(rec)
+                final_url = resolve_url_with_selenium(u, driver, cache=cache)
+
+        out.append(make_id_record(u, final_url))
 
+    if cache is not None:
+        cache.report()
     return out
 
 
+def make_fuzzed_urls(n: int, seed: int = 0) -> List[str]:
+    """
+    Random FB-like urls mixing path shapes, query params and junk,
+    so several patterns can compete on the same url.
+    """
+    rnd = random.Random(seed)
+    hosts = ["https://www.facebook.com", "https://m.facebook.com", "http://.facebook.com", "https://fb.watch"]
+    paths = [
+        "/watch/", "/reel/{d}", "/reel/{s}", "/page/videos/{d}", "/page/videos/{d}/", "/videos/{s}",
+        "/page/posts/pfbid{a}", "/page/posts/{d}", "/photo/", "/photo", "/permalink.php",
+        "/share/p/{a}/", "/share/v/{a}/", "/groups/{d}/permalink/{d}/", "/story.php", "",
+    ]
+    params = ["v={d}", "v={s}", "fbid={d}", "story_fbid={a}", "story_fbid=", "id={d}",
+              "set=a.{d}", "__tn__=%2CO%2CP-R", "rdid={a}", "av={d}"]
+
+    def fill(t: str) -> str:
+        return t.format(
+            d=rnd.randint(10 ** 5, 10 ** 17),
+            s=rnd.randint(0, 99999),
+            a="".join(rnd.choice("abcXYZ0123456789") for _ in range(rnd.randint(1, 20))),
+        )
+
+    out = []
+    for _ in range(n):
+        u = rnd.choice(hosts) + fill(rnd.choice(paths))
+        k = rnd.randint(0, 3)
+        if k:
+            u += "?" + "&".join(fill(rnd.choice(params)) for _ in range(k))
+        if rnd.random() < 0.1:
+            u += "#" + fill(rnd.choice(params))
+        out.append(u)
+    return out
+
+
+def check_extractor(urls: List[str]) -> int:
+    """Return the number of urls where extract_id_from_url differs from the original."""
+    return sum(1 for u in urls if extract_id_from_url(u) != _extract_id_from_url_reference(u))
+
+
+def benchmark_extract(n: int = 200_000, distinct: int = 20_000) -> None:
+    """Per-url time of the original vs the compiled + cached extractor."""
+    base = make_fuzzed_urls(distinct, seed=1)
+    rnd = random.Random(2)
+    urls = [rnd.choice(base) for _ in range(n)]
+
+    start = time.perf_counter()
+    for u in urls:
+        _extract_id_from_url_reference(u)
+    old_time = time.perf_counter() - start
+
+    extract_id_from_url.cache_clear()
+    start = time.perf_counter()
+    for _ in extract_ids(urls):
+        pass
+    new_time = time.perf_counter() - start
+
+    print(f"urls: {n} ({distinct} distinct)")
+    print(f"original:  {old_time / n * 1e6:.2f} us/url")
+    print(f"new:       {new_time / n * 1e6:.2f} us/url  (x{old_time / new_time:.1f})")
+    print(extract_id_from_url.cache_info())
+
+
 # --------------Example---------------
 
 if __name__ == "__main__":
@@ -163,7 +316,11 @@ if __name__ == "__main__":
     ]
 
   
-    results = extract_facebook_ids(test_urls, driver=None, use_requests=True)
+    results = extract_facebook_ids(test_urls, driver=None, use_requests=True, cache=ResolveCache())
     print(len(test_urls),len(results))
     for r in results:
         print(r['id'])
+
+    print("mismatches on test urls:", check_extractor(test_urls))
+    print("mismatches on fuzzed urls:", check_extractor(make_fuzzed_urls(500_000)))
+    benchmark_extract()
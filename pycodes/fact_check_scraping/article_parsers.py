@@ -0,0 +1,324 @@
+import glob
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+from misbar_crawler import parse_news as parse_misbar_bs
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# --------------Selectors---------------
+
+def _has_class(name: str) -> str:
+    # what BeautifulSoup's class_="..." matches: one of the whitespace separated class tokens
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# BeautifulSoup's .text leaves out the strings of <script>, <style>,
+# <template>, <rt> and <rp> (they are not NavigableString), and comments
+_TEXT = etree.XPath("descendant::text()[not(ancestor::script or ancestor::style or ancestor::template"
+                    " or ancestor::rt or ancestor::rp)]")
+
+_MISBAR_TITLE = etree.XPath(f"(//div[{_has_class('blog--article_title')}])[1]")
+_MISBAR_STORY = etree.XPath(f"(//div[{_has_class('deep-dive--article_story')}])[1]")
+_MISBAR_SECTION_TEXT = etree.XPath(f"(descendant::div[{_has_class('section-text')}])[1]")
+_MISBAR_LABEL = etree.XPath(f"(//div[{_has_class('deep-dive--article_classification')}])[1]")
+_MISBAR_LD_JSON = etree.XPath("(//script[@type='application/ld+json'])[1]")
+_MISBAR_DATA_LAYER = etree.XPath("(//script[@id='dataLayerScript'])[1]")
+_MISBAR_POSTED_ON = etree.XPath(f"(//div[{_has_class('deep-dive--article_posted-on')}])[1]")
+_DESC_A = etree.XPath("descendant::a")
+
+_BEAM_ICON_LISTS = etree.XPath("//div[@data-element_type='widget' and @data-widget_type='icon-list.default']")
+_FIRST_TABLE = etree.XPath("(//table)[1]")
+_DESC_TR = etree.XPath("descendant::tr")
+_DESC_TD = etree.XPath("descendant::td")
+_FIRST_A = etree.XPath("(descendant::a)[1]")
+
+
+def _text(el) -> str:
+    return "".join(_TEXT(el))
+
+
+def _first(xpath, el):
+    found = xpath(el)
+    return found[0] if found else None
+
+
+def _parse_tree(html_text: str):
+    """lxml tree of a page, or None for an empty document (BeautifulSoup just finds nothing there)."""
+    try:
+        return lxml_html.document_fromstring(html_text)
+    except ValueError:
+        # str with an <?xml encoding=...?> declaration
+        return lxml_html.document_fromstring(html_text.encode("utf-8"),
+                                             parser=lxml_html.HTMLParser(encoding="utf-8"))
+    except etree.ParserError:
+        return None
+
+
+# --------------Misbar---------------
+
+def parse_misbar_lxml(news_id, html_text: str, error_log_file) -> Tuple[Optional[Dict], Optional[List[Dict]]]:
+    """Same result and error-log lines as misbar_crawler.parse_news, with lxml and precompiled XPaths."""
+    try:
+        root = _parse_tree(html_text)
+        if root is None:
+            error_log_file.write(f"[TITLE_ERROR] {news_id}\n")
+            return None, None
+
+        news_info = {
+            'news_id': news_id,
+            'title': 'undefined',
+            'description': 'undefined',
+            'claim_reviewed': 'undefined',
+            'type': 'undefined',
+            'label': 'undefined',
+            'date': 'undefined'
+        }
+        accounts_list = []
+
+        title = _first(_MISBAR_TITLE, root)
+        if title is None:
+            error_log_file.write(f"[TITLE_ERROR] {news_id}\n")
+            return None, None
+        news_info['title'] = _text(title).strip()
+
+        story = _first(_MISBAR_STORY, root)
+        section = _first(_MISBAR_SECTION_TEXT, story) if story is not None else None
+        if section is not None:
+            news_info['description'] = _text(section).strip()
+
+        label = _first(_MISBAR_LABEL, root)
+        if label is None:
+            error_log_file.write(f"[LABEL_ERROR] {news_id}\n")
+            return None, None
+        news_info['label'] = _text(label).strip()
+
+        try:
+            meta_info = json.loads(_first(_MISBAR_LD_JSON, root).text or "")
+            news_info['date'] = meta_info.get("datePublished", "")[:10]
+            news_info['claim_reviewed'] = meta_info.get("claimReviewed", 'undefined')
+            if not news_info['date']:
+                error_log_file.write(f"[DATE_ERROR] {news_id}\n")
+                return None, None
+        except Exception:
+            error_log_file.write(f"[DATE_ERROR] {news_id}\n")
+            return None, None
+
+        try:
+            uncleaned_string = '"""' + (_first(_MISBAR_DATA_LAYER, root).text or "") + '"""'
+            extracted_content = re.findall(r"\{([^}]*)\}", uncleaned_string)[0]
+            data = json.loads('{' + extracted_content.replace("'", '"') + '}')
+            news_info['type'] = data.get("subsection", 'undefined')
+        except Exception:
+            pass
+
+        posted_on = _first(_MISBAR_POSTED_ON, root)
+        if posted_on is not None:
+            for a in _DESC_A(posted_on):
+                href = a.get('href')
+                if href is None:
+                    break  # a['href'] raised here, later links were never read
+                accounts_list.append({'news_id': news_id, 'accounts': href})
+
+        return news_info, accounts_list
+
+    except Exception as e:
+        error_log_file.write(f"[GENERAL_ERROR] {news_id}: {str(e)}\n")
+        return None, None
+
+
+# --------------Beam---------------
+
+def _clean_text_bs(element) -> str:
+    """Safely extract text content from an HTML element, replacing &nbsp; and stripping whitespace."""
+    if element:
+        text = element.get_text()
+        if text and text.replace('\xa0', '').strip():
+            return text.replace('\xa0', ' ').strip()
+    return 'undefined'
+
+
+def parse_beam_bs(news_id, html_text: str, url: str = "") -> Tuple[Optional[str], List[Dict], List[str]]:
+    """
+    Label and accounts table of one Beam report, as the notebook's scraping
+    loop reads them. Returns (label, accounts, log_lines); label is None for
+    an unlabeled report.
+    """
+    soup = BeautifulSoup(html_text, 'lxml')
+    temp_divs = soup.find_all('div', attrs={'data-element_type': "widget", 'data-widget_type': "icon-list.default"})
+    try:
+        label = temp_divs[1].text.strip()
+        if not label:
+            raise ValueError("Label text is empty.")
+    except Exception:
+        return None, [], []
+
+    table = soup.find('table')
+    if table is None:
+        return label, [], [f"[MissingTable] News ID: {news_id} | URL: {url}\n"]
+    tr_elements = table.find_all('tr')
+    if len(tr_elements) == 0:
+        return label, [], [f"[EmptyTable] News ID: {news_id} | URL: {url}\n"]
+
+    accounts, log = [], []
+    for r, tr in enumerate(tr_elements):
+        try:
+            td_elements = tr.find_all('td')
+            account_info = {
+                'row_table_number': r + 1,
+                'account_url': 'undefined',
+                'account_name': 'undefined',
+                'followers_number': 'undefined',
+                'label': label,
+                'news_id': news_id
+            }
+            account_info['account_url'] = td_elements[1].select_one('a')['href'] if td_elements[1].select_one('a') else 'undefined'
+            account_info['account_name'] = _clean_text_bs(td_elements[1])
+            account_info['followers_number'] = _clean_text_bs(td_elements[2])
+            accounts.append(account_info)
+        except Exception as e:
+            log.append(f"[RowParseError] News ID: {news_id} | {url} | {str(e)}\n")
+    return label, accounts, log
+
+
+def _clean_text_lxml(element) -> str:
+    text = _text(element)
+    if text and text.replace('\xa0', '').strip():
+        return text.replace('\xa0', ' ').strip()
+    return 'undefined'
+
+
+def parse_beam_lxml(news_id, html_text: str, url: str = "") -> Tuple[Optional[str], List[Dict], List[str]]:
+    """Same result as parse_beam_bs, with lxml and precompiled XPaths."""
+    root = _parse_tree(html_text)
+    if root is None:
+        return None, [], []
+    icon_lists = _BEAM_ICON_LISTS(root)
+    label = _text(icon_lists[1]).strip() if len(icon_lists) > 1 else ""
+    if not label:
+        return None, [], []
+
+    table = _first(_FIRST_TABLE, root)
+    if table is None:
+        return label, [], [f"[MissingTable] News ID: {news_id} | URL: {url}\n"]
+    tr_elements = _DESC_TR(table)
+    if len(tr_elements) == 0:
+        return label, [], [f"[EmptyTable] News ID: {news_id} | URL: {url}\n"]
+
+    accounts, log = [], []
+    for r, tr in enumerate(tr_elements):
+        td_elements = _DESC_TD(tr)
+        # same checks, in the same order, as the exceptions parse_beam_bs logs
+        if len(td_elements) < 2:
+            log.append(f"[RowParseError] News ID: {news_id} | {url} | list index out of range\n")
+            continue
+        a = _first(_FIRST_A, td_elements[1])
+        href = 'undefined'
+        if a is not None:
+            href = a.get('href')
+            if href is None:
+                log.append(f"[RowParseError] News ID: {news_id} | {url} | 'href'\n")
+                continue
+        if len(td_elements) < 3:
+            log.append(f"[RowParseError] News ID: {news_id} | {url} | list index out of range\n")
+            continue
+        accounts.append({
+            'row_table_number': r + 1,
+            'account_url': href,
+            'account_name': _clean_text_lxml(td_elements[1]),
+            'followers_number': _clean_text_lxml(td_elements[2]),
+            'label': label,
+            'news_id': news_id
+        })
+    return label, accounts, log
+
+
+# --------------Fixtures / benchmark---------------
+
+def _misbar_result(parser: Callable, news_id, html_text: str):
+    log = io.StringIO()
+    news_info, accounts_list = parser(news_id, html_text, log)
+    return news_info, accounts_list, log.getvalue()
+
+
+PARSERS = {
+    "misbar": {"bs": lambda i, h: _misbar_result(parse_misbar_bs, i, h),
+               "lxml": lambda i, h: _misbar_result(parse_misbar_lxml, i, h)},
+    "beam": {"bs": parse_beam_bs, "lxml": parse_beam_lxml},
+}
+
+
+def _load_fixtures(fixture_dir: str) -> List[Tuple[str, str]]:
+    """(news_id, html) of every <news_id>.html in `fixture_dir` (as saved by misbar_crawler.save_pages)."""
+    out = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            out.append((os.path.basename(path)[:-5], f.read()))
+    return out
+
+
+def compare_parsers(fixture_dir: str, site: str = "misbar") -> List[str]:
+    """Run the BeautifulSoup and the lxml parser on every fixture; print and return the mismatching pages."""
+    mismatches = []
+    fixtures = _load_fixtures(fixture_dir)
+    for news_id, html_text in fixtures:
+        bs = PARSERS[site]["bs"](news_id, html_text)
+        lx = PARSERS[site]["lxml"](news_id, html_text)
+        if bs != lx:
+            mismatches.append(news_id)
+            print(f"  {news_id}\n    bs:   {bs}\n    lxml: {lx}")
+    print(f"{site}: {len(fixtures)} fixtures, {len(mismatches)} mismatches")
+    return mismatches
+
+
+def _rss_mb() -> Optional[float]:
+    return psutil.Process().memory_info().rss / 2 ** 20 if psutil is not None else None
+
+
+def _time_parser(site: str, name: str, fixture_dir: str) -> Tuple[float, Optional[float]]:
+    # runs in a fresh process so the RSS growth belongs to this parser only
+    fixtures = _load_fixtures(fixture_dir)
+    parse = PARSERS[site][name]
+    base = _rss_mb()
+    peak = base
+    start = time.perf_counter()
+    for news_id, html_text in fixtures:
+        parse(news_id, html_text)
+        if base is not None:
+            peak = max(peak, _rss_mb())
+    per_page = (time.perf_counter() - start) / max(1, len(fixtures))
+    return per_page, (peak - base) if base is not None else None
+
+
+def benchmark_parsers(fixture_dir: str, site: str = "misbar") -> None:
+    """Per-page parse time and peak RSS growth (needs psutil) of both parsers over the fixture corpus."""
+    results = {}
+    for name in ("bs", "lxml"):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results[name] = pool.submit(_time_parser, site, name, fixture_dir).result()
+    for name, (per_page, rss) in results.items():
+        mem = f"{rss:.1f} MB" if rss is not None else "n/a (install psutil)"
+        print(f"{site} {name:<5} {per_page * 1000:7.2f} ms/page   peak RSS growth {mem}")
+    print(f"speedup: {results['bs'][0] / results['lxml'][0]:.1f}x")
+
+
+# if __name__ == "__main__":
+#     compare_parsers("misbar_pages", "misbar")
+#     benchmark_parsers("misbar_pages", "misbar")
+#     compare_parsers("beam_pages", "beam")
+#     benchmark_parsers("beam_pages", "beam")
+#
+# # crawling with the lxml parser
+# crawl_misbar(urls_df, "error_log.txt", parser=parse_misbar_lxml)
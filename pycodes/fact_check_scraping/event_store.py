@@ -0,0 +1,256 @@
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+
+OK = "ok"
+
+# "[TITLE_ERROR] 12" / "[GENERAL_ERROR] 12: message"   (Misbar error_log.txt)
+# "[MissingTable] News ID: 12 | URL: https://..."     (Beam error_log_file_{i}.txt)
+# "[RowParseError] News ID: 12 | https://... | message"
+_MISBAR_LINE = re.compile(r"^\[([^\[\]]+)\]\s+(\d+)(?::\s*(.*))?$")
+_BEAM_LINE = re.compile(r"^\[([^\[\]]+)\]\s+News ID\s*:\s*(\d+)\s*\|\s*(?:URL:\s*)?(\S*)\s*(?:\|\s*(.*))?$")
+
+
+class EventStore:
+    """
+    One SQLite file of scrape events, written by every scraper instead of
+    free-text error logs.
+
+        events  one row per attempt: source, news_id, url, error_type
+                (or "ok"), stage, attempt, started_at, duration, message, run_id
+        latest  last outcome per (source, news_id, url), kept up to date on
+                every insert, so picking what to retry is an indexed lookup
+                instead of a scan of the whole history
+
+    Safe to share between threads. Inserts are buffered and written in
+    batches of `batch_size` (and on flush / close).
+    """
+
+    def __init__(self, path: str = "scrape_events.sqlite", run_id: Optional[str] = None, batch_size: int = 500):
+        self.path = path
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self.batch_size = batch_size
+        self.pending: List[tuple] = []
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id      TEXT NOT NULL,
+                source      TEXT NOT NULL,
+                news_id     TEXT NOT NULL,
+                url         TEXT NOT NULL,
+                error_type  TEXT NOT NULL,
+                stage       TEXT NOT NULL,
+                attempt     INTEGER NOT NULL,
+                started_at  REAL NOT NULL,
+                duration    REAL,
+                message     TEXT
+            );
+            CREATE INDEX IF NOT EXISTS events_key ON events (source, news_id, url);
+            CREATE INDEX IF NOT EXISTS events_type ON events (error_type, source);
+
+            CREATE TABLE IF NOT EXISTS latest (
+                source      TEXT NOT NULL,
+                news_id     TEXT NOT NULL,
+                url         TEXT NOT NULL,
+                event_id    INTEGER NOT NULL,
+                error_type  TEXT NOT NULL,
+                stage       TEXT NOT NULL,
+                attempt     INTEGER NOT NULL,
+                PRIMARY KEY (source, news_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS latest_type ON latest (error_type, source);
+
+            CREATE TRIGGER IF NOT EXISTS events_latest AFTER INSERT ON events BEGIN
+                INSERT OR REPLACE INTO latest
+                VALUES (NEW.source, NEW.news_id, NEW.url, NEW.id, NEW.error_type, NEW.stage, NEW.attempt);
+            END;
+            """
+        )
+        self.conn.commit()
+
+    # --------------Writing---------------
+
+    def log(self, source: str, news_id, url, error_type: str, stage: str = "", attempt: Optional[int] = None,
+            started_at: Optional[float] = None, duration: Optional[float] = None, message: str = "") -> None:
+        """
+        Record one outcome. error_type is "ok" for a success. Without
+        `attempt`, it is one more than the attempts already recorded for the key.
+        """
+        with self.lock:
+            if attempt is None:
+                attempt = self._last_attempt(source, news_id, url) + 1
+            self.pending.append((
+                self.run_id, source, str(news_id), str(url or ""), error_type, stage, attempt,
+                started_at if started_at is not None else time.time(), duration, message,
+            ))
+            if len(self.pending) >= self.batch_size:
+                self._flush_locked()
+
+    def ok(self, source: str, news_id, url, stage: str = "", **kwargs) -> None:
+        self.log(source, news_id, url, OK, stage, **kwargs)
+
+    def log_text(self, source: str, news_id, url, text: str, stage: str = "parse",
+                 attempt: Optional[int] = None, **kwargs) -> None:
+        """
+        One event per "[TYPE] ..." line of an old-style log text (e.g. what
+        parse_news wrote). The text is one fetch, so every line gets the same
+        attempt (one more than the key's last, unless given).
+        """
+        if attempt is None:
+            attempt = self.next_attempt(source, news_id, url)
+        for line in text.splitlines():
+            m = re.match(r"^\[([^\[\]]+)\]\s*(.*)$", line.strip())
+            if m:
+                self.log(source, news_id, url, m.group(1), stage, attempt=attempt, message=m.group(2), **kwargs)
+
+    def next_attempt(self, source: str, news_id, url) -> int:
+        with self.lock:
+            return self._last_attempt(source, news_id, url) + 1
+
+    def _last_attempt(self, source: str, news_id, url) -> int:
+        key = (source, str(news_id), str(url or ""))
+        for row in reversed(self.pending):
+            if row[1:4] == key:
+                return row[6]
+        found = self.conn.execute(
+            "SELECT attempt FROM latest WHERE source = ? AND news_id = ? AND url = ?", key
+        ).fetchone()
+        return found[0] if found else 0
+
+    def _flush_locked(self) -> None:
+        if self.pending:
+            self.conn.executemany(
+                "INSERT INTO events (run_id, source, news_id, url, error_type, stage, attempt, started_at, duration, message)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self.pending,
+            )
+            self.conn.commit()
+            self.pending = []
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self.lock:
+            self._flush_locked()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------------Reading---------------
+
+    def retry_set(self, error_types: Iterable[str], source: Optional[str] = None,
+                  max_attempt: Optional[int] = None) -> pd.DataFrame:
+        """
+        (news_id, url) pairs whose latest outcome is one of `error_types`
+        (optionally for one source, and below `max_attempt` attempts).
+        Columns: source, news_id, url, error_type, stage, attempt.
+        """
+        self.flush()
+        error_types = list(error_types)
+        sql = ("SELECT source, news_id, url, error_type, stage, attempt FROM latest"
+               f" WHERE error_type IN ({', '.join('?' * len(error_types))})")
+        params: List = list(error_types)
+        if source is not None:
+            sql += " AND source = ?"
+            params.append(source)
+        if max_attempt is not None:
+            sql += " AND attempt < ?"
+            params.append(max_attempt)
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    def counts(self, source: Optional[str] = None, latest_only: bool = True) -> Dict[str, int]:
+        """Number of keys (latest_only) or events per error type."""
+        self.flush()
+        table = "latest" if latest_only else "events"
+        sql = f"SELECT error_type, COUNT(*) FROM {table}"
+        params: List = []
+        if source is not None:
+            sql += " WHERE source = ?"
+            params.append(source)
+        sql += " GROUP BY error_type ORDER BY COUNT(*) DESC"
+        with self.lock:
+            return dict(self.conn.execute(sql, params).fetchall())
+
+    def history(self, news_id, source: Optional[str] = None) -> pd.DataFrame:
+        """Every event of one news_id, oldest first."""
+        self.flush()
+        sql = "SELECT * FROM events WHERE news_id = ?"
+        params: List = [str(news_id)]
+        if source is not None:
+            sql += " AND source = ?"
+            params.append(source)
+        with self.lock:
+            return pd.read_sql_query(sql + " ORDER BY id", self.conn, params=params)
+
+    # --------------Old text logs---------------
+
+    def import_text_log(self, path: str, source: str, urls: Optional[Dict[str, str]] = None) -> int:
+        """
+        Load a Misbar error_log.txt or Beam error_log_file_{i}.txt into the
+        store (free-text lines that match neither format are skipped).
+        `urls` maps news_id -> url for the Misbar format, which has no url;
+        Misbar lines whose news_id is not in `urls` are skipped (an event
+        keyed by an empty url could never be retried), and counted.
+        Returns the number of events imported.
+        """
+        n = skipped = 0
+        # one file is one run: all lines of a key there are one attempt
+        attempts: Dict[tuple, int] = {}
+        started_at = os.path.getmtime(path)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                m = _BEAM_LINE.match(line)
+                if m:
+                    error_type, news_id, url, message = m.groups()
+                else:
+                    m = _MISBAR_LINE.match(line)
+                    if not m:
+                        continue
+                    error_type, news_id, message = m.groups()
+                    url = (urls or {}).get(news_id)
+                    if not url:
+                        skipped += 1
+                        continue
+                key = (news_id, url)
+                if key not in attempts:
+                    attempts[key] = self.next_attempt(source, news_id, url)
+                self.log(source, news_id, url, error_type, "import", attempt=attempts[key],
+                         started_at=started_at, message=message or "")
+                n += 1
+        self.flush()
+        if skipped:
+            print(f"{path}: skipped {skipped} Misbar lines with no url for their news_id (pass urls=)")
+        return n
+
+    def import_text_logs(self, pattern: str, source: str, urls: Optional[Dict[str, str]] = None) -> int:
+        """import_text_log for every file matching a glob, e.g. 'accounts_data/error_log_file_*.txt'."""
+        return sum(self.import_text_log(p, source, urls) for p in sorted(glob.glob(pattern)))
+
+
+# events = EventStore("scrape_events.sqlite")
+# events.import_text_log("error_log.txt", "misbar", urls=dict(zip(urls_df["news_id"].astype(str), urls_df["news_url"])))
+# events.import_text_logs("accounts_data/error_log_file_*.txt", "beam")
+#
+# # instead of np.loadtxt / extract_info_from_logs + regex
+# retry_df = events.retry_set(["MissingTable", "EmptyTable"], source="beam")
+# print(events.counts("beam"))
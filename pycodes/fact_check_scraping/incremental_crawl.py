@@ -0,0 +1,277 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from misbar_crawler import RateLimiter, HostLimiter, make_session, get_with_retry
+from article_parsers import parse_misbar_lxml, parse_beam_lxml
+
+
+class CrawlState:
+    """
+    Per-article crawl state on disk, keyed by news_id:
+    the validators the server sent (ETag / Last-Modified), a hash of the page
+    body and a hash of what was parsed out of it.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str = "crawl_state.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                site          TEXT NOT NULL,
+                news_id       TEXT NOT NULL,
+                url           TEXT NOT NULL,
+                etag          TEXT,
+                last_modified TEXT,
+                content_hash  TEXT,
+                rows_hash     TEXT,
+                fetched_at    REAL NOT NULL,
+                changed_at    REAL NOT NULL,
+                PRIMARY KEY (site, news_id)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, site: str, news_id) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT url, etag, last_modified, content_hash, rows_hash FROM pages WHERE site = ? AND news_id = ?",
+                (site, str(news_id)),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("url", "etag", "last_modified", "content_hash", "rows_hash"), row))
+
+    def put_many(self, site: str, updates: List[Dict]) -> None:
+        """Store the state of every fetched page (one transaction)."""
+        now = time.time()
+        with self.lock:
+            for u in updates:
+                changed_at = now if u["changed"] else self.conn.execute(
+                    "SELECT changed_at FROM pages WHERE site = ? AND news_id = ?", (site, str(u["news_id"]))
+                ).fetchone()[0]
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (site, str(u["news_id"]), u["url"], u["etag"], u["last_modified"],
+                     u["content_hash"], u["rows_hash"], now, changed_at),
+                )
+            self.conn.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+def _sha256(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _parse(site: str, news_id, html_text: str, url: str) -> Tuple[List[Dict], List[Dict], str]:
+    """(news rows, account rows, error-log text) of one page."""
+    if site == "misbar":
+        log = io.StringIO()
+        news_info, accounts_list = parse_misbar_lxml(news_id, html_text, log)
+        if news_info and accounts_list is not None:
+            return [news_info], accounts_list, log.getvalue()
+        return [], [], log.getvalue()
+    if site == "beam":
+        label, accounts, log_lines = parse_beam_lxml(news_id, html_text, url)
+        news = [{"news_id": news_id, "label": label}] if label is not None else []
+        return news, accounts, "".join(log_lines)
+    raise ValueError(f"unknown site: {site}")
+
+
+def _check_page(site: str, news_id, url: str, prev: Optional[Dict], session, limiter, hosts, timeout) -> Dict:
+    """
+    Conditional GET of one article. The outcome is one of:
+      not_modified  the server answered 304
+      same_content  200 but the body hash did not change
+      same_rows     the body changed (ads, nonces...) but the parsed rows did not
+      new / changed rows to emit
+      error         network error, a non-200 answer, or a page without a news row;
+                    nothing is stored, so the article keeps its rows and is fetched again next run
+    """
+    headers = {}
+    if prev is not None and prev["url"] == url:
+        if prev["etag"]:
+            headers["If-None-Match"] = prev["etag"]
+        if prev["last_modified"]:
+            headers["If-Modified-Since"] = prev["last_modified"]
+
+    try:
+        r = get_with_retry(session, url, limiter, hosts, timeout=timeout, headers=headers)
+    except Exception as e:
+        return {"outcome": "error", "stage": "fetch", "news_id": news_id,
+                "log": f"[GENERAL_ERROR] {news_id}: {str(e)}\n", "bytes": 0}
+
+    state = {
+        "news_id": news_id,
+        "url": url,
+        "etag": r.headers.get("ETag") or (prev or {}).get("etag"),
+        "last_modified": r.headers.get("Last-Modified") or (prev or {}).get("last_modified"),
+        "content_hash": (prev or {}).get("content_hash"),
+        "rows_hash": (prev or {}).get("rows_hash"),
+        "changed": False,
+    }
+    if r.status_code == 304 and prev is not None:
+        return {"outcome": "not_modified", "state": state, "bytes": 0}
+    if r.status_code != 200:
+        # 404, 5xx still failing after the retries, ...: not a version of the article
+        return {"outcome": "error", "stage": "fetch", "news_id": news_id,
+                "log": f"[HTTP_ERROR] {news_id}: status {r.status_code} for {url}\n", "bytes": len(r.content)}
+
+    body = r.content
+    state["content_hash"] = _sha256(body)
+    if prev is not None and state["content_hash"] == prev["content_hash"]:
+        return {"outcome": "same_content", "state": state, "bytes": len(body)}
+
+    news, accounts, log = _parse(site, news_id, r.text, url)
+    if not news:
+        # maintenance / error page served with a 200: keep the rows we have
+        return {"outcome": "error", "stage": "parse", "news_id": news_id,
+                "log": log + f"[NO_NEWS_ROW] {news_id}: nothing parsed from {url}\n", "bytes": len(body)}
+    state["rows_hash"] = _sha256(json.dumps([news, accounts], sort_keys=True, ensure_ascii=False, default=str))
+    if prev is not None and state["rows_hash"] == prev["rows_hash"]:
+        return {"outcome": "same_rows", "state": state, "bytes": len(body)}
+
+    state["changed"] = True
+    return {
+        "outcome": "new" if prev is None else "changed",
+        "state": state,
+        "news": news,
+        "accounts": accounts,
+        "log": log,
+        "bytes": len(body),
+    }
+
+
+def incremental_crawl(
+    urls_df: pd.DataFrame,
+    site: str = "misbar",
+    state: Optional[CrawlState] = None,
+    out_dir: str = ".",
+    error_log_path: str = "error_log.txt",
+    workers: int = 8,
+    per_host: int = 4,
+    rate: float = 2.0,
+    timeout: float = 20,
+    events=None,
+) -> Dict[str, object]:
+    """
+    Re-crawl `urls_df` (news_id + news_url for Misbar, news_id + link for
+    Beam) sending conditional requests, and parse only pages whose body hash
+    changed since the last run.
+
+    Writes the new / changed rows of this run as
+        <out_dir>/<site>_news_delta_<run>.csv
+        <out_dir>/<site>_accounts_delta_<run>.csv
+        <out_dir>/<site>_delta_ids_<run>.csv    news_ids whose rows changed
+    and returns them as {"news", "accounts", "changed_ids"}. The crawl state
+    is only updated once the delta files are written.
+    With an event_store.EventStore, every article is recorded there: errors with
+    their stage (fetch / parse), successes as "ok" at stage "crawl" with the
+    outcome as message.
+    """
+    url_col = "news_url" if site == "misbar" else "link"
+    state = state or CrawlState()
+    session = make_session(workers)
+    limiter = RateLimiter(rate, burst=workers)
+    hosts = HostLimiter(per_host)
+    rows = list(zip(urls_df["news_id"], urls_df[url_col]))
+
+    def one(row):
+        news_id, url = row
+        started_at, t0 = time.time(), time.perf_counter()
+        res = _check_page(site, news_id, url, state.get(site, news_id), session, limiter, hosts, timeout)
+        res["started_at"], res["seconds"] = started_at, time.perf_counter() - t0
+        return res
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(one, rows))
+    finally:
+        session.close()
+    elapsed = time.perf_counter() - start
+
+    news_rows, account_rows, changed_ids, updates = [], [], [], []
+    with open(error_log_path, "a", encoding="utf-8") as error_log_file:
+        for (news_id, url), res in zip(rows, results):
+            error_log_file.write(res.get("log", ""))
+            if events is not None:
+                stage = res.get("stage", "parse")
+                timing = {"started_at": res["started_at"], "duration": res["seconds"]}
+                if res.get("log"):
+                    events.log_text(site, news_id, url, res["log"], stage, **timing)
+                else:
+                    events.ok(site, news_id, url, "crawl", message=res["outcome"], **timing)
+            if "state" in res:
+                updates.append(res["state"])
+            if res["outcome"] in ("new", "changed"):
+                news_rows.extend(res["news"])
+                account_rows.extend(res["accounts"])
+                changed_ids.append(res["state"]["news_id"])
+
+    run = time.strftime("%Y%m%d_%H%M%S")
+    os.makedirs(out_dir, exist_ok=True)
+    delta = {
+        "news": pd.DataFrame(news_rows),
+        "accounts": pd.DataFrame(account_rows),
+        "changed_ids": changed_ids,
+    }
+    if changed_ids:
+        delta["news"].to_csv(os.path.join(out_dir, f"{site}_news_delta_{run}.csv"), index=False, encoding="utf-8-sig")
+        delta["accounts"].to_csv(os.path.join(out_dir, f"{site}_accounts_delta_{run}.csv"), index=False, encoding="utf-8-sig")
+        pd.DataFrame({"news_id": changed_ids}).to_csv(
+            os.path.join(out_dir, f"{site}_delta_ids_{run}.csv"), index=False, encoding="utf-8-sig")
+    state.put_many(site, updates)
+
+    counts = Counter(res["outcome"] for res in results)
+    downloaded = sum(res["bytes"] for res in results)
+    print(f"{site}: {len(rows)} articles in {elapsed:.1f} s, {downloaded / 2 ** 20:.1f} MB downloaded")
+    for outcome in ("not_modified", "same_content", "same_rows", "changed", "new", "error"):
+        print(f"  {outcome:<13} {counts.get(outcome, 0)}")
+    return delta
+
+
+def apply_delta(full_df: pd.DataFrame, delta_df: pd.DataFrame, changed_ids: List, sort_by: List[str]) -> pd.DataFrame:
+    """
+    Full table after a run: every row of a changed news_id is replaced by
+    the delta rows (so accounts removed from an article disappear too).
+    """
+    changed = {str(i) for i in changed_ids}
+    kept = full_df[~full_df["news_id"].astype(str).isin(changed)]
+    merged = pd.concat([kept, delta_df], ignore_index=True)
+    return merged.sort_values(by=sort_by, kind="stable").reset_index(drop=True)
+
+
+# #--------------This block is for starting the automation------------------------
+# urls_df = pd.read_csv("misbar_urls.csv")
+# state = CrawlState("crawl_state.sqlite")
+# delta = incremental_crawl(urls_df, site="misbar", state=state, out_dir="misbar_deltas")
+# state.close()
+#
+# # only when a full table is needed
+# news_df = apply_delta(pd.read_csv("news_info_Misbar.csv"), delta["news"], delta["changed_ids"], ["news_id"])
+# accounts_df = apply_delta(pd.read_csv("accounts_Misbar.csv"), delta["accounts"], delta["changed_ids"], ["news_id"])
+#
+# # Beam reports (news_id + link)
+# urls_df = pd.read_excel("news_id_url.xlsx")
+# delta = incremental_crawl(urls_df, site="beam", state=CrawlState("crawl_state.sqlite"), out_dir="beam_deltas")
+# #------------------------------------------------------
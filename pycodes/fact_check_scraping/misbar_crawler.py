@@ -0,0 +1,319 @@
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+# RateLimiter / HostLimiter / make_session are shared with the FB url resolver
+# (incremental_crawl imports them from here)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http_limits import RateLimiter, HostLimiter, make_session  # noqa: E402
+
+
+# status codes worth another try; anything else is parsed as is (a 404 page
+# ends up as a [TITLE_ERROR], exactly like the notebook's requests.get)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def get_with_retry(session, url: str, limiter: Optional[RateLimiter] = None, hosts: Optional[HostLimiter] = None,
+                   timeout: float = 20, retries: int = 3, backoff: float = 2.0, headers: Optional[Dict] = None):
+    """
+    GET `url` and return the response. Connection errors, timeouts and
+    429 / 5xx answers are retried `retries` times with exponential backoff
+    (plus jitter, or the server's Retry-After); the last error is raised.
+    """
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        try:
+            if limiter is not None:
+                limiter.acquire()
+            if hosts is not None:
+                with hosts.get(url):
+                    r = session.get(url, timeout=timeout, headers=headers)
+            else:
+                r = session.get(url, timeout=timeout, headers=headers)
+            if r.status_code not in RETRY_STATUS or last:
+                return r
+            retry_after = r.headers.get("Retry-After")
+            wait = float(retry_after) if retry_after and retry_after.isdigit() else None
+        except (requests.ConnectionError, requests.Timeout):
+            if last:
+                raise
+            wait = None
+        if wait is None:
+            wait = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+        time.sleep(wait)
+
+
+def fetch_with_retry(session, url: str, limiter: Optional[RateLimiter] = None, hosts: Optional[HostLimiter] = None,
+                     timeout: float = 20, retries: int = 3, backoff: float = 2.0) -> str:
+    """Text of get_with_retry(url)."""
+    return get_with_retry(session, url, limiter, hosts, timeout, retries, backoff).text
+
+
+def parse_news(news_id, html_text: str, error_log_file) -> Tuple[Optional[Dict], Optional[List[Dict]]]:
+    """
+    news_info and accounts_list of one Misbar article page, or (None, None)
+    with an error-log line when the title, label or date is missing.
+    """
+    try:
+        soup = BeautifulSoup(html_text, 'lxml')
+
+        news_info = {
+            'news_id': news_id,
+            'title': 'undefined',
+            'description': 'undefined',
+            'claim_reviewed': 'undefined',
+            'type': 'undefined',
+            'label': 'undefined',
+            'date': 'undefined'
+        }
+        accounts_list = []
+
+        # TITLE
+        title_tag = soup.find('div', class_="blog--article_title")
+        if title_tag:
+            news_info['title'] = title_tag.text.strip()
+        else:
+            error_log_file.write(f"[TITLE_ERROR] {news_id}\n")
+            return None, None  # Skip news
+
+        # DESCRIPTION
+        try:
+            outer_div = soup.find('div', class_="deep-dive--article_story")
+            news_info['description'] = outer_div.find('div', class_="section-text").text.strip()
+        except:
+            pass  # Don't log, just ignore
+
+        # LABEL
+        label_tag = soup.find('div', class_="deep-dive--article_classification")
+        if label_tag:
+            news_info['label'] = label_tag.text.strip()
+        else:
+            error_log_file.write(f"[LABEL_ERROR] {news_id}\n")
+            return None, None  # Skip news
+
+        # JSON meta (ld+json)
+        try:
+            json_string = soup.find('script', type='application/ld+json').text
+            meta_info = json.loads(json_string)
+            news_info['date'] = meta_info.get("datePublished", "")[:10]
+            news_info['claim_reviewed'] = meta_info.get("claimReviewed", 'undefined')
+            if not news_info['date']:
+                error_log_file.write(f"[DATE_ERROR] {news_id}\n")
+                return None, None  # Skip news
+        except:
+            error_log_file.write(f"[DATE_ERROR] {news_id}\n")
+            return None, None  # Skip news
+
+        # SUBSECTION (type)
+        try:
+            uncleaned_string = '"""' + soup.find('script', id="dataLayerScript").text + '"""'
+            pattern = r"\{([^}]*)\}"
+            extracted_content = re.findall(pattern, uncleaned_string)[0]
+            json_string = '{' + extracted_content.replace("'", '"') + '}'
+            data = json.loads(json_string)
+            news_info['type'] = data.get("subsection", 'undefined')
+        except:
+            pass  # Don't log
+
+        # ACCOUNTS
+        try:
+            accounts_div = soup.find('div', class_="deep-dive--article_posted-on")
+            a_tags = accounts_div.find_all('a')
+            for a in a_tags:
+                account = a['href']
+                accounts_list.append({'news_id': news_id, 'accounts': account})
+        except:
+            pass  # Don't log
+
+        return news_info, accounts_list
+
+    except Exception as e:
+        error_log_file.write(f"[GENERAL_ERROR] {news_id}: {str(e)}\n")
+        return None, None  # Skip news on any major error
+
+
+def scrape_news(news_id, url, error_log_file, session=None, limiter=None, hosts=None, timeout: float = 20,
+                parser=parse_news):
+    """
+    The notebook's scrape_news, through a pooled session with retries.
+    `parser` can be swapped for article_parsers.parse_misbar_lxml.
+    """
+    try:
+        html_text = fetch_with_retry(session or requests, url, limiter, hosts, timeout=timeout)
+    except Exception as e:
+        error_log_file.write(f"[GENERAL_ERROR] {news_id}: {str(e)}\n")
+        return None, None
+    return parser(news_id, html_text, error_log_file)
+
+
+def crawl_misbar(urls_df: pd.DataFrame, error_log_path: str = "error_log.txt", workers: int = 8,
+                 per_host: int = 4, rate: float = 2.0, timeout: float = 20,
+                 parser=parse_news, events=None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Scrape every (news_id, news_url) row of `urls_df` on a thread pool.
+
+    Returns (all_news_info, all_accounts) in the row order of `urls_df`, same
+    content as the notebook loop. Error-log lines are appended to
+    `error_log_path` in row order too, so the log looks like a serial run's.
+    `rate` (requests/s over all workers) replaces the 5 s sleep per article.
+    With an event_store.EventStore, every article's outcome is also recorded there.
+    """
+    session = make_session(workers)
+    limiter = RateLimiter(rate, burst=workers)
+    hosts = HostLimiter(per_host)
+    rows = list(zip(urls_df["news_id"], urls_df["news_url"]))
+
+    def one(row):
+        news_id, url = row
+        log = io.StringIO()
+        started_at, t0 = time.time(), time.perf_counter()
+        news_info, accounts_list = scrape_news(news_id, url, log, session, limiter, hosts, timeout, parser)
+        return news_info, accounts_list, log.getvalue(), started_at, time.perf_counter() - t0
+
+    all_news_info: List[Dict] = []
+    all_accounts: List[Dict] = []
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool, \
+                open(error_log_path, "a", encoding="utf-8") as error_log_file:
+            for (news_id, url), (news_info, accounts_list, log, started_at, seconds) in zip(rows, pool.map(one, rows)):
+                error_log_file.write(log)
+                if events is not None:
+                    if log:
+                        events.log_text("misbar", news_id, url, log, "scrape", started_at=started_at, duration=seconds)
+                    else:
+                        events.ok("misbar", news_id, url, "scrape", started_at=started_at, duration=seconds)
+                if news_info and accounts_list is not None:
+                    all_news_info.append(news_info)
+                    all_accounts.extend(accounts_list)
+                    print(f"Done from scraping news with id = {news_id}\n")
+    finally:
+        session.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(rows)} articles in {elapsed:.1f} s ({len(rows) / elapsed if elapsed else 0:.1f} articles/s), "
+          f"{len(all_news_info)} scraped")
+    return all_news_info, all_accounts
+
+
+def save_pages(urls_df: pd.DataFrame, pages_dir: str, delay: float = 5.0) -> None:
+    """Save each article's HTML as <pages_dir>/<news_id>.html, to crawl offline through serve_pages."""
+    os.makedirs(pages_dir, exist_ok=True)
+    session = make_session(1)
+    for news_id, url in zip(urls_df["news_id"], urls_df["news_url"]):
+        path = os.path.join(pages_dir, f"{news_id}.html")
+        if os.path.exists(path):
+            continue
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(fetch_with_retry(session, url))
+        time.sleep(delay)
+    session.close()
+
+
+# --------------Local test server---------------
+
+class _PagesHandler(BaseHTTPRequestHandler):
+    """GET /<news_id> answers <pages_dir>/<news_id>.html after `delay` seconds; 404 otherwise."""
+
+    pages_dir = "."
+    delay = 0.0
+    fail_every = 0  # every n-th request gets a 503, to exercise the retries
+    counter = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.counter += 1
+            fail = cls.fail_every and cls.counter % cls.fail_every == 0
+        time.sleep(cls.delay)
+        path = os.path.join(cls.pages_dir, os.path.basename(self.path.strip("/")) + ".html")
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if not os.path.exists(path):
+            self.send_response(404)
+            self.end_headers()
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_pages(pages_dir: str, port: int = 0, delay: float = 0.1, fail_every: int = 0) -> ThreadingHTTPServer:
+    """Serve saved Misbar pages on localhost in a background thread."""
+    handler = type("PagesHandler", (_PagesHandler,), {
+        "pages_dir": pages_dir, "delay": delay, "fail_every": fail_every, "counter": 0, "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark_crawler(pages_dir: str, delay: float = 0.1, workers: int = 8, rate: float = 50.0) -> None:
+    """
+    Crawl the saved pages from a local server, serially (like the notebook,
+    without the sleep) and with crawl_misbar, and check both give the same output.
+    """
+    server = serve_pages(pages_dir, delay=delay)
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+    ids = sorted(int(f[:-5]) for f in os.listdir(pages_dir) if f.endswith(".html") and f[:-5].isdigit())
+    urls_df = pd.DataFrame({"news_id": ids, "news_url": [base + str(i) for i in ids]})
+    log_path = os.path.join(pages_dir, "_bench_error_log.txt")
+
+    try:
+        start = time.perf_counter()
+        serial_news, serial_accounts = [], []
+        session = make_session(1)
+        with open(log_path, "w", encoding="utf-8") as log:
+            for news_id, url in zip(urls_df["news_id"], urls_df["news_url"]):
+                news_info, accounts_list = scrape_news(news_id, url, log, session)
+                if news_info and accounts_list is not None:
+                    serial_news.append(news_info)
+                    serial_accounts.extend(accounts_list)
+        session.close()
+        serial = time.perf_counter() - start
+        print(f"serial:   {len(ids)} pages in {serial:.1f} s")
+
+        start = time.perf_counter()
+        news, accounts = crawl_misbar(urls_df, log_path, workers=workers, rate=rate)
+        crawled = time.perf_counter() - start
+        print(f"crawler:  {len(ids)} pages in {crawled:.1f} s ({serial / crawled if crawled else 0:.1f}x)")
+        print(f"same output: {news == serial_news and accounts == serial_accounts}")
+    finally:
+        server.shutdown()
+        os.remove(log_path)
+
+
+# #--------------This block replaces the notebook's scraping loop------------------------
+# urls_df = pd.read_csv("misbar_urls.csv")
+# all_news_info, all_accounts = crawl_misbar(urls_df, "error_log.txt", workers=8, rate=2.0)
+# news_df = pd.DataFrame(all_news_info)
+# accounts_df = pd.DataFrame(all_accounts)
+# news_df.to_csv("news_info_Misbar.csv", encoding="utf-8-sig", index=False)
+# accounts_df.to_csv("accounts_Misbar.csv", encoding="utf-8-sig", index=False)
+#
+# # benchmark against a local copy of the pages
+# save_pages(urls_df, "misbar_pages")
+# benchmark_crawler("misbar_pages")
+# #------------------------------------------------------
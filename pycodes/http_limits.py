@@ -0,0 +1,67 @@
+import threading
+import time
+import urllib.parse as urlparse
+from typing import Dict
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+
+
+# Shared by Proccess_FB_Urls/concurrent_resolver.py and fact_check_scraping/misbar_crawler.py;
+# both add pycodes/ to sys.path to import it.
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all worker threads.
+    `rate` requests per second on average, bursts up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostLimiter:
+    """At most `per_host` requests in flight to the same host."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self.semaphores: Dict[str, threading.Semaphore] = {}
+        self.lock = threading.Lock()
+
+    def get(self, url: str) -> threading.Semaphore:
+        host = urlparse.urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.Semaphore(self.per_host)
+            return self.semaphores[host]
+
+
+def make_session(pool_size: int = 16):
+    """requests.Session whose keep-alive pool is big enough for all workers (None without requests)."""
+    if requests is None:
+        return None
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,223 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import get_scorer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OrdinalEncoder, StandardScaler
+from threadpoolctl import threadpool_limits
+
+from tfidf_cache import SCORING, TFIDF_CONFIGS, FoldFeatureCache, default_cv, default_models, make_vectorizer
+
+
+TEXT_FEATURE = "text_stem"
+QUANTITY_FEATURES = ["hashtag_count", "emoji_count", "punct_count", "numeric_count", "stopwords_count", "word_count"]
+ENGAG_FEATURES = ["likes", "shares", "comments"]
+TEMPORAL_FEATURES = ["year", "month", "day", "day_of_week"]
+
+# the notebook's experiment blocks
+FEATURE_SETS: Dict[str, List[str]] = {
+    "lexical": ["lexical"],
+    "quantity": ["quantity"],
+    "lexical+quantity": ["lexical", "quantity"],
+    "engagement": ["engagement"],
+    "lexical+quantity+engagement": ["lexical", "quantity", "engagement"],
+    "temporal": ["temporal"],
+    "lexical+quantity+engagement+temporal": ["lexical", "quantity", "engagement", "temporal"],
+}
+
+
+def cyclic_encode_column(X, max_val):
+    X = np.array(X)
+    col = X[:, 0]
+    sin_col = np.sin(2 * np.pi * col / max_val)
+    cos_col = np.cos(2 * np.pi * col / max_val)
+    return np.column_stack([sin_col, cos_col])
+
+
+def _scaled_numbers() -> Pipeline:
+    return Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="mean")),
+        ("scaler", StandardScaler(with_mean=False)),
+    ])
+
+
+def _temporal_encoder() -> ColumnTransformer:
+    ordinal_encoder = Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="most_frequent")),
+        ("ordinal", OrdinalEncoder(categories=[[2023, 2024, 2025]], handle_unknown="use_encoded_value", unknown_value=8)),
+    ])
+    return ColumnTransformer([
+        ("ordinal_encoder", ordinal_encoder, ["year"]),
+        ("month", FunctionTransformer(cyclic_encode_column, kw_args={"max_val": 12}), ["month"]),
+        ("day", FunctionTransformer(cyclic_encode_column, kw_args={"max_val": 31}), ["day"]),
+        ("dow", FunctionTransformer(cyclic_encode_column, kw_args={"max_val": 7}), ["day_of_week"]),
+    ])
+
+
+def feature_group(name: str) -> Tuple[str, object, object]:
+    """(name, transformer, columns) of one feature group, as a ColumnTransformer entry."""
+    if name == "lexical":
+        return ("tfidf", make_vectorizer(TFIDF_CONFIGS["lexical"]), TEXT_FEATURE)
+    if name == "quantity":
+        return ("quantity_processor", _scaled_numbers(), QUANTITY_FEATURES)
+    if name == "engagement":
+        return ("engag_processor", _scaled_numbers(), ENGAG_FEATURES)
+    if name == "temporal":
+        return ("temp_processor", _temporal_encoder(), TEMPORAL_FEATURES)
+    raise ValueError(f"unknown feature group: {name}")
+
+
+def make_pipeline(groups: Sequence[str], model) -> Pipeline:
+    return Pipeline([
+        ("features", ColumnTransformer([feature_group(g) for g in groups])),
+        ("clf", model),
+    ])
+
+
+def limit_threads(model, threads: int):
+    """Copy of `model` with every n_jobs / nthread parameter (RandomForest, XGBoost, ...) set to `threads`."""
+    model = clone(model)
+    params = {k: threads for k in model.get_params() if k.split("__")[-1] in ("n_jobs", "nthread")}
+    return model.set_params(**params)
+
+
+# set in every worker by _init_worker, so each job only carries its (set, model, fold) key
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(X, y, splits, feature_sets, models, scoring, threads, cache) -> None:
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    # numpy / scipy are already loaded, so their BLAS pools are capped here as well
+    threadpool_limits(limits=threads)
+    _worker.update(X=X, y=y, splits=splits, feature_sets=feature_sets, models=models,
+                   scorers={name: get_scorer(s) for name, s in scoring.items()}, threads=threads, cache=cache)
+
+
+def _lexical_fold(fold: int) -> Tuple:
+    """TF-IDF (train, test) matrices of one fold, read from the FoldFeatureCache filled by run_experiments."""
+    train_idx, test_idx = _worker["splits"][fold]
+    return _worker["cache"].fold(_worker["X"][TEXT_FEATURE], train_idx, test_idx, TFIDF_CONFIGS["lexical"])
+
+
+def _run_job(feature_set: str, model_name: str, fold: int) -> Dict:
+    X, y = _worker["X"], _worker["y"]
+    train_idx, test_idx = _worker["splits"][fold]
+    row = {"feature_set": feature_set, "model": model_name, "fold": fold}
+    try:
+        model = limit_threads(_worker["models"][model_name], _worker["threads"])
+        groups = _worker["feature_sets"][feature_set]
+        if "lexical" in groups:
+            # the TF-IDF matrices come from the cache, the other groups are fitted
+            # here and stacked after them (make_pipeline would fit the TF-IDF again in every job)
+            X_train, X_test = _lexical_fold(fold)
+            start = time.perf_counter()
+            rest = [g for g in groups if g != "lexical"]
+            if rest:
+                other = ColumnTransformer([feature_group(g) for g in rest])
+                X_train = sparse.hstack([X_train, other.fit_transform(X.iloc[train_idx])], format="csr")
+                X_test = sparse.hstack([X_test, other.transform(X.iloc[test_idx])], format="csr")
+            estimator = model.fit(X_train, y.iloc[train_idx])
+        else:
+            start = time.perf_counter()
+            estimator = make_pipeline(groups, model).fit(X.iloc[train_idx], y.iloc[train_idx])
+            X_test = X.iloc[test_idx]
+        row["fit_time"] = time.perf_counter() - start
+        start = time.perf_counter()
+        for name, scorer in _worker["scorers"].items():
+            row[name] = scorer(estimator, X_test, y.iloc[test_idx])
+        row["score_time"] = time.perf_counter() - start
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def run_experiments(
+    X: pd.DataFrame,
+    y: pd.Series,
+    feature_sets: Optional[Dict[str, List[str]]] = None,
+    models: Optional[Dict[str, object]] = None,
+    cv=None,
+    scoring: Optional[Dict[str, str]] = None,
+    cores: Optional[int] = None,
+    threads_per_job: int = 1,
+    out_path: Optional[str] = None,
+    cache: Optional[FoldFeatureCache] = None,
+) -> pd.DataFrame:
+    """
+    Every (feature set, model, fold) of the grid as one job in a process
+    pool. `cores` (default: all) is the total budget: cores // threads_per_job
+    processes, each capped at threads_per_job threads (model n_jobs and the
+    BLAS / OpenMP pools), so RandomForest / XGBoost threads don't multiply
+    with the processes.
+    The lexical TF-IDF is fitted once per fold before the grid starts and
+    kept in `cache` (a FoldFeatureCache, ./tfidf_cache by default), rather
+    than once per job; the lexical sets' fit_time leaves that fit out.
+    Returns one row per job (scores, fit / score time, error if it failed),
+    also written to `out_path` (.csv or .parquet) when given.
+    """
+    feature_sets = feature_sets or FEATURE_SETS
+    models = models or default_models()
+    scoring = scoring or SCORING
+    cv = cv or default_cv()
+    X = X.reset_index(drop=True)
+    y = pd.Series(y).reset_index(drop=True)
+    splits = list(cv.split(X, y))
+    jobs = [(s, m, f) for s in feature_sets for m in models for f in range(len(splits))]
+
+    cache = cache or FoldFeatureCache()
+    if any("lexical" in groups for groups in feature_sets.values()):
+        start = time.perf_counter()
+        for train_idx, test_idx in splits:
+            cache.fold(X[TEXT_FEATURE], train_idx, test_idx, TFIDF_CONFIGS["lexical"])
+        print(f"lexical fold matrices in {time.perf_counter() - start:.1f} s")
+
+    cores = cores or os.cpu_count()
+    workers = max(1, min(len(jobs), cores // threads_per_job))
+    print(f"{len(jobs)} jobs on {workers} processes x {threads_per_job} threads")
+
+    rows: Dict[int, Dict] = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X, y, splits, feature_sets, models, scoring, threads_per_job, cache)) as pool:
+        futures = {pool.submit(_run_job, *job): i for i, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows[futures[future]] = row
+            status = row.get("error") or f"f1 {row.get('f1', float('nan')):.4f}"
+            print(f"[{done}/{len(jobs)}] {row['feature_set']} / {row['model']} / fold {row['fold']}: {status}")
+    print(f"grid finished in {time.perf_counter() - start:.1f} s")
+
+    # back in grid order, whatever order the jobs finished in
+    results = pd.DataFrame([rows[i] for i in range(len(jobs))])
+
+    if out_path is not None:
+        if out_path.endswith(".parquet"):
+            results.to_parquet(out_path, index=False)
+        else:
+            results.to_csv(out_path, index=False, encoding="utf-8-sig")
+    return results
+
+
+def summarize(results: pd.DataFrame, scoring: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Mean and std of every score per (feature set, model), in grid order."""
+    metrics = list(scoring or SCORING)
+    ok = results[results["error"].isna()] if "error" in results.columns else results
+    return ok.groupby(["feature_set", "model"], sort=False)[metrics].agg(["mean", "std"]).round(4)
+
+
+# #--------------This block is for starting the automation------------------------
+# if __name__ == "__main__":
+#     features = [TEXT_FEATURE] + QUANTITY_FEATURES + ENGAG_FEATURES + TEMPORAL_FEATURES
+#     results = run_experiments(X_train[features], y_train, cores=16, threads_per_job=2,
+#                               out_path="experiment_results.csv", cache=FoldFeatureCache("tfidf_cache"))
+#     print(summarize(results).to_string())
+# #------------------------------------------------------
@@ -0,0 +1,153 @@
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Memory
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import FeatureUnion
+from sklearn.svm import SVC
+from xgboost import XGBClassifier
+
+
+# TF-IDF settings compared in the training notebook. A dict of settings is
+# one TfidfVectorizer, a dict of named settings is a FeatureUnion of them.
+TFIDF_CONFIGS: Dict[str, Dict] = {
+    "unigram": {"ngram_range": (1, 1), "analyzer": "word"},
+    "n-gram": {"ngram_range": (1, 2), "analyzer": "word"},
+    "char n-gram": {"ngram_range": (3, 5), "analyzer": "char"},
+    "bigram": {"ngram_range": (2, 2), "analyzer": "word"},
+    "char 3-gram": {"ngram_range": (3, 3), "analyzer": "char"},
+    "char 4-gram": {"ngram_range": (4, 4), "analyzer": "char"},
+    "char 5-gram": {"ngram_range": (5, 5), "analyzer": "char"},
+    "lexical": {
+        "word": {"ngram_range": (1, 2)},
+        "char": {"analyzer": "char", "ngram_range": (3, 5)},
+    },
+}
+
+SCORING = {"accuracy": "accuracy", "precision": "precision", "recall": "recall", "f1": "f1"}
+
+
+def default_models() -> Dict[str, object]:
+    return {
+        "LogisticRegression": LogisticRegression(),
+        "SVC": SVC(),
+        "RandomForestClassifier": RandomForestClassifier(),
+        "XGBClassifier": XGBClassifier(),
+    }
+
+
+def default_cv() -> StratifiedKFold:
+    return StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+
+
+def make_vectorizer(config: Dict):
+    """TfidfVectorizer (or FeatureUnion of them) for one TFIDF_CONFIGS entry."""
+    if all(isinstance(v, dict) for v in config.values()):
+        return FeatureUnion([(name, TfidfVectorizer(**params)) for name, params in config.items()])
+    return TfidfVectorizer(**config)
+
+
+def _vectorize_fold(config: Dict, train_texts: np.ndarray, test_texts: np.ndarray, sklearn_version: str):
+    # cached by joblib.Memory on a hash of every argument, so the texts' content is part of the key
+    vectorizer = make_vectorizer(config)
+    return vectorizer.fit_transform(train_texts), vectorizer.transform(test_texts)
+
+
+class FoldFeatureCache:
+    """
+    TF-IDF matrices of every cross-validation fold, computed once per
+    (vectorizer config, fold texts) and kept on disk under `cache_dir`.
+    The key is a hash of the config and of the train / test texts, so a
+    change in the data or the settings gives new matrices, and the four
+    classifiers (and later runs) read the same ones.
+    """
+
+    def __init__(self, cache_dir: str = "tfidf_cache", verbose: int = 0):
+        self.memory = Memory(cache_dir, verbose=verbose)
+        self._vectorize = self.memory.cache(_vectorize_fold)
+
+    def fold(self, texts: pd.Series, train_idx: np.ndarray, test_idx: np.ndarray, config: Dict) -> Tuple:
+        """(X_train, X_test) of one split, the vectorizer fitted on the train texts."""
+        texts = np.asarray(texts, dtype=object)
+        return self._vectorize(config, texts[train_idx], texts[test_idx], sklearn.__version__)
+
+    def folds(self, texts: pd.Series, y: pd.Series, config: Dict, cv=None) -> List[Tuple]:
+        """[(X_train, X_test, y_train, y_test), ...] for every split of `cv` (the notebook's StratifiedKFold by default)."""
+        cv = cv or default_cv()
+        texts = np.asarray(texts, dtype=object)
+        y = np.asarray(y)
+        out = []
+        for train_idx, test_idx in cv.split(texts, y):
+            X_train, X_test = self.fold(texts, train_idx, test_idx, config)
+            out.append((X_train, X_test, y[train_idx], y[test_idx]))
+        return out
+
+    def clear(self) -> None:
+        self.memory.clear(warn=False)
+
+
+def cross_validate_cached(
+    texts: pd.Series,
+    y: pd.Series,
+    configs: Optional[Sequence[str]] = None,
+    models: Optional[Dict[str, object]] = None,
+    cache: Optional[FoldFeatureCache] = None,
+    cv=None,
+    scoring: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Same scores as cross_validate(Pipeline([("tfidf", ...), ("clf", model)]), ...)
+    for every config x model, with the fold matrices taken from the cache.
+    Returns one row per (config, model, fold) with the test scores and the
+    fit / score times; summarize with
+        results.groupby(["config", "model"])[list(SCORING)].mean()
+    """
+    configs = list(configs or TFIDF_CONFIGS)
+    models = models or default_models()
+    cache = cache or FoldFeatureCache()
+    scoring = scoring or SCORING
+    scorers = {name: get_scorer(s) for name, s in scoring.items()}
+
+    rows = []
+    for config_name in configs:
+        start = time.perf_counter()
+        folds = cache.folds(texts, y, TFIDF_CONFIGS[config_name], cv)
+        print(f"{config_name}: fold matrices in {time.perf_counter() - start:.1f} s")
+        for model_name, model in models.items():
+            for fold, (X_train, X_test, y_train, y_test) in enumerate(folds):
+                start = time.perf_counter()
+                clf = clone(model).fit(X_train, y_train)
+                fit_time = time.perf_counter() - start
+                start = time.perf_counter()
+                scores = {name: scorer(clf, X_test, y_test) for name, scorer in scorers.items()}
+                rows.append({
+                    "config": config_name,
+                    "model": model_name,
+                    "fold": fold,
+                    **scores,
+                    "fit_time": fit_time,
+                    "score_time": time.perf_counter() - start,
+                })
+    results = pd.DataFrame(rows)
+    print(results.groupby(["config", "model"], sort=False)[list(scoring)].mean().round(4).to_string())
+    return results
+
+
+# #--------------This block is for starting the automation------------------------
+# if __name__ == "__main__":
+#     cache = FoldFeatureCache("tfidf_cache")
+#     # stemmed vs not stemmed
+#     for column in ["text", "text_stem"]:
+#         cross_validate_cached(X_train[column], y_train, ["unigram", "n-gram", "char n-gram"], cache=cache)
+#     results = cross_validate_cached(X_train["text_stem"], y_train,
+#                                     ["bigram", "char 3-gram", "char 4-gram", "char 5-gram", "lexical"], cache=cache)
+#     results.to_csv("tfidf_results.csv", index=False, encoding="utf-8-sig")
+# #------------------------------------------------------
@@ -0,0 +1,222 @@
+import json
+import random
+import time
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+
+# Politeness delay between two pages (seconds), kept apart from page readiness waits.
+POLITENESS_DELAY = 5.0
+POLITENESS_JITTER = 0.3
+
+
+def politeness_delay(base: Optional[float] = None, jitter: Optional[float] = None) -> float:
+    """Sleep base * (1 +- jitter) seconds and return the time slept."""
+    base = POLITENESS_DELAY if base is None else base
+    jitter = POLITENESS_JITTER if jitter is None else jitter
+    delay = max(0.0, base * random.uniform(1 - jitter, 1 + jitter))
+    time.sleep(delay)
+    return delay
+
+
+_DOM_QUIET_JS = """
+const quietMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+const start = performance.now();
+let last = performance.now();
+const obs = new MutationObserver(() => { last = performance.now(); });
+obs.observe(document, {subtree: true, childList: true, characterData: true, attributes: true});
+(function check() {
+    const now = performance.now();
+    if (now - last >= quietMs || now - start >= timeoutMs) {
+        obs.disconnect();
+        done(now - start);
+    } else {
+        setTimeout(check, 50);
+    }
+})();
+"""
+
+
+def wait_for_dom_quiet(driver, quiet: float = 0.4, timeout: float = 4.0) -> bool:
+    """
+    Block until the DOM had no mutation for `quiet` seconds (e.g. after a
+    'See more' click), or `timeout`. Returns False if it timed out.
+    """
+    try:
+        previous = driver.timeouts.script
+    except (AttributeError, WebDriverException):
+        previous = None
+    try:
+        driver.set_script_timeout(timeout + 1)
+        waited_ms = driver.execute_async_script(_DOM_QUIET_JS, quiet * 1000, timeout * 1000)
+        return waited_ms < timeout * 1000
+    except WebDriverException:
+        return False
+    finally:
+        # the script timeout is global to the driver: give the caller's back
+        if previous is not None:
+            try:
+                driver.set_script_timeout(previous)
+            except WebDriverException:
+                pass
+
+
+# Requests the browser has sent but not finished, from the CDP Network events
+# chromedriver writes to the "performance" log (make_driver turns it on with
+# goog:loggingPrefs). Resource Timing entries only appear once a response is
+# complete, so they can't show what is still pending.
+_REQUEST_START = "Network.requestWillBeSent"
+_REQUEST_END = ("Network.loadingFinished", "Network.loadingFailed")
+
+# driver -> {requestId: time first seen}; kept between calls, since the log is
+# emptied by every read and a request can end after the call that saw it start
+_in_flight: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _network_events(driver) -> Optional[List[Tuple[str, str]]]:
+    """(method, requestId) of the Network events logged since the last read, None without the performance log."""
+    try:
+        entries = driver.get_log("performance")
+    except WebDriverException:
+        return None
+    events = []
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        method = message.get("method", "")
+        if method == _REQUEST_START or method in _REQUEST_END:
+            events.append((method, message.get("params", {}).get("requestId")))
+    return events
+
+
+def wait_for_network_idle(driver, idle: float = 0.5, timeout: float = 10.0, poll: float = 0.1,
+                          stale: float = 5.0) -> bool:
+    """
+    Block until document.readyState is 'complete' and no request has been in
+    flight for `idle` seconds. Returns False if it timed out.
+
+    In-flight requests are counted from the CDP Network events
+    (requestWillBeSent vs loadingFinished / loadingFailed). A request still
+    open after `stale` seconds (long-poll, or one of the previous page that
+    never reported its end) stops counting. Without the performance log
+    (a driver not built by make_driver) this falls back to readyState plus
+    wait_for_dom_quiet.
+    """
+    start = time.monotonic()
+    in_flight: Dict[str, float] = _in_flight.setdefault(driver, {})
+    quiet_since = start
+    while True:
+        events = _network_events(driver)
+        if events is None:
+            if not _ready_state_complete(driver, timeout):
+                return False
+            return wait_for_dom_quiet(driver, idle, max(0.0, timeout - (time.monotonic() - start)))
+        now = time.monotonic()
+        for method, request_id in events:
+            if method == _REQUEST_START:
+                # a redirect sends requestWillBeSent again with the same id
+                in_flight.setdefault(request_id, now)
+            else:
+                in_flight.pop(request_id, None)
+        for request_id in [r for r, sent in in_flight.items() if now - sent >= stale]:
+            del in_flight[request_id]
+        busy = bool(in_flight)
+        if busy or events:
+            quiet_since = now
+        try:
+            state = driver.execute_script("return document.readyState")
+        except WebDriverException:
+            return False
+        if state == "complete" and now - quiet_since >= idle:
+            return True
+        if now - start >= timeout:
+            return False
+        time.sleep(poll)
+
+
+def _ready_state_complete(driver, timeout: float) -> bool:
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script("return document.readyState") == "complete")
+        return True
+    except (TimeoutException, WebDriverException):
+        return False
+
+
+def wait_present(driver, locator: Tuple[str, str], timeout: float = 5.0):
+    """Element for `locator` as soon as it exists, or None after `timeout`."""
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.1).until(EC.presence_of_element_located(locator))
+    except TimeoutException:
+        return None
+
+
+def any_present(driver, locators: List[Tuple[str, str]]) -> bool:
+    """True if any locator matches right now (no waiting)."""
+    for by, value in locators:
+        try:
+            if driver.find_elements(by, value):
+                return True
+        except WebDriverException:
+            continue
+    return False
+
+
+class StepTimer:
+    """
+    Wall-clock accounting per scraping step.
+
+        timer = StepTimer()
+        with timer.step("load"):
+            driver.get(url)
+        timer.end_page()      # prints where this page's time went
+        timer.report()        # totals over all pages
+
+    With deferred_report=True, report() (called by the scrapers at the end of
+    every run) prints nothing; report(force=True) prints the totals once, e.g.
+    when one timer is shared by many one-row runs.
+    """
+
+    def __init__(self, verbose: bool = True, deferred_report: bool = False):
+        self.verbose = verbose
+        self.deferred_report = deferred_report
+        self.page: Dict[str, float] = defaultdict(float)
+        self.total: Dict[str, float] = defaultdict(float)
+        self.pages = 0
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.page[name] += time.perf_counter() - start
+
+    def end_page(self) -> Dict[str, float]:
+        page = dict(self.page)
+        for name, seconds in page.items():
+            self.total[name] += seconds
+        self.pages += 1
+        self.page.clear()
+        if self.verbose:
+            print("timing: " + ", ".join(f"{k}={v:.2f}s" for k, v in page.items()) + f" | total={sum(page.values()):.2f}s")
+        return page
+
+    def report(self, force: bool = False) -> Dict[str, float]:
+        if self.deferred_report and not force:
+            return dict(self.total)
+        grand = sum(self.total.values())
+        print(f"timing over {self.pages} pages ({grand:.0f} s):")
+        for name, seconds in sorted(self.total.items(), key=lambda kv: -kv[1]):
+            share = seconds / grand if grand else 0.0
+            avg = seconds / self.pages if self.pages else 0.0
+            print(f"  {name:<12} {seconds:8.1f} s  {share:6.1%}  {avg:.2f} s/page")
+        return dict(self.total)
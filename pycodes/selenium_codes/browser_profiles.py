@@ -0,0 +1,154 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+PROFILE_NAME = "Profile 1"
+
+# Only text, counts and the image src attribute are scraped, so the bytes of
+# images, videos and fonts are never needed.
+BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.m4s", "*.m4a", "*.webm", "*.mpd",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*video*.fbcdn.net*", "*video.twimg.com*",
+]
+
+_LEAN_ARGS = [
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-sync",
+    "--disable-notifications",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--no-first-run",
+    "--mute-audio",
+    "--autoplay-policy=user-gesture-required",
+]
+
+LAUNCH_PROFILES: Dict[str, Dict] = {
+    # what the scrapers used so far: headed Brave, everything loaded
+    "full": {"headless": False, "block_media": False, "lean": False, "window_size": None},
+    # headless, media/fonts blocked, small window, background services off
+    "lean": {"headless": True, "block_media": True, "lean": True, "window_size": (1280, 900)},
+    # same as lean but visible, handy to debug selectors
+    "lean_headed": {"headless": False, "block_media": True, "lean": True, "window_size": (1280, 900)},
+}
+
+
+def make_driver(user_data_dir: Optional[str] = None, profile: str = "full",
+                profile_name: str = PROFILE_NAME, cookies_path: Optional[str] = None):
+    """
+    Build a WebDriver for one of LAUNCH_PROFILES.
+
+    user_data_dir keeps the logged-in session (defaults to USER_DATA_DIR from .env);
+    cookies_path, if given, loads cookies saved with export_cookies instead,
+    for browsers started without the logged-in profile.
+    """
+    load_dotenv()
+    settings = LAUNCH_PROFILES[profile]
+    user_data_dir = user_data_dir or os.getenv("USER_DATA_DIR")
+
+    options = Options()
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+        options.add_argument(f"--profile-directory={profile_name}")
+    path_to_brave = os.getenv("path_to_brave")
+    if path_to_brave:
+        options.binary_location = path_to_brave
+
+    if settings["headless"]:
+        options.add_argument("--headless=new")
+    if settings["window_size"]:
+        options.add_argument("--window-size={},{}".format(*settings["window_size"]))
+    if settings["lean"]:
+        for arg in _LEAN_ARGS:
+            options.add_argument(arg)
+    if settings["block_media"]:
+        # images still get their src attribute in the DOM, they are just not downloaded
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+    # Network events in the "performance" log, read by adaptive_waits.wait_for_network_idle
+    # to count in-flight requests (only the Network domain, to keep the log small)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    chrome_driver_path = os.getenv("chrome_driver_path")
+    service = Service(executable_path=chrome_driver_path) if chrome_driver_path else Service()
+    driver = webdriver.Chrome(service=service, options=options)
+
+    if settings["block_media"]:
+        block_media(driver)
+    if cookies_path:
+        load_cookies(driver, cookies_path)
+    return driver
+
+
+def block_media(driver, patterns: List[str] = BLOCKED_URL_PATTERNS) -> None:
+    """Drop image / media / font requests through CDP request blocking."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def export_cookies(driver, path: str) -> None:
+    """Save every cookie of the browser (all domains) to a JSON file."""
+    cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cookies, f)
+
+
+def load_cookies(driver, path: str) -> None:
+    """Put cookies saved by export_cookies back into a browser."""
+    with open(path, "r", encoding="utf-8") as f:
+        cookies = json.load(f)
+    driver.execute_cdp_cmd("Network.enable", {})
+    for c in cookies:
+        params = {k: c[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires") if k in c}
+        if params.get("expires", 0) <= 0:
+            params.pop("expires", None)  # session cookie
+        driver.execute_cdp_cmd("Network.setCookie", params)
+
+
+def browser_rss_mb(driver) -> Optional[float]:
+    """Resident memory of the whole browser process tree (needs psutil)."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs if p.is_running()) / 2 ** 20
+    except psutil.Error:
+        return None
+
+
+def benchmark_profiles(urls: List[str], profiles: List[str] = ("full", "lean"), user_data_dir: Optional[str] = None) -> None:
+    """Average page-load time and peak browser RSS for each launch profile."""
+    from adaptive_waits import wait_for_network_idle
+
+    for profile in profiles:
+        driver = make_driver(user_data_dir, profile=profile)
+        load_times, peak_rss = [], 0.0
+        try:
+            for u in urls:
+                start = time.perf_counter()
+                driver.get(u)
+                wait_for_network_idle(driver)
+                load_times.append(time.perf_counter() - start)
+                peak_rss = max(peak_rss, browser_rss_mb(driver) or 0.0)
+        finally:
+            driver.quit()
+        avg = sum(load_times) / max(1, len(load_times))
+        rss = f"{peak_rss:.0f} MB" if psutil is not None else "n/a (install psutil)"
+        print(f"{profile:<12} load {avg:.2f} s/page   peak RSS {rss}")
@@ -1,10 +1,15 @@
 import pandas as pd
 
+from retry_queue import TECH_ERROR_TEXT, PARTLY_FALSE_TEXT
+
+# (scrape_facebook_posts / scrape_facebook_vids now queue these records with
+#  retry_queue.RetryQueue while scraping; this script is for older outputs)
+
 info_df = pd.read_csv("all_FB_vid_info.csv")
 
 
 # records with tech error
-condition = info_df["text"]  == "This may be because of a technical error that we're working to fix. Please try reloading this page."
+condition = info_df["text"]  == TECH_ERROR_TEXT
 
 filter_df = info_df[~ condition]
 
@@ -17,7 +22,7 @@ error_df = error_df.rename(columns={"url":"accounts"})
 error_df.to_csv("beam_FB_vid_urls_error.csv",index=False,encoding="utf-8-sig")
 
 # records with false check
-condition = info_df["text"] == "Partly false. Reviewed by third-party fact-checkers."
+condition = info_df["text"] == PARTLY_FALSE_TEXT
 check_false_df = info_df[condition]
 check_false_df = check_false_df[["news_id","url"]]
 check_false_df = check_false_df.rename(columns={"url":"accounts"})
@@ -13,6 +13,11 @@ from selenium.common.exceptions import NoSuchElementException, TimeoutException,
 import pandas as pd
 from dotenv import load_dotenv
 
+from run_journal import RunJournal
+from fb_post_js_extractor import extract_post_fields_js
+from retry_queue import RetryQueue, drain, sentinel_of
+from adaptive_waits import StepTimer, any_present, politeness_delay, wait_for_dom_quiet, wait_for_network_idle, wait_present
+
 def _to_int(text: str) -> int | None:
     if not text:
         return None
@@ -98,7 +103,7 @@ def extract_text(driver):
                 (By.XPATH, "//div[contains(@class, 'xxyinxu5 xyri2b x1g2khh7 x1c1uobl') or text()='See more']"))
                 )
             see_more_button.click()
-            time.sleep(2)
+            wait_for_dom_quiet(driver)
         
         except:
             pass
@@ -318,18 +323,26 @@ def open_img(driver, timeout=5) -> bool:
     # nothing usable found
     return False
 
-def bypass_factcheck(driver, timeout=3):
+SEE_WHY_XPATH = "//*[normalize-space()='See why' and @role='button']"
+REMOVE_XPATH = "//div[@role='button' and @aria-label='Remove']"
+
+def bypass_factcheck(driver, timeout=3, appear=1.5):
     """
     If a fact-check overlay appears, click 'See why' then 'See post anyway'.
     Safe to call on every post open — it just skips if nothing is there.
+    Call it once the page is loaded: it waits at most `appear` seconds for an
+    overlay button to mount (overlays can come in late), and only then
+    `timeout` seconds per step.
     """
+    if wait_present(driver, (By.XPATH, f"{SEE_WHY_XPATH} | {REMOVE_XPATH}"), appear) is None:
+        return
+
     try:
+        if not any_present(driver, [(By.XPATH, SEE_WHY_XPATH)]):
+            raise TimeoutException()
         # Step 1: 'See why'
         see_why = WebDriverWait(driver, timeout).until(
-            EC.element_to_be_clickable((
-                By.XPATH,
-                "//*[normalize-space()='See why' and @role='button']"
-            ))
+            EC.element_to_be_clickable((By.XPATH, SEE_WHY_XPATH))
         )
         driver.execute_script("arguments[0].click();", see_why)
 
@@ -350,8 +363,10 @@ def bypass_factcheck(driver, timeout=3):
     #Clicks the 'Remove' cross button if it exists.
     # Safe to call on any page — does nothing if not found.
     try:
+        if not any_present(driver, [(By.XPATH, REMOVE_XPATH)]):
+            raise TimeoutException()
         cross_btn = WebDriverWait(driver, timeout).until(
-            EC.element_to_be_clickable((By.XPATH, "//div[@role='button' and @aria-label='Remove']"))
+            EC.element_to_be_clickable((By.XPATH, REMOVE_XPATH))
         )
         driver.execute_script("arguments[0].click();", cross_btn)
     
@@ -388,18 +403,74 @@ def split_dataframe(df, chunk_size=50):
 
 
 
-def scrape_facebook_posts(df,driver):
+def parse_post_page(driver, js_extract=False, timer=None):
+    """
+    All post fields (text, counts, user, image) of the page open in `driver`.
+    Used by scrape_facebook_posts and to replay saved snapshots.
+    """
+    timer = timer or StepTimer(verbose=False)
+
+    with timer.step("text"):
+        text = extract_text(driver)
+    fields = None
+    if js_extract:
+        with timer.step("js_fields"):
+            fields = extract_post_fields_js(driver)
+    if fields is not None:
+        likes, comments, shares = fields["likes"], fields["comments"], fields["shares"]
+        username, profile, image_src = fields["username"], fields["profile_url"], fields["image_src"]
+    else:
+        # Python path, also when the JS extractor failed on this page
+        with timer.step("counts"):
+            likes, comments, shares = extract_likes_comments_shares(driver)
+        with timer.step("user"):
+            username, profile = get_username_and_profile_selenium(driver)
+        with timer.step("image"):
+            image_src = get_post_image_src(driver)
+
+    return {
+        "text":text,
+        "like":likes,
+        "comments":comments,
+        "shares": shares,
+        "username":username,
+        "profile_url": profile,
+        "image_src": image_src
+    }
+
+def scrape_facebook_posts(df,driver,journal=None,timer=None,js_extract=False,snapshots=None,events=None,retry_queue=None):
+    """
+    Scrape every post url in df['accounts'].
+    With a RunJournal, each result is logged as soon as it is scraped
+    and rows already in the journal are skipped.
+    A StepTimer (one is created if not given) records where each page's time goes.
+    js_extract=True computes counts, user and image in the browser with one
+    script call (fb_post_js_extractor) instead of one call per element.
+    With a SnapshotStore, the rendered DOM of every page is saved for offline replay.
+    With an EventStore (fact_check_scraping/event_store.py), each page's outcome is recorded.
+    With a RetryQueue, technical-error / "Partly false" results are queued to be
+    scraped again (retry_queue.drain).
+    """
 
     if "accounts" not in df.columns:
         raise ValueError("DataFrame must contain an 'accounts' column with post URLs.")
 
     out: List[Dict[str, str]] = []
+    timer = timer or StepTimer()
 
     for index , row in df.iterrows():
+        if journal is not None and journal.is_done(row["news_id"], row["accounts"]):
+            continue
+        started_at = time.time()
         try:
-            driver.get(row["accounts"])
+            with timer.step("load"):
+                driver.get(row["accounts"])
+                wait_for_network_idle(driver)
         except:
             print("error: ERR_NAME_NOT_RESOLVED")
+            if events is not None:
+                events.log("fb_post", row["news_id"], row["accounts"], "ERR_NAME_NOT_RESOLVED", "load",
+                           started_at=started_at, duration=time.time() - started_at)
             result = {
             "news_id":row["news_id"],
             "url":row["accounts"],
@@ -412,45 +483,45 @@ def scrape_facebook_posts(df,driver):
             "image_src": None
             }
             out.append(result)
+            if journal is not None:
+                journal.append(result)
+            timer.end_page()
             continue
 
-        bypass_factcheck(driver)
-        open_img(driver)
-        bypass_factcheck(driver)
+        with timer.step("overlay"):
+            bypass_factcheck(driver)
+        with timer.step("open_img"):
+            if open_img(driver):
+                wait_for_network_idle(driver)
+        with timer.step("overlay"):
+            bypass_factcheck(driver)
 
-        text = extract_text(driver)
-        likes, comments, shares = extract_likes_comments_shares(driver)
-        username, profile = get_username_and_profile_selenium(driver)
-        image_src = get_post_image_src(driver)
-        result = {
-            "news_id":row["news_id"],
-            "url":row["accounts"],
-            "text":text,
-            "like":likes,
-            "comments":comments,
-            "shares": shares,
-            "username":username,
-            "profile_url": profile,
-            "image_src": image_src
-        }
+        fields = parse_post_page(driver, js_extract=js_extract, timer=timer)
+        result = {"news_id":row["news_id"], "url":row["accounts"], **fields}
         print(result)
+        if events is not None:
+            events.log("fb_post", row["news_id"], row["accounts"], sentinel_of(result) or "ok", "parse",
+                       started_at=started_at, duration=time.time() - started_at)
+        if retry_queue is not None:
+            retry_queue.push_if_sentinel("fb_post", result)
         out.append(result)
-        time.sleep(5)
+        if journal is not None:
+            journal.append(result)
+        if snapshots is not None:
+            snapshots.capture(driver, row["accounts"], news_id=row["news_id"], kind="fb_post")
+        with timer.step("politeness"):
+            politeness_delay()
+        timer.end_page()
+    timer.report()
     return out
 
 
 # #--------------This block is for starting the automation------------------------
-#load_dotenv()
-# chrome_driver_path = os.getenv("chrome_driver_path")
-# path_to_brave = os.getenv("path_to_brave")
-# options = Options()
-# USER_DATA_DIR = os.getenv("USER_DATA_DIR")
-# PROFILE_NAME = "Profile 1"
-# options.add_argument(f"--user-data-dir={USER_DATA_DIR}")
-# options.add_argument(f"--profile-directory={PROFILE_NAME}")
-# options.binary_location = path_to_brave
-# service = Service(executable_path=chrome_driver_path)
-# driver = webdriver.Chrome(service=service, options=options)
+# # (to scrape with several browsers at once use scrape_runner.DriverPool + run_sharded)
+# # (to try a plain HTTP fetch first and open only the rest in the browser use http_fetch_tier.tiered_scrape)
+# from browser_profiles import make_driver
+# # profile="lean": headless, images/video/fonts blocked, same logged-in user data dir
+# driver = make_driver(os.getenv("USER_DATA_DIR"), profile="full")
 
 
 
@@ -463,18 +534,14 @@ def scrape_facebook_posts(df,driver):
 
 # url_df = pd.read_csv("Misbar_FB_posts_urls.csv")
 
-# url_dfs = split_dataframe(url_df,chunk_size=20)
-
-# all_results = []
-
-# for i, df in enumerate(url_dfs, 1):
-#     results = scrape_facebook_posts(df, driver)
-#     result_df = pd.DataFrame(results)
-#     all_results.append(result_df)
-#     result_df.to_csv(f"FB_posts_info_{i}.csv",index=False,encoding="utf-8-sig")
-
+# # re-running after a crash continues where the journal stopped
+# # technical-error / "Partly false" pages are queued and retried at the end
+# queue = RetryQueue("retry_queue.sqlite")
+# with RunJournal("FB_posts_info.jsonl") as journal:
+#     scrape_facebook_posts(url_df, driver, journal=journal, retry_queue=queue)
+#     drain(queue, "fb_post", scrape_facebook_posts, driver, journal=journal)
+#     all_results_df = journal.to_dataframe(url_df)
 
-# all_results_df = pd.concat(all_results, ignore_index=True)
 # all_results_df.to_csv(f"all_FB_posts_info.csv",index=False,encoding="utf-8-sig")
 
 
@@ -12,6 +12,10 @@ from selenium.webdriver.chrome.options import Options
 import re
 from urllib.parse import urljoin
 
+from run_journal import RunJournal
+from retry_queue import RetryQueue, drain, sentinel_of
+from adaptive_waits import StepTimer, any_present, politeness_delay, wait_for_dom_quiet, wait_for_network_idle, wait_present
+
 
 
 def _collect_candidate_text_nodes(driver) -> List[str]:
@@ -43,13 +47,13 @@ def _collect_candidate_text_nodes(driver) -> List[str]:
         "//*[contains(@data-pagelet,'Reel') or contains(@data-pagelet,'Reels')]//span[@dir='auto']"
     ]
 
+    see_more = (By.XPATH, "//div[contains(@class, 'x1i10hfl xjbqb8w x6umtig x1b1mbwd xaqea5y xav7gou x9f619 x1ypdohk xt0b8zv xzsf02u x1s688f') or text()='See more']")
     try:
-        # Try to find the 'See More' button and click it
-        see_more_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'x1i10hfl xjbqb8w x6umtig x1b1mbwd xaqea5y xav7gou x9f619 x1ypdohk xt0b8zv xzsf02u x1s688f') or text()='See more']"))
-        )
-        see_more_button.click()
-        time.sleep(2) # Wait for content to expand
+        # Try to find the 'See More' button and click it (it may mount a moment after the caption)
+        if wait_present(driver, see_more, 1.5) is not None:
+            see_more_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable(see_more))
+            see_more_button.click()
+            wait_for_dom_quiet(driver) # Wait for content to expand
     except:
         pass # 'See More' button not found or not clickable, continue without expanding
 
@@ -98,61 +102,100 @@ def _pick_best_caption(candidates: List[str]) -> str:
     filtered.sort(key=len, reverse=True)
     return filtered[0].strip()
 
-def scrape_facebook_vids(df: pd.DataFrame, driver, wait_seconds: int = 30) -> List[Dict[str, str]]:
+def parse_reel_page(driver, wait_seconds: int = 30, timer=None, caption: bool = True) -> Dict[str, str]:
+    """
+    Caption, counts and poster of the reel open in `driver`.
+    Used by scrape_facebook_vids and to replay saved snapshots.
+    """
+    timer = timer or StepTimer(verbose=False)
+    text = ""
+    if caption:
+        try:
+            # Wait until the main region or the video container shows up – reels pages usually mount quickly.
+            with timer.step("main"):
+                if wait_present(driver, (By.XPATH, "//div[@role='main']"), wait_seconds) is None:
+                    # Try a softer wait for any visible text block
+                    WebDriverWait(driver, 4).until(
+                        EC.presence_of_element_located((By.XPATH, "//div[@dir='auto']"))
+                    )
+
+            # After expansion, gather candidates for caption and pick best
+            with timer.step("text"):
+                candidates = _collect_candidate_text_nodes(driver)
+                text = _pick_best_caption(candidates)
+        except Exception:
+            # keep text = "" for this URL
+            pass
+
+    with timer.step("counts"):
+        likes, comments, shares = get_reel_counts(driver)
+    with timer.step("user"):
+        name, profile_url = get_poster_name_and_url(driver)
+
+    return {"text": text,"like":likes,"comments":comments,"shares":shares,"username":name,"profile_url":profile_url}
+
+def scrape_facebook_vids(df: pd.DataFrame, driver, wait_seconds: int = 30, journal=None, timer=None, snapshots=None, events=None, retry_queue=None) -> List[Dict[str, str]]:
     """
     Takes a DataFrame with column 'accounts' that contains only /reel/ URLs.
     For each URL:
       - opens it (assumes you're already logged in to Facebook),
       - expands any 'See more',
       - extracts the full reel caption text (author's text).
+    With a RunJournal, rows already journaled are skipped and new ones are logged at once.
+    A StepTimer (one is created if not given) records where each page's time goes.
+    With a SnapshotStore, the rendered DOM of every page is saved for offline replay.
+    With an EventStore (fact_check_scraping/event_store.py), each page's outcome is recorded.
+    With a RetryQueue, technical-error / "Partly false" results are queued to be
+    scraped again (retry_queue.drain).
     Returns: list of dicts [{ 'url': ..., 'text': ... }, ...]
     """
     if "accounts" not in df.columns:
         raise ValueError("DataFrame must contain an 'accounts' column with /reel/ URLs.")
 
     out: List[Dict[str, str]] = []
+    timer = timer or StepTimer()
 
 
     for index , row in df.iterrows():
-        text = ""
+        if journal is not None and journal.is_done(row["news_id"], row["accounts"]):
+            continue
+        loaded = True
+        started_at = time.time()
         try:
             
-            driver.get(row["accounts"])
+            with timer.step("load"):
+                driver.get(row["accounts"])
+                wait_for_network_idle(driver)
 
             #bypass factcheck
-            bypass_factcheck(driver)
-
-            # Wait until the main region or the video container shows up – reels pages usually mount quickly.
-            try:
-                WebDriverWait(driver, wait_seconds).until(
-                    EC.presence_of_element_located((By.XPATH, "//div[@role='main']"))
-                )
-            except TimeoutException:
-                # Try a softer wait for any visible text block
-                WebDriverWait(driver, 4).until(
-                    EC.presence_of_element_located((By.XPATH, "//div[@dir='auto']"))
-                )
-
-    
-            # After expansion, gather candidates for caption and pick best
-            candidates = _collect_candidate_text_nodes(driver)
-            text = _pick_best_caption(candidates)
-
+            with timer.step("overlay"):
+                bypass_factcheck(driver)
         except Exception:
-            # keep text = "" for this URL; continue
-            pass
-        
-        likes, comments, shares = get_reel_counts(driver)
-        print("likes: ",likes,"comments: ",comments,"shares:",shares)
-        print("text: \n",text)
+            # text stays "" for this URL; continue
+            loaded = False
 
-        name, profile_url = get_poster_name_and_url(driver)
-        print("name: ",name,"profile_url: \n",profile_url)
+        fields = parse_reel_page(driver, wait_seconds, timer=timer, caption=loaded)
+        print("likes: ",fields["like"],"comments: ",fields["comments"],"shares:",fields["shares"])
+        print("text: \n",fields["text"])
+        print("name: ",fields["username"],"profile_url: \n",fields["profile_url"])
 
         # print(f"news_id:{row['news_id']}\nurl:{row['accounts']}\ntext:{text}")
-        out.append({"news_id":row["news_id"],"url": row["accounts"], "text": text,"like":likes,"comments":comments,"shares":shares,"username":name,"profile_url":profile_url})
+        result = {"news_id":row["news_id"],"url": row["accounts"], **fields}
+        out.append(result)
+        if events is not None:
+            events.log("fb_vid", row["news_id"], row["accounts"], (sentinel_of(result) or "ok") if loaded else "LOAD_ERROR",
+                       "parse" if loaded else "load", started_at=started_at, duration=time.time() - started_at)
+        if retry_queue is not None:
+            retry_queue.push_if_sentinel("fb_vid", result)
+        if journal is not None:
+            journal.append(result)
+        if snapshots is not None:
+            snapshots.capture(driver, row["accounts"], news_id=row["news_id"], kind="fb_vid")
         
-        time.sleep(5)
+        with timer.step("politeness"):
+            politeness_delay()
+        timer.end_page()
+    timer.report()
     return out
 
 
@@ -238,18 +281,26 @@ def get_poster_name_and_url(post, base="https://www.facebook.com"):
     return name, href
 
 
-def bypass_factcheck(driver, timeout=5):
+SEE_WHY_XPATH = "//*[normalize-space()='See why' and @role='button']"
+REMOVE_XPATH = "//div[@role='button' and @aria-label='Remove']"
+
+def bypass_factcheck(driver, timeout=5, appear=1.5):
     """
     If a fact-check overlay appears, click 'See why' then 'See post anyway'.
     Safe to call on every post open — it just skips if nothing is there.
+    Call it once the page is loaded: it waits at most `appear` seconds for an
+    overlay button to mount (overlays can come in late), and only then
+    `timeout` seconds per step.
     """
+    if wait_present(driver, (By.XPATH, f"{SEE_WHY_XPATH} | {REMOVE_XPATH}"), appear) is None:
+        return
+
     try:
+        if not any_present(driver, [(By.XPATH, SEE_WHY_XPATH)]):
+            raise TimeoutException()
         # Step 1: 'See why'
         see_why = WebDriverWait(driver, timeout).until(
-            EC.element_to_be_clickable((
-                By.XPATH,
-                "//*[normalize-space()='See why' and @role='button']"
-            ))
+            EC.element_to_be_clickable((By.XPATH, SEE_WHY_XPATH))
         )
         driver.execute_script("arguments[0].click();", see_why)
 
@@ -270,8 +321,10 @@ def bypass_factcheck(driver, timeout=5):
     #Clicks the 'Remove' cross button if it exists.
     # Safe to call on any page — does nothing if not found.
     try:
+        if not any_present(driver, [(By.XPATH, REMOVE_XPATH)]):
+            raise TimeoutException()
         cross_btn = WebDriverWait(driver, timeout).until(
-            EC.element_to_be_clickable((By.XPATH, "//div[@role='button' and @aria-label='Remove']"))
+            EC.element_to_be_clickable((By.XPATH, REMOVE_XPATH))
         )
         driver.execute_script("arguments[0].click();", cross_btn)
     
@@ -317,17 +370,9 @@ def split_dataframe(df, chunk_size=50):
 # })
 
 ##--------------This block is for starting the automation------------------------
-#load_dotenv()
-# chrome_driver_path = os.getenv("chrome_driver_path")
-# path_to_brave = os.getenv("path_to_brave")
-# options = Options()
-# USER_DATA_DIR = os.getenv("USER_DATA_DIR")
-# PROFILE_NAME = "Profile 1"
-# options.add_argument(f"--user-data-dir={USER_DATA_DIR}")
-# options.add_argument(f"--profile-directory={PROFILE_NAME}")
-# options.binary_location = path_to_brave
-# service = Service(executable_path=chrome_driver_path)
-# driver = webdriver.Chrome(service=service, options=options)
+# from browser_profiles import make_driver
+# # profile="lean": headless, images/video/fonts blocked, same logged-in user data dir
+# driver = make_driver(os.getenv("USER_DATA_DIR"), profile="full")
 
 
 # driver.get("https://www.facebook.com/")
@@ -338,18 +383,13 @@ def split_dataframe(df, chunk_size=50):
 # input()
 
 # url_df = pd.read_csv("beam_FB_vid_urls_false_check.csv")
-# url_dfs = split_dataframe(url_df,chunk_size=20)
-
-# all_results = []
-
-# for i, df in enumerate(url_dfs, 1):
-#     results = scrape_facebook_vids(df, driver)
-#     result_df = pd.DataFrame(results)
-#     all_results.append(result_df)
-#     result_df.to_csv(f"FB_vid_info_{i}.csv",index=False,encoding="utf-8-sig")
-
+# # technical-error / "Partly false" reels are queued and retried at the end
+# queue = RetryQueue("retry_queue.sqlite")
+# with RunJournal("FB_vid_info.jsonl") as journal:
+#     scrape_facebook_vids(url_df, driver, journal=journal, retry_queue=queue)
+#     drain(queue, "fb_vid", scrape_facebook_vids, driver, journal=journal)
+#     all_results_df = journal.to_dataframe(url_df)
 
-# all_results_df = pd.concat(all_results, ignore_index=True)
 # all_results_df.to_csv(f"all_FB_vid_info.csv",index=False,encoding="utf-8-sig")
 ##-----------------------------------------------------
 
@@ -0,0 +1,216 @@
+import glob
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+
+# One script that does, inside the browser, what extract_likes_comments_shares,
+# get_username_and_profile_selenium and get_post_image_src do from Python
+# with one WebDriver call per element. Same XPaths, same left/right-of-icon rule.
+_EXTRACT_JS = r"""
+const timeoutMs = arguments[0];
+const done = arguments[arguments.length - 1];
+
+const ARABIC_INDIC = "٠١٢٣٤٥٦٧٨٩";
+function nums(text) {
+    if (!text) return [];
+    const t = text.replace(/[٠-٩]/g, d => String(ARABIC_INDIC.indexOf(d)));
+    return (t.match(/\d+/g) || []).map(Number);
+}
+function first(xpath, scope) {
+    return document.evaluate(xpath, scope || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function all(xpath, scope) {
+    const r = document.evaluate(xpath, scope || document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const out = [];
+    for (let i = 0; i < r.snapshotLength; i++) out.push(r.snapshotItem(i));
+    return out;
+}
+function text(el) { return ((el && el.innerText) || "").trim(); }
+function centerX(el) { const r = el.getBoundingClientRect(); return (r.left + r.right) / 2; }
+function displayed(el) {
+    const r = el.getBoundingClientRect();
+    const st = getComputedStyle(el);
+    return r.width > 0 && r.height > 0 && st.visibility !== "hidden" && st.display !== "none";
+}
+
+const REACTED = "(@role='toolbar' or @role='group') and " +
+    "(contains(@aria-label,'See who reacted to this') or " +
+    "contains(translate(@aria-label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'reacted'))";
+
+function pickNumber(btn, side) {
+    const icon = first(".//i[@data-visualcompletion='css-img']", btn);
+    if (icon) {
+        const iconX = centerX(icon);
+        for (const sp of all(".//span[normalize-space()!='']", btn)) {
+            const vals = nums(text(sp));
+            if (!vals.length) continue;
+            const x = centerX(sp);
+            if (side === "left" && x < iconX) return vals[0];
+            if (side === "right" && x > iconX) return vals[0];
+        }
+    }
+    const n = nums(btn.innerText);
+    return n.length ? n[0] : null;
+}
+
+function engagement() {
+    const res = {likes: null, comments: null, shares: null};
+    const toolbarDoc = first("//*[" + REACTED + "]");
+    if (!toolbarDoc) return res;
+    const eng = first("ancestor::div[contains(@class,'x1n2onr6')][1]", toolbarDoc) || first("./ancestor::div[1]", toolbarDoc);
+    if (!eng) return res;
+
+    const toolbar = first(".//*[" + REACTED + "]", eng);
+    if (toolbar) {
+        const span = first("(//span[@aria-label='See who reacted to this'])[1]");
+        const parent = span ? first("ancestor::div[1]", span) : null;
+        res.likes = parent ? (text(parent) || null) : null;
+    }
+
+    const buttons = all(".//div[@role='button'][.//i[@data-visualcompletion='css-img']]", eng).filter(displayed).slice(0, 2);
+    if (buttons.length >= 1) res.comments = pickNumber(buttons[0], "left");
+    if (buttons.length >= 2) res.shares = pickNumber(buttons[1], "right");
+    if (res.comments === null && buttons.length)
+        res.comments = pickNumber(buttons[0], "left") || pickNumber(buttons[0], "right");
+    if (res.shares === null && buttons.length >= 2)
+        res.shares = pickNumber(buttons[1], "right") || pickNumber(buttons[1], "left");
+    return res;
+}
+
+function user() {
+    const div = first(".//div[contains(@class,'xu06os2') and contains(@class,'x1ok221b')]");
+    if (!div) return {username: null, profile_url: null};
+    const a = first(".//a[1]", div);
+    return {username: text(div) || null, profile_url: a ? (a.href || a.getAttribute("href")) : null};
+}
+
+const start = performance.now();
+(function poll() {
+    // get_post_image_src waits up to `timeout` for the image; do the same here
+    const img = first("//img[@data-visualcompletion='media-vc-image']");
+    if (!img && performance.now() - start < timeoutMs) { setTimeout(poll, 100); return; }
+    const out = Object.assign(engagement(), user());
+    out.image_src = img ? (img.src || img.getAttribute("src")) : null;
+    done(out);
+})();
+"""
+
+
+def extract_post_fields_js(driver, timeout: float = 3) -> Optional[Dict[str, Optional[object]]]:
+    """
+    likes, comments, shares, username, profile_url and image_src
+    of the open post, computed in the browser in a single WebDriver call.
+    None if the script failed or timed out (the caller falls back to
+    extract_post_fields_python).
+    """
+    try:
+        previous = driver.timeouts.script
+    except (AttributeError, WebDriverException):
+        previous = None
+    try:
+        driver.set_script_timeout(timeout + 5)
+        return driver.execute_async_script(_EXTRACT_JS, timeout * 1000)
+    except WebDriverException as e:
+        # JavascriptException / TimeoutException included
+        print(f"[JS_EXTRACT_ERROR] {type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}")
+        return None
+    finally:
+        # the script timeout is global to the driver: give the caller's back
+        if previous is not None:
+            try:
+                driver.set_script_timeout(previous)
+            except WebDriverException:
+                pass
+
+
+def extract_post_fields_python(driver) -> Dict[str, Optional[object]]:
+    """Same fields through the existing element-by-element Python functions."""
+    from facebook_post_info_scraper import (
+        extract_likes_comments_shares,
+        get_username_and_profile_selenium,
+        get_post_image_src,
+    )
+    likes, comments, shares = extract_likes_comments_shares(driver)
+    username, profile = get_username_and_profile_selenium(driver)
+    return {
+        "likes": likes,
+        "comments": comments,
+        "shares": shares,
+        "username": username,
+        "profile_url": profile,
+        "image_src": get_post_image_src(driver),
+    }
+
+
+class RoundTripCounter:
+    """
+    Counts WebDriver commands sent while active (every element call goes
+    through driver.execute, so this counts the HTTP hops to chromedriver).
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.count = 0
+
+    def __enter__(self):
+        original = self.driver.execute
+
+        def counting_execute(*args, **kwargs):
+            self.count += 1
+            return original(*args, **kwargs)
+
+        self.driver.execute = counting_execute
+        return self
+
+    def __exit__(self, *exc):
+        del self.driver.execute
+
+
+def compare_on_fixtures(driver, fixture_dir: str) -> List[Tuple[str, Dict, Dict]]:
+    """
+    Open every saved post page (*.html) in `fixture_dir`, run both
+    extractors, print round trips / time and return the mismatching pages.
+    """
+    mismatches = []
+    py_trips = js_trips = 0
+    py_time = js_time = 0.0
+    files = sorted(glob.glob(os.path.join(fixture_dir, "*.html")))
+
+    for path in files:
+        driver.get(Path(path).resolve().as_uri())
+
+        start = time.perf_counter()
+        with RoundTripCounter(driver) as c:
+            py = extract_post_fields_python(driver)
+        py_time += time.perf_counter() - start
+        py_trips += c.count
+
+        start = time.perf_counter()
+        with RoundTripCounter(driver) as c:
+            js = extract_post_fields_js(driver)
+        js_time += time.perf_counter() - start
+        js_trips += c.count
+
+        if py != js:
+            mismatches.append((path, py, js))
+
+    n = max(1, len(files))
+    print(f"fixtures: {len(files)}, mismatches: {len(mismatches)}")
+    print(f"python: {py_trips / n:.1f} round trips/page, {py_time / n * 1000:.0f} ms/page")
+    print(f"js:     {js_trips / n:.1f} round trips/page, {js_time / n * 1000:.0f} ms/page")
+    for path, py, js in mismatches:
+        print(f"  {os.path.basename(path)}\n    python: {py}\n    js:     {js}")
+    return mismatches
+
+
+# from selenium import webdriver
+# from selenium.webdriver.chrome.options import Options
+# options = Options()
+# options.add_argument("--headless=new")
+# driver = webdriver.Chrome(options=options)
+# compare_on_fixtures(driver, "fixtures/fb_posts")
+# driver.quit()
@@ -0,0 +1,362 @@
+import glob
+import html as html_lib
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+FB_POST_FIELDS = ["text", "like", "like_count", "comments", "shares", "username", "profile_url", "image_src"]
+TWEET_FIELDS = ["username_link", "username", "text", "engagement_text", "reply_count", "like_count", "image_link"]
+
+# A page counts as resolved over HTTP only if these fields were found,
+# otherwise the row goes to the Selenium scraper.
+FB_REQUIRED = ("text", "username")
+TWEET_REQUIRED = ("text", "username")
+
+# The HTTP tier can't see two browser fields: the likes-block text ("1.2K",
+# "You, Ali and 1.2K others") behind `like`, and the action bar aria-label
+# behind engagement_text (the syndication payload has no repost / bookmark /
+# view counts). Its rows leave those None and put the numbers it does get in
+# their own columns: like_count (FB reactions), reply_count / like_count
+# (tweets). Every record tiered_scrape returns or journals is stamped with
+# the tier that produced it.
+TIER_FIELD = "tier"
+
+
+def make_cookie_session(cookies_path: Optional[str] = None, pool_size: int = 8):
+    """
+    requests.Session with a pooled adapter and, if given, the cookies saved by
+    browser_profiles.export_cookies (so it sees what the logged-in browser sees).
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Language": "ar,en;q=0.8",
+        "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    })
+    if cookies_path:
+        with open(cookies_path, "r", encoding="utf-8") as f:
+            for c in json.load(f):
+                session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+    return session
+
+
+# --------------Facebook post HTML---------------
+
+_META_RE = re.compile(r'<meta\s+[^>]*?(?:property|name)="([^"]+)"[^>]*?content="([^"]*)"', re.IGNORECASE)
+_JSON_STR = r'"((?:[^"\\]|\\.)*)"'
+_FB_MESSAGE_RE = re.compile(r'"message":\{[^{}]*?"text":' + _JSON_STR)
+_FB_REACTIONS_RE = re.compile(r'"reaction_count":\{"count":(\d+)')
+_FB_COMMENTS_RE = re.compile(r'"comment_count":\{"total_count":(\d+)|"total_comment_count":(\d+)')
+_FB_SHARES_RE = re.compile(r'"share_count":\{"count":(\d+)')
+_FB_ACTOR_RE = re.compile(r'"actors":\[\{"__typename":"(?:User|Page)"[^{}]*?"name":' + _JSON_STR + r'[^{}]*?"url":' + _JSON_STR)
+_FB_OWNER_RE = re.compile(r'"owning_profile":\{"__typename":"(?:User|Page)","name":' + _JSON_STR + r',"id":"(\d+)"')
+
+
+def _json_unescape(s: str) -> str:
+    return json.loads('"' + s + '"')
+
+
+def meta_tags(page_html: str) -> Dict[str, str]:
+    """og:/twitter: meta tags of a page (first occurrence of each)."""
+    out: Dict[str, str] = {}
+    for key, value in _META_RE.findall(page_html):
+        out.setdefault(key.lower(), html_lib.unescape(value))
+    return out
+
+
+def parse_fb_post_html(page_html: str) -> Dict[str, Optional[object]]:
+    """
+    Post fields from the server-rendered HTML of a post page: the Relay JSON
+    embedded in the page first, og: meta tags as fallback.
+    Same keys as facebook_post_info_scraper.parse_post_page; missing parts are None.
+    `like` (the likes-block text) is always None here; the reaction count is like_count.
+    """
+    meta = meta_tags(page_html)
+
+    m = _FB_MESSAGE_RE.search(page_html)
+    text = _json_unescape(m.group(1)) if m else (meta.get("og:description") or None)
+
+    m = _FB_REACTIONS_RE.search(page_html)
+    like_count = int(m.group(1)) if m else None
+    m = _FB_COMMENTS_RE.search(page_html)
+    comments = int(m.group(1) or m.group(2)) if m else None
+    m = _FB_SHARES_RE.search(page_html)
+    shares = int(m.group(1)) if m else None
+
+    username = profile_url = None
+    m = _FB_ACTOR_RE.search(page_html)
+    if m:
+        username, profile_url = _json_unescape(m.group(1)), _json_unescape(m.group(2))
+    else:
+        m = _FB_OWNER_RE.search(page_html)
+        if m:
+            username = _json_unescape(m.group(1))
+            profile_url = f"https://www.facebook.com/{m.group(2)}"
+
+    return {
+        "text": text,
+        "like": None,
+        "like_count": like_count,
+        "comments": comments,
+        "shares": shares,
+        "username": username,
+        "profile_url": profile_url,
+        "image_src": meta.get("og:image") or None,
+    }
+
+
+def fetch_fb_post(session, url: str, timeout: float = 10) -> Optional[Dict]:
+    """parse_fb_post_html of `url`, or None if the page could not be fetched."""
+    try:
+        with session.get(url, timeout=timeout) as r:
+            if r.status_code != 200 or "login" in r.url:
+                return None
+            return parse_fb_post_html(r.text)
+    except requests.RequestException:
+        return None
+
+
+# --------------Tweets (syndication JSON)---------------
+
+SYNDICATION_URL = "https://cdn.syndication.twimg.com/tweet-result"
+_STATUS_ID_RE = re.compile(r"/status(?:es)?/(\d+)")
+_RADIX_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _js_to_string_radix(value: float, radix: int = 36) -> str:
+    """Number.prototype.toString(radix) of a positive double, digit for digit as V8 prints it."""
+    integer = math.floor(value)
+    fraction = value - integer
+    delta = max(math.nextafter(0.0, 1.0), 0.5 * (math.nextafter(value, math.inf) - value))
+    digits: List[int] = []
+    if fraction >= delta:
+        while True:
+            fraction *= radix
+            delta *= radix
+            digit = int(fraction)
+            digits.append(digit)
+            fraction -= digit
+            if fraction > 0.5 or (fraction == 0.5 and digit & 1):
+                if fraction + delta > 1:
+                    # round up, carrying into earlier digits
+                    while True:
+                        if not digits:
+                            integer += 1
+                            break
+                        d = digits.pop()
+                        if d + 1 < radix:
+                            digits.append(d + 1)
+                            break
+                    break
+            if fraction < delta:
+                break
+
+    integer = int(integer)
+    int_digits = []
+    while True:
+        integer, r = divmod(integer, radix)
+        int_digits.append(_RADIX_DIGITS[r])
+        if integer == 0:
+            break
+    out = "".join(reversed(int_digits))
+    if digits:
+        out += "." + "".join(_RADIX_DIGITS[d] for d in digits)
+    return out
+
+
+def syndication_token(tweet_id: str) -> str:
+    # ((Number(id) / 1e15) * Math.PI).toString(36).replace(/(0+|\.)/g, '') as in the embed widget
+    return re.sub(r"(0+|\.)", "", _js_to_string_radix(int(tweet_id) / 1e15 * math.pi))
+
+
+def parse_tweet_json(data: Dict) -> Dict[str, Optional[str]]:
+    """
+    Tweet fields from a syndication tweet-result payload: the keys of
+    twitter_info_scraper.parse_tweet_article, with engagement_text None (the
+    payload can't rebuild the page's aria-label, see TIER_FIELD) and the
+    counts it has as reply_count / like_count.
+    """
+    if not data or data.get("__typename") == "TweetTombstone":
+        return dict.fromkeys(TWEET_FIELDS)
+
+    user = data.get("user") or {}
+    screen_name = user.get("screen_name")
+
+    text = data.get("text")
+    if text and data.get("display_text_range"):
+        start, end = data["display_text_range"]
+        text = text[start:end]  # drops the trailing t.co media links, like the rendered tweetText
+
+    photos = data.get("photos") or []
+    media = data.get("mediaDetails") or []
+    image_link = photos[0].get("url") if photos else (media[0].get("media_url_https") if media else None)
+
+    return {
+        "username_link": f"https://x.com/{screen_name}" if screen_name else None,
+        "username": user.get("name"),
+        "text": html_lib.unescape(text) if text else None,
+        "engagement_text": None,
+        "reply_count": data.get("conversation_count"),
+        "like_count": data.get("favorite_count"),
+        "image_link": image_link,
+    }
+
+
+def fetch_tweet(session, url: str, timeout: float = 10) -> Optional[Dict]:
+    """parse_tweet_json of the tweet at `url`, or None if it could not be fetched."""
+    m = _STATUS_ID_RE.search(str(url))
+    if not m:
+        return None
+    tweet_id = m.group(1)
+    try:
+        with session.get(SYNDICATION_URL, params={"id": tweet_id, "token": syndication_token(tweet_id)},
+                         timeout=timeout) as r:
+            if r.status_code != 200 or not r.content:
+                return None
+            return parse_tweet_json(r.json())
+    except (requests.RequestException, ValueError):
+        return None
+
+
+# --------------Tiered scrape---------------
+
+def _is_resolved(fields: Optional[Dict], required: Tuple[str, ...]) -> bool:
+    return fields is not None and all(fields.get(k) not in (None, "") for k in required)
+
+
+class _TierJournal:
+    """RunJournal seen by the browser scraper: every record it appends is stamped with `tier`."""
+
+    def __init__(self, journal, tier: str):
+        self.journal = journal
+        self.tier = tier
+
+    def append(self, record: Dict) -> None:
+        self.journal.append({**record, TIER_FIELD: self.tier})
+
+    def __getattr__(self, name):
+        return getattr(self.journal, name)
+
+
+def tiered_scrape(df: pd.DataFrame, driver, scrape_fn, kind: str = "fb_post", session=None,
+                  journal=None, workers: int = 4, **scrape_kwargs) -> List[Dict]:
+    """
+    Scrape `df` (columns news_id / accounts) with a plain HTTP tier first and
+    the browser only for what it could not resolve.
+
+    kind="fb_post" pairs with scrape_facebook_posts, kind="tweet" with
+    scrape_tweets. Rows whose HTTP result lacks the required fields are handed
+    to scrape_fn(rest_df, driver, journal=journal, **scrape_kwargs).
+    Records come back in the row order of `df`, and are returned and
+    journaled with tier = "http" or "browser"; HTTP rows keep their counts
+    in their own columns (see TIER_FIELD). The share of rows each tier handled is
+    printed.
+    """
+    if kind == "fb_post":
+        fetch, required, url_field = fetch_fb_post, FB_REQUIRED, "url"
+    elif kind == "tweet":
+        fetch, required, url_field = fetch_tweet, TWEET_REQUIRED, "tweet_link"
+    else:
+        raise ValueError(f"unknown kind: {kind}")
+
+    session = session or make_cookie_session()
+    todo = df
+    if journal is not None:
+        todo = df[[not journal.is_done(n, u) for n, u in zip(df["news_id"], df["accounts"])]]
+
+    start = time.perf_counter()
+    urls = todo["accounts"].tolist()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fetched = list(pool.map(lambda u: fetch(session, u) if isinstance(u, str) else None, urls))
+    http_seconds = time.perf_counter() - start
+
+    by_key: Dict[Tuple[str, str], Dict] = {}
+    fallback_rows = []
+    for pos, fields in enumerate(fetched):
+        row = todo.iloc[pos]
+        if _is_resolved(fields, required):
+            record = {"news_id": row["news_id"], url_field: row["accounts"], **fields, TIER_FIELD: "http"}
+            by_key[(str(row["news_id"]), str(row["accounts"]))] = record
+            if journal is not None:
+                journal.append(record)
+        else:
+            fallback_rows.append(pos)
+
+    start = time.perf_counter()
+    fallback_df = todo.iloc[fallback_rows]
+    if len(fallback_df):
+        browser_journal = _TierJournal(journal, "browser") if journal is not None else None
+        for record in scrape_fn(fallback_df, driver, journal=browser_journal, **scrape_kwargs):
+            by_key[(str(record["news_id"]), str(record[url_field]))] = {**record, TIER_FIELD: "browser"}
+    browser_seconds = time.perf_counter() - start
+
+    n = len(todo)
+    n_http = n - len(fallback_df)
+    print(f"http tier:    {n_http}/{n} rows ({n_http / n if n else 0:.1%}) in {http_seconds:.0f} s")
+    print(f"browser tier: {len(fallback_df)}/{n} rows ({len(fallback_df) / n if n else 0:.1%}) in {browser_seconds:.0f} s")
+
+    return [by_key[k] for k in zip(todo["news_id"].astype(str), todo["accounts"].astype(str)) if k in by_key]
+
+
+def check_fixtures(fixture_dir: str, kind: str = "fb_post") -> List[Tuple[str, Dict]]:
+    """
+    Run the HTTP-tier parser over saved pages (*.html for fb_post, *.json
+    syndication payloads for tweet), offline. Prints how many would resolve
+    and returns (file, fields) for every fixture.
+    """
+    if kind == "fb_post":
+        pattern, required = "*.html", FB_REQUIRED
+    else:
+        pattern, required = "*.json", TWEET_REQUIRED
+
+    out = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, pattern))):
+        with open(path, "r", encoding="utf-8") as f:
+            fields = parse_fb_post_html(f.read()) if kind == "fb_post" else parse_tweet_json(json.load(f))
+        out.append((os.path.basename(path), fields))
+
+    resolved = sum(_is_resolved(fields, required) for _, fields in out)
+    print(f"{kind}: {resolved}/{len(out)} fixtures resolved without the browser")
+    for name, fields in out:
+        if not _is_resolved(fields, required):
+            print(f"  unresolved: {name} {fields}")
+    return out
+
+
+# #--------------This block is for starting the automation------------------------
+# from browser_profiles import make_driver, export_cookies
+# from facebook_post_info_scraper import scrape_facebook_posts
+# from run_journal import RunJournal
+#
+# driver = make_driver(os.getenv("USER_DATA_DIR"), profile="lean")
+# export_cookies(driver, "cookies.json")
+# session = make_cookie_session("cookies.json")
+#
+# url_df = pd.read_csv("Misbar_FB_posts_urls.csv")
+# with RunJournal("FB_posts_info.jsonl") as journal:
+#     tiered_scrape(url_df, driver, scrape_facebook_posts, kind="fb_post", session=session, journal=journal)
+#     all_results_df = journal.to_dataframe(url_df)
+# all_results_df.to_csv("all_FB_posts_info.csv", index=False, encoding="utf-8-sig")
+# driver.quit()
+# #------------------------------------------------------
@@ -0,0 +1,231 @@
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+
+# columns that, when any is filled, mean a post without text still had reactions
+REACTION_COLUMNS = ["like", "like_count", "comments", "shares"]
+
+
+def _json_text(v) -> Optional[str]:
+    # the raw JSON value as text: 12 stays "12" (pandas would make an int column with nulls "12.0")
+    if v is None:
+        return None
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, ensure_ascii=False)
+    return str(v)
+
+
+def _journal_lines(path: str) -> Iterator[Tuple[int, Dict]]:
+    """(line number, record) of every complete line of a RunJournal .jsonl."""
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield n, json.loads(line)
+            except json.JSONDecodeError:
+                # last line of a run that crashed mid-write, as RunJournal skips it
+                continue
+
+
+def _journal_key(rec: Dict, url_field: str) -> Tuple[Optional[str], Optional[str]]:
+    return _json_text(rec.get("news_id")), _json_text(rec.get(url_field))
+
+
+def _scan(path: str, url_field: str) -> Tuple[List[str], Optional[Dict[Tuple, int]]]:
+    """
+    Columns of one input, and for a .jsonl the line of the latest record of
+    every key (RunJournal.records() is latest-wins: a drained retry is
+    appended after the failed record it replaces). Only keys are kept.
+    """
+    if not path.endswith(".jsonl"):
+        return list(pd.read_csv(path, dtype=str, nrows=0, encoding="utf-8-sig").columns), None
+    columns: Dict[str, None] = {}
+    last: Dict[Tuple, int] = {}
+    for n, rec in _journal_lines(path):
+        columns.update(dict.fromkeys(rec))
+        last[_journal_key(rec, url_field)] = n
+    return list(columns), last
+
+
+def _read_chunks(path: str, chunksize: int, url_field: str = "url", last: Optional[Dict[Tuple, int]] = None,
+                 superseded: Optional[List[Tuple]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Scrape output (CSV, or a RunJournal .jsonl) in blocks of `chunksize` rows,
+    every column as text. With `last` (from _scan) a .jsonl yields only the
+    latest record of each key; the keys of the earlier ones go to `superseded`.
+    """
+    if path.endswith(".jsonl"):
+        rows = []
+        for n, rec in _journal_lines(path):
+            if last is not None:
+                key = _journal_key(rec, url_field)
+                if last.get(key) != n:
+                    if superseded is not None:
+                        superseded.append(key)
+                    continue
+            rows.append({k: _json_text(v) for k, v in rec.items()})
+            if len(rows) == chunksize:
+                yield pd.DataFrame(rows, dtype=object)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, dtype=object)
+    else:
+        yield from pd.read_csv(path, dtype=str, chunksize=chunksize, encoding="utf-8-sig")
+
+
+class _CsvSink:
+    """
+    One utf-8-sig CSV written a chunk at a time (the BOM and header only once),
+    every chunk reindexed to `columns` (the union over all inputs, so a chunk
+    without e.g. `tier` just leaves it empty). Rows go to `path`.tmp, which
+    replaces `path` only on commit(); a failed merge leaves no partial output.
+    """
+
+    def __init__(self, path: Optional[str], columns: List[str]):
+        self.path = path
+        self.tmp_path = path + ".tmp" if path else None
+        self.file = open(self.tmp_path, "w", encoding="utf-8-sig", newline="") if path else None
+        self.columns = columns
+        self.rows = 0
+        if self.file is not None:
+            pd.DataFrame(columns=columns).to_csv(self.file, index=False)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.file is None or df.empty:
+            return
+        df.reindex(columns=self.columns).to_csv(self.file, index=False, header=False)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+
+    def commit(self) -> None:
+        self.close()
+        if self.file is not None:
+            os.replace(self.tmp_path, self.path)
+
+    def discard(self) -> None:
+        self.close()
+        if self.file is not None and os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def stream_merge(
+    chunk_paths: Sequence[str],
+    source_path: str,
+    with_text_path: Optional[str],
+    no_text_path: Optional[str],
+    no_text_reaction_path: Optional[str],
+    all_path: Optional[str] = None,
+    url_field: str = "url",
+    chunksize: int = 5_000,
+) -> Dict[str, object]:
+    """
+    Join scrape outputs to the source url list on (news_id, url) and route
+    every row, in one pass, to:
+        with_text_path          rows with text
+        no_text_path            rows without text
+        no_text_reaction_path   rows without text but with a like / comments / shares value
+        all_path                every matched row (optional)
+
+    Chunks can come in any order and any number; only the keys are kept in
+    memory, rows are streamed `chunksize` at a time. Within a RunJournal
+    .jsonl the latest record of a key wins, as in RunJournal.records(), and
+    the earlier ones are reported as superseded. Across inputs the first
+    file holding a key wins and later rows are counted as duplicates.
+    Outputs have the union of all inputs' columns and are only written
+    (renamed into place) once the whole merge succeeded.
+    Returns (and prints) a report with the missing, duplicate, superseded
+    and unexpected keys.
+    """
+    source = pd.read_csv(source_path, dtype=str, usecols=["news_id", "accounts"], encoding="utf-8-sig")
+    expected = set(zip(source["news_id"], source["accounts"]))
+    del source
+
+    # one scan of every input first: the output header and, per journal, its latest lines
+    union: Dict[str, None] = {}
+    latest: Dict[str, Optional[Dict[Tuple, int]]] = {}
+    for path in chunk_paths:
+        path_columns, latest[path] = _scan(path, url_field)
+        union.update(dict.fromkeys(path_columns))
+    columns = list(union)
+
+    seen = set()
+    duplicates: List[Tuple[str, str]] = []
+    superseded: List[Tuple[str, str]] = []
+    unexpected: List[Tuple[str, str]] = []
+    sinks = {
+        "with_text": _CsvSink(with_text_path, columns),
+        "no_text": _CsvSink(no_text_path, columns),
+        "no_text_reaction": _CsvSink(no_text_reaction_path, columns),
+        "all": _CsvSink(all_path, columns),
+    }
+    try:
+        for path in chunk_paths:
+            for chunk in _read_chunks(path, chunksize, url_field, latest[path], superseded):
+                keys = list(zip(chunk["news_id"], chunk[url_field]))
+                keep = []
+                for key in keys:
+                    if key not in expected:
+                        unexpected.append(key)
+                        keep.append(False)
+                    elif key in seen:
+                        duplicates.append(key)
+                        keep.append(False)
+                    else:
+                        seen.add(key)
+                        keep.append(True)
+                chunk = chunk[keep]
+
+                no_text = chunk["text"].isna() | (chunk["text"] == "")
+                reaction_cols = [c for c in REACTION_COLUMNS if c in chunk.columns]
+                if reaction_cols:
+                    has_reaction = chunk[reaction_cols].notna().any(axis=1)
+                else:
+                    has_reaction = pd.Series(False, index=chunk.index)
+
+                sinks["all"].write(chunk)
+                sinks["with_text"].write(chunk[~no_text])
+                sinks["no_text"].write(chunk[no_text])
+                sinks["no_text_reaction"].write(chunk[no_text & has_reaction])
+    except BaseException:
+        for sink in sinks.values():
+            sink.discard()
+        raise
+    for sink in sinks.values():
+        sink.commit()
+
+    missing = sorted(expected - seen, key=str)
+    report = {
+        "source_rows": len(expected),
+        "matched": len(seen),
+        "missing": missing,
+        "duplicates": duplicates,
+        "superseded": superseded,
+        "unexpected": unexpected,
+        **{f"{name}_rows": sink.rows for name, sink in sinks.items()},
+    }
+    print(f"source keys: {len(expected)}, matched: {len(seen)}, missing: {len(missing)}, "
+          f"duplicates: {len(duplicates)}, superseded: {len(superseded)}, not in source: {len(unexpected)}")
+    print(f"with text: {sinks['with_text'].rows}, no text: {sinks['no_text'].rows}, "
+          f"no text but reactions: {sinks['no_text_reaction'].rows}")
+    for name in ("missing", "duplicates", "superseded", "unexpected"):
+        for news_id, url in report[name][:10]:
+            print(f"  {name}: news_id={news_id} url={url}")
+    return report
+
+
+def write_key_report(report: Dict[str, object], path: str) -> None:
+    """Missing / duplicate / superseded / unexpected keys of a stream_merge report as one CSV (news_id, url, problem)."""
+    rows = [
+        {"news_id": news_id, "url": url, "problem": name}
+        for name in ("missing", "duplicates", "superseded", "unexpected")
+        for news_id, url in report[name]
+    ]
+    pd.DataFrame(rows, columns=["news_id", "url", "problem"]).to_csv(path, index=False, encoding="utf-8-sig")
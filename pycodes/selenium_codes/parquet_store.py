@@ -0,0 +1,261 @@
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+# Column types of each stage's output. Columns not listed are stored with
+# the type pyarrow infers.
+SCHEMAS: Dict[str, Dict[str, pa.DataType]] = {
+    "fb_posts": {
+        "news_id": pa.int64(), "url": pa.string(), "text": pa.string(), "like": pa.string(),
+        "like_count": pa.int64(), "comments": pa.int64(), "shares": pa.int64(), "username": pa.string(),
+        "profile_url": pa.string(), "image_src": pa.string(), "tier": pa.string(),
+    },
+    "fb_vids": {
+        "news_id": pa.int64(), "url": pa.string(), "text": pa.string(), "like": pa.string(),
+        "comments": pa.string(), "shares": pa.string(), "username": pa.string(),
+        "profile_url": pa.string(), "image_src": pa.string(),
+    },
+    "tweets": {
+        "news_id": pa.int64(), "tweet_link": pa.string(), "username_link": pa.string(), "username": pa.string(),
+        "text": pa.string(), "engagement_text": pa.string(), "reply_count": pa.int64(), "like_count": pa.int64(),
+        "image_link": pa.string(), "tier": pa.string(),
+    },
+    "urls": {"news_id": pa.int64(), "accounts": pa.string()},
+    "misbar_news": {
+        "news_id": pa.int64(), "title": pa.string(), "description": pa.string(), "claim_reviewed": pa.string(),
+        "type": pa.string(), "label": pa.string(), "date": pa.string(),
+    },
+    "beam_accounts": {
+        "row_table_number": pa.int64(), "account_url": pa.string(), "account_name": pa.string(),
+        "followers_number": pa.string(), "label": pa.string(), "news_id": pa.int64(),
+    },
+}
+
+
+def _parse_int(v) -> Optional[int]:
+    """One value of an int64 column; None for empty, ValueError for anything that is not a whole number."""
+    if v is None or (isinstance(v, float) and pd.isna(v)) or v is pd.NA:
+        return None
+    if isinstance(v, str):
+        v = v.strip()
+        if v == "":
+            return None
+        try:
+            return int(v)
+        except ValueError:
+            v = float(v)  # "12.0", written by an older float column; raises for anything else
+    if isinstance(v, float) and not v.is_integer():
+        raise ValueError(v)
+    return int(v)
+
+
+def _int_column(s: pd.Series, col: str, stage: str) -> List[Optional[int]]:
+    values, bad = [], []
+    for i, v in zip(s.index, s):
+        try:
+            values.append(_parse_int(v))
+        except (ValueError, TypeError, OverflowError):
+            bad.append((i, v))
+    if bad:
+        shown = ", ".join(f"row {i}: {v!r}" for i, v in bad[:5])
+        raise ValueError(f"{stage}.{col}: {len(bad)} values are not integers ({shown})")
+    return values
+
+
+def _to_arrow(df: pd.DataFrame, stage: str) -> pa.Table:
+    """
+    DataFrame -> Table with the stage's column types (ints stay nullable,
+    numbers in text columns become text). A value of an int column that is
+    not a whole number raises ValueError instead of being stored as null.
+    """
+    types = SCHEMAS.get(stage, {})
+    arrays, names = [], []
+    for col in df.columns:
+        s = df[col]
+        t = types.get(col)
+        if t == pa.int64():
+            arr = pa.array(_int_column(s, col, stage), type=t)
+        elif t == pa.string():
+            arr = pa.array([None if pd.isna(v) else str(v) for v in s], type=t)
+        else:
+            arr = pa.array(s, from_pandas=True)
+        arrays.append(arr)
+        names.append(str(col))
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+class DatasetStore:
+    """
+    Scraped datasets as zstd-compressed Parquet, one directory per stage,
+    hive-partitioned by source and run:
+
+        <root>/<stage>/source=<source>/run=<run>/part-0.parquet
+
+    load() reads only the requested columns and pushes filters down to
+    partitions and row groups, so "fb_posts of source=misbar, rows with text"
+    does not parse the rest of the data.
+    """
+
+    def __init__(self, root: str = "datasets", compression: str = "zstd", row_group_size: int = 64_000):
+        self.root = root
+        self.compression = compression
+        self.row_group_size = row_group_size
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, stage: str, source: Optional[str] = None, run: Optional[str] = None) -> str:
+        p = os.path.join(self.root, stage)
+        if source is not None:
+            p = os.path.join(p, f"source={source}")
+            if run is not None:
+                p = os.path.join(p, f"run={run}")
+        return p
+
+    def save(self, df: pd.DataFrame, stage: str, source: str, run: Optional[str] = None) -> str:
+        """Write `df` as the (stage, source, run) partition, replacing it if it exists. Returns the run."""
+        run = run or time.strftime("%Y%m%d_%H%M%S")
+        part_dir = self.path(stage, source, run)
+        if os.path.isdir(part_dir):
+            shutil.rmtree(part_dir)
+        os.makedirs(part_dir)
+        pq.write_table(_to_arrow(df, stage), os.path.join(part_dir, "part-0.parquet"),
+                       compression=self.compression, row_group_size=self.row_group_size)
+        return run
+
+    def dataset(self, stage: str) -> ds.Dataset:
+        # partition values are always text (a run named "1" must not become an int)
+        partitioning = ds.partitioning(pa.schema([("source", pa.string()), ("run", pa.string())]), flavor="hive")
+        return ds.dataset(self.path(stage), format="parquet", partitioning=partitioning)
+
+    def load(self, stage: str, columns: Optional[List[str]] = None, filter: Optional[ds.Expression] = None,
+             source: Optional[str] = None, run: Optional[str] = None, latest: bool = False) -> pd.DataFrame:
+        """
+        Read a stage. `columns` limits what is read, `filter` is a pyarrow
+        expression pushed down to the files, e.g.
+            load("fb_posts", ["news_id", "text"], source="misbar", filter=ds.field("text").is_valid())
+        latest=True keeps only the newest run of each source.
+        """
+        expr = filter
+        if source is not None:
+            expr = _and(expr, ds.field("source") == source)
+        if run is None and latest:
+            runs = self.runs(stage, source)
+            if runs:
+                run_expr = None
+                for src, src_runs in runs.items():
+                    e = (ds.field("source") == src) & (ds.field("run") == src_runs[-1])
+                    run_expr = e if run_expr is None else (run_expr | e)
+                expr = _and(expr, run_expr)
+        if run is not None:
+            expr = _and(expr, ds.field("run") == run)
+        table = self.dataset(stage).to_table(columns=columns, filter=expr)
+        return table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+    def runs(self, stage: str, source: Optional[str] = None) -> Dict[str, List[str]]:
+        """{source: [run, ...]} oldest first."""
+        out: Dict[str, List[str]] = {}
+        base = self.path(stage)
+        if not os.path.isdir(base):
+            return out
+        for src_dir in sorted(os.listdir(base)):
+            if not src_dir.startswith("source="):
+                continue
+            src = src_dir[len("source="):]
+            if source is not None and src != source:
+                continue
+            out[src] = sorted(d[len("run="):] for d in os.listdir(os.path.join(base, src_dir)) if d.startswith("run="))
+        return out
+
+    def import_csv(self, csv_path: str, stage: str, source: str, run: Optional[str] = None) -> str:
+        """
+        Store an existing utf-8-sig CSV output as a partition. Every column is
+        read as text (a text column pandas would read as float keeps "12", not
+        "12.0"); the int columns of SCHEMAS are parsed strictly by _to_arrow.
+        """
+        return self.save(pd.read_csv(csv_path, dtype=str, encoding="utf-8-sig"), stage, source, run)
+
+    def export_csv(self, csv_path: str, stage: str, **load_kwargs) -> pd.DataFrame:
+        """Write a stage (or part of it, same arguments as load) as the usual utf-8-sig CSV."""
+        df = self.load(stage, **load_kwargs)
+        if load_kwargs.get("columns") is None:
+            df = df.drop(columns=["source", "run"])  # partition keys, not part of the old CSV layout
+        df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+        return df
+
+    def size_bytes(self, stage: str, source: Optional[str] = None, run: Optional[str] = None) -> int:
+        total = 0
+        for dirpath, _, files in os.walk(self.path(stage, source, run)):
+            total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in files)
+        return total
+
+
+def _and(a: Optional[ds.Expression], b: Optional[ds.Expression]) -> Optional[ds.Expression]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a & b
+
+
+def benchmark_storage(files: Sequence[Tuple[str, str, str]], root: str = "bench_datasets",
+                      columns: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+    """
+    For every (csv_path, stage, source): CSV read time and size against
+    Parquet write, full read and projected read (`columns[stage]`, default
+    news_id + text) time and size. Returns and prints the table.
+    """
+    store = DatasetStore(root)
+    rows = []
+    for csv_path, stage, source in files:
+        start = time.perf_counter()
+        df = pd.read_csv(csv_path, dtype=str, encoding="utf-8-sig")
+        csv_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run = store.save(df, stage, source, run="bench")
+        pq_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.load(stage, source=source, run=run)
+        pq_read = time.perf_counter() - start
+
+        cols = (columns or {}).get(stage) or [c for c in ("news_id", "text") if c in df.columns]
+        start = time.perf_counter()
+        store.load(stage, columns=cols, source=source, run=run)
+        pq_projected = time.perf_counter() - start
+
+        rows.append({
+            "file": os.path.basename(csv_path),
+            "rows": len(df),
+            "csv_MB": os.path.getsize(csv_path) / 2 ** 20,
+            "parquet_MB": store.size_bytes(stage, source, run) / 2 ** 20,
+            "csv_read_s": csv_read,
+            "parquet_write_s": pq_write,
+            "parquet_read_s": pq_read,
+            "parquet_projected_read_s": pq_projected,
+        })
+    shutil.rmtree(root, ignore_errors=True)
+    result = pd.DataFrame(rows)
+    print(result.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    return result
+
+
+# store = DatasetStore("datasets")
+# store.import_csv("all_FB_posts_info.csv", "fb_posts", "misbar", run="initial")
+# posts = store.load("fb_posts", ["news_id", "url", "text"], source="misbar", latest=True,
+#                    filter=ds.field("text").is_valid())
+# store.export_csv("Misbar_all_FB_posts_info_1.csv", "fb_posts", source="misbar", latest=True)
+#
+# benchmark_storage([
+#     ("all_FB_posts_info.csv", "fb_posts", "misbar"),
+#     ("all_FB_vid_info.csv", "fb_vids", "beam"),
+#     ("all_Twitter_info.csv", "tweets", "beam"),
+#     ("news_info_Misbar.csv", "misbar_news", "misbar"),
+#     ("accounts_data/accounts_info_file_merged.csv", "beam_accounts", "beam"),
+# ])
@@ -0,0 +1,177 @@
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+# page texts that mean "nothing was scraped, try again later"
+TECH_ERROR_TEXT = "This may be because of a technical error that we're working to fix. Please try reloading this page."
+PARTLY_FALSE_TEXT = "Partly false. Reviewed by third-party fact-checkers."
+
+SENTINELS = {
+    TECH_ERROR_TEXT: "technical_error",
+    PARTLY_FALSE_TEXT: "fact_check_gated",
+}
+
+
+def sentinel_of(record: Dict) -> Optional[str]:
+    """Reason a scraped record should be retried ("technical_error" / "fact_check_gated"), or None."""
+    text = record.get("text")
+    return SENTINELS.get(text.strip()) if isinstance(text, str) else None
+
+
+class RetryQueue:
+    """
+    Persistent queue (SQLite) of (source, news_id, url) to scrape again.
+
+    Every push counts one more attempt and schedules the next one after
+    base_delay * 2 ** (attempts - 1) seconds (capped at max_delay, with
+    jitter). Once a key reaches max_attempts for its reason it is marked
+    'failed' and not handed out any more; a good result marks it 'done'.
+
+    Safe to share between threads, and between processes (a separate
+    worker can drain the same file).
+    """
+
+    def __init__(self, path: str = "retry_queue.sqlite", base_delay: float = 60, max_delay: float = 3600,
+                 max_attempts: Optional[Dict[str, int]] = None, jitter: float = 0.2):
+        self.path = path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = {"technical_error": 4, "fact_check_gated": 2, **(max_attempts or {})}
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS retries (
+                source      TEXT NOT NULL,
+                news_id     TEXT NOT NULL,
+                url         TEXT NOT NULL,
+                reason      TEXT NOT NULL,
+                attempts    INTEGER NOT NULL,
+                next_at     REAL NOT NULL,
+                status      TEXT NOT NULL,
+                updated_at  REAL NOT NULL,
+                PRIMARY KEY (source, news_id, url)
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS retries_due ON retries (status, source, next_at)")
+        self.conn.commit()
+
+    def _delay(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def push(self, source: str, news_id, url: str, reason: str) -> str:
+        """Record one more failed attempt; returns the new status ('pending' or 'failed')."""
+        now = time.time()
+        key = (source, str(news_id), str(url))
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT attempts, status FROM retries WHERE source = ? AND news_id = ? AND url = ?", key
+            ).fetchone()
+            # a key that was done before and fails again (a later run) starts over
+            attempts = (row[0] if row and row[1] != "done" else 0) + 1
+            status = "failed" if attempts >= self.max_attempts.get(reason, 3) else "pending"
+            self.conn.execute(
+                "INSERT OR REPLACE INTO retries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, reason, attempts, now + self._delay(attempts), status, now),
+            )
+            self.conn.commit()
+        return status
+
+    def push_if_sentinel(self, source: str, record: Dict, url_field: str = "url") -> Optional[str]:
+        """push() the record if its text is a sentinel; returns the reason or None."""
+        reason = sentinel_of(record)
+        if reason is not None:
+            status = self.push(source, record["news_id"], record[url_field], reason)
+            print(f"retry queue: {reason} for {record[url_field]} ({status})")
+        return reason
+
+    def mark_done(self, source: str, news_id, url: str) -> None:
+        with self.lock:
+            self.conn.execute(
+                "UPDATE retries SET status = 'done', updated_at = ? WHERE source = ? AND news_id = ? AND url = ?",
+                (time.time(), source, str(news_id), str(url)),
+            )
+            self.conn.commit()
+
+    def due(self, source: str, now: Optional[float] = None) -> pd.DataFrame:
+        """Pending keys whose next attempt time has come, as a news_id / accounts / reason DataFrame (the scrapers' input)."""
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT news_id, url, reason FROM retries WHERE status = 'pending' AND source = ? AND next_at <= ?"
+                " ORDER BY next_at",
+                (source, now),
+            ).fetchall()
+        due = pd.DataFrame(rows, columns=["news_id", "accounts", "reason"])
+        # news_id comes back from SQLite as text
+        due["news_id"] = [int(i) if i.lstrip("-").isdigit() else i for i in due["news_id"]]
+        return due
+
+    def next_wait(self, source: str) -> Optional[float]:
+        """Seconds until the next pending key is due (0 if one is due now), None if nothing is pending."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(next_at) FROM retries WHERE status = 'pending' AND source = ?", (source,)
+            ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def stats(self, source: Optional[str] = None) -> Dict[str, int]:
+        sql = "SELECT status, COUNT(*) FROM retries"
+        params: List = []
+        if source is not None:
+            sql += " WHERE source = ?"
+            params.append(source)
+        with self.lock:
+            return dict(self.conn.execute(sql + " GROUP BY status", params).fetchall())
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+def drain(queue: RetryQueue, source: str, scrape_fn, driver, journal=None, wait: bool = True,
+          max_wait: float = 3600, **scrape_kwargs) -> List[Dict]:
+    """
+    Re-scrape what is due in `queue` for `source` ("fb_post" with
+    scrape_facebook_posts, "fb_vid" with scrape_facebook_vids) until nothing
+    is pending. Sentinel results are pushed back (backoff / max attempts
+    apply), the others are marked done. Every retry result is appended to
+    `journal`, replacing the sentinel record there.
+    With wait=True it sleeps until the next key is due (at most `max_wait`
+    per sleep); otherwise it stops once nothing is due right now.
+    """
+    retried: List[Dict] = []
+
+    while True:
+        due = queue.due(source)
+        if due.empty:
+            pending_in = queue.next_wait(source)
+            if pending_in is None or not wait:
+                break
+            time.sleep(min(pending_in, max_wait))
+            continue
+
+        # journal=None: the scraper would skip these keys, they are already journaled
+        seen = set()
+        for record in scrape_fn(due, driver, journal=None, **scrape_kwargs):
+            seen.add((str(record["news_id"]), str(record["url"])))
+            if queue.push_if_sentinel(source, record) is None:
+                queue.mark_done(source, record["news_id"], record["url"])
+            if journal is not None:
+                journal.append(record)
+            retried.append(record)
+        # keys the scraper returned nothing for still count as an attempt
+        for news_id, url, reason in zip(due["news_id"], due["accounts"], due["reason"]):
+            if (str(news_id), str(url)) not in seen:
+                queue.push(source, news_id, url, reason)
+
+    print(f"retry queue {source}: {queue.stats(source)}")
+    return retried
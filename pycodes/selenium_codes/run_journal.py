@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+def _json_default(o):
+    # numpy / pandas scalars (news_id is usually numpy.int64)
+    if hasattr(o, "item"):
+        return o.item()
+    return str(o)
+
+
+class RunJournal:
+    """
+    Append-only JSONL log of scraped records, shared by scrape_facebook_posts,
+    scrape_facebook_vids and scrape_tweets.
+
+    Every record is written and flushed as soon as it is scraped, so after a
+    crash the next run (same journal file) skips the (news_id, url) keys that
+    are already done. `url_field` is the record key holding the url
+    ("url" for the Facebook scrapers, "tweet_link" for Twitter).
+    """
+
+    def __init__(self, path: str, url_field: str = "url", fsync: bool = False):
+        self.path = path
+        self.url_field = url_field
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.done: Dict[Tuple[str, str], Dict] = {}
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        # last line of a run that crashed mid-write
+                        continue
+                    self.done[self.key(rec["news_id"], rec.get(self.url_field))] = rec
+            self._repair_tail()
+
+        self.file = open(path, "a", encoding="utf-8")
+        if self.done:
+            print(f"journal {path}: {len(self.done)} records already done, they will be skipped")
+
+    def _repair_tail(self) -> None:
+        """
+        Make the file end with a newline before appending: a half-written last
+        line is cut off (otherwise the next record would be glued to it and
+        lost on the next load), a complete one just gets its newline.
+        """
+        with open(self.path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            data = f.read()
+            start = data.rfind(b"\n") + 1
+            try:
+                json.loads(data[start:].decode("utf-8"))
+                f.write(b"\n")
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                f.truncate(start)
+                print(f"journal {self.path}: dropped a partial last line ({size - start} bytes)")
+
+    @staticmethod
+    def key(news_id, url) -> Tuple[str, str]:
+        return str(news_id), str(url)
+
+    def is_done(self, news_id, url) -> bool:
+        return self.key(news_id, url) in self.done
+
+    def append(self, record: Dict) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=_json_default)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            self.done[self.key(record["news_id"], record.get(self.url_field))] = record
+
+    def records(self) -> List[Dict]:
+        """One record per key (latest wins), in the order they were first scraped."""
+        with self.lock:
+            return list(self.done.values())
+
+    def to_dataframe(self, source_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        All journaled records as a DataFrame. With `source_df` (columns
+        news_id / accounts) the rows follow the source url order.
+        """
+        df = pd.DataFrame(self.records())
+        if source_df is None or df.empty:
+            return df
+        order = {self.key(n, u): i for i, (n, u) in enumerate(zip(source_df["news_id"], source_df["accounts"]))}
+        pos = [order.get(self.key(n, u), len(order)) for n, u in zip(df["news_id"], df[self.url_field])]
+        return df.assign(_pos=pos).sort_values("_pos", kind="stable").drop(columns="_pos").reset_index(drop=True)
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,156 @@
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Callable, List, Dict, Optional
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from adaptive_waits import StepTimer
+from browser_profiles import make_driver
+
+# lock / singleton files of a running browser that must not be copied
+_PROFILE_IGNORE = shutil.ignore_patterns("Singleton*", "lockfile", "*.lock", "Crashpad")
+
+
+def copy_profile(user_data_dir: str, n_copies: int, dest_root: Optional[str] = None) -> List[str]:
+    """
+    Copy the logged-in browser user data dir once per worker
+    (a profile can only be opened by one browser at a time).
+    Existing copies are reused so the copy cost is paid once.
+    """
+    dest_root = dest_root or user_data_dir.rstrip("/\\") + "_workers"
+    paths = []
+    for i in range(n_copies):
+        dest = os.path.join(dest_root, f"worker_{i}")
+        if not os.path.isdir(dest):
+            shutil.copytree(user_data_dir, dest, ignore=_PROFILE_IGNORE)
+        paths.append(dest)
+    return paths
+
+
+class DriverPool:
+    """
+    N browser instances, each on its own copy of the logged-in profile,
+    launched with one of browser_profiles.LAUNCH_PROFILES ("lean" = headless, no media).
+    Use as a context manager so every browser is closed at the end.
+    """
+
+    def __init__(self, n_workers: int, user_data_dir: Optional[str] = None,
+                 driver_factory: Callable[..., object] = make_driver, profile: str = "full"):
+        load_dotenv()
+        user_data_dir = user_data_dir or os.getenv("USER_DATA_DIR")
+        self.profile_dirs = copy_profile(user_data_dir, n_workers)
+        self.driver_factory = driver_factory
+        self.profile = profile
+        self.drivers: List[object] = []
+
+    def __enter__(self):
+        self.drivers = [self.driver_factory(p, profile=self.profile) for p in self.profile_dirs]
+        return self
+
+    def __exit__(self, *exc):
+        for driver in self.drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.drivers = []
+
+    def wait_for_login(self, url: str = "https://www.facebook.com/") -> None:
+        """Open `url` in every browser and wait until the user confirms they are logged in."""
+        for driver in self.drivers:
+            driver.get(url)
+        print(
+            f"Check that all {len(self.drivers)} browser windows are logged in. "
+            "Then return here and press Enter to continue."
+        )
+        input()
+
+
+def run_sharded(df: pd.DataFrame, scrape_fn, drivers: List[object], url_field: str = "url") -> List[Dict[str, str]]:
+    """
+    Scrape `df` with several drivers at once.
+
+    Each worker thread owns one driver and one StepTimer and pulls one row at a
+    time from a shared queue, calling scrape_fn(one_row_df, driver, timer=timer)
+    (scrape_facebook_posts, scrape_facebook_vids or scrape_tweets). Results are
+    merged back in the original row order of `df`, and per-worker throughput
+    and timings are printed once at the end.
+
+    A row whose scrape raises gives an error record {news_id, <url_field>, error}
+    ("tweet_link" for scrape_tweets) in its place. It is not journaled, so the
+    next run with the same journal scrapes it again.
+    """
+    work: "queue.Queue[int]" = queue.Queue()
+    for pos in range(len(df)):
+        work.put(pos)
+
+    results: Dict[int, List[Dict[str, str]]] = {}
+    metrics: List[Dict[str, float]] = [{"worker": i, "rows": 0, "errors": 0, "seconds": 0.0} for i in range(len(drivers))]
+    lock = threading.Lock()
+
+    timers = [StepTimer(verbose=False, deferred_report=True) for _ in drivers]
+
+    def worker(i: int, driver) -> None:
+        start = time.perf_counter()
+        while True:
+            try:
+                pos = work.get_nowait()
+            except queue.Empty:
+                break
+            row = df.iloc[pos]
+            try:
+                rows = scrape_fn(df.iloc[[pos]], driver, timer=timers[i])
+            except Exception as e:
+                print(f"worker {i}: row {pos} failed: {e}")
+                rows = [{"news_id": row["news_id"], url_field: row["accounts"], "error": f"{type(e).__name__}: {e}"}]
+                metrics[i]["errors"] += 1
+            with lock:
+                results[pos] = rows
+            metrics[i]["rows"] += 1
+        metrics[i]["seconds"] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=worker, args=(i, d), daemon=True) for i, d in enumerate(drivers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print_worker_metrics(metrics)
+    for i, timer in enumerate(timers):
+        print(f"worker {i} ", end="")
+        timer.report(force=True)
+
+    out: List[Dict[str, str]] = []
+    for pos in range(len(df)):
+        out.extend(results.get(pos, []))
+    return out
+
+
+def print_worker_metrics(metrics: List[Dict[str, float]]) -> None:
+    total_rows = sum(m["rows"] for m in metrics)
+    wall = max((m["seconds"] for m in metrics), default=0.0)
+    for m in metrics:
+        per_min = 60 * m["rows"] / m["seconds"] if m["seconds"] else 0.0
+        print(f"worker {m['worker']}: {m['rows']} rows, {m['errors']} errors, {per_min:.1f} rows/min")
+    if wall:
+        print(f"all workers: {total_rows} rows in {wall:.0f} s ({60 * total_rows / wall:.1f} rows/min)")
+
+
+# #--------------This block is for starting the automation------------------------
+# import functools
+# from facebook_post_info_scraper import scrape_facebook_posts
+# from run_journal import RunJournal
+#
+# url_df = pd.read_csv("Misbar_FB_posts_urls.csv")
+#
+# with DriverPool(n_workers=4, profile="lean") as pool, RunJournal("FB_posts_info.jsonl") as journal:
+#     pool.wait_for_login()
+#     run_sharded(url_df, functools.partial(scrape_facebook_posts, journal=journal), pool.drivers)
+#     all_results_df = journal.to_dataframe(url_df)
+#
+# all_results_df.to_csv("all_FB_posts_info.csv", index=False, encoding="utf-8-sig")
+# #------------------------------------------------------
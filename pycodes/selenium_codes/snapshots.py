@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+# page scripts are dropped from snapshots: the DOM is already rendered and
+# replaying FB/X bundles offline would only try (and fail) to hit the network
+_SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+_STYLESHEET_LINK_RE = re.compile(r"<link\b[^>]*\brel=[\"']?stylesheet[^>]*>", re.IGNORECASE)
+_HEAD_END_RE = re.compile(r"</head\s*>", re.IGNORECASE)
+
+# Text of every external stylesheet the page lets us read. Sheets served
+# cross-origin without CORS throw on cssRules and are skipped, so a replayed
+# page can still lay out differently from the live one (see replay).
+_PAGE_CSS_JS = """
+const out = [];
+for (const sheet of document.styleSheets) {
+  if (!sheet.href) continue;
+  try { out.push(Array.from(sheet.cssRules, r => r.cssText).join("\\n")); }
+  catch (e) { out.push(null); }
+}
+return out;
+"""
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha1(str(url).encode("utf-8")).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Content-addressed store of rendered pages:
+        <root>/<kk>/<sha1(url)>.html.gz   gzip'd DOM (scripts stripped)
+        <root>/index.jsonl                one line per capture (url, news_id, kind, path, time)
+    Re-capturing a url overwrites its snapshot; the newest index line wins.
+    """
+
+    def __init__(self, root: str = "snapshots"):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, url: str) -> str:
+        k = url_key(url)
+        return os.path.join(self.root, k[:2], k + ".html.gz")
+
+    def save(self, url: str, html: str, news_id=None, kind: str = "", css: Optional[str] = None) -> str:
+        """
+        Store `html` (scripts stripped). With `css`, the page's <link>
+        stylesheets are replaced by it as one inline <style>, so the
+        snapshot does not depend on the CDN when replayed.
+        """
+        path = self.path_for(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        html = _SCRIPT_RE.sub("", html)
+        if css is not None:
+            html = _STYLESHEET_LINK_RE.sub("", html)
+            style = f"<style data-snapshot-css>{css}</style>"
+            html, n = _HEAD_END_RE.subn(lambda m: style + m.group(0), html, count=1)
+            if not n:
+                html = style + html
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(html)
+
+        entry = {
+            "url": url,
+            "news_id": news_id.item() if hasattr(news_id, "item") else news_id,
+            "kind": kind,
+            "path": os.path.relpath(path, self.root),
+            "captured_at": time.time(),
+        }
+        with self.lock, open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return path
+
+    def capture(self, driver, url: str, news_id=None, kind: str = "") -> str:
+        """save() of the page open in `driver`, with the external stylesheets it could read inlined."""
+        sheets = driver.execute_script(_PAGE_CSS_JS) or []
+        missing = sum(1 for css in sheets if css is None)
+        if missing:
+            print(f"[SNAPSHOT] {missing}/{len(sheets)} stylesheets not readable (cross-origin): {url}")
+        return self.save(url, driver.page_source, news_id=news_id, kind=kind,
+                         css="\n".join(css for css in sheets if css))
+
+    def load(self, url: str) -> Optional[str]:
+        path = self.path_for(url)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def entries(self, kind: Optional[str] = None) -> List[Dict]:
+        """Latest index entry per url, optionally only one kind ('fb_post', 'fb_vid', 'tweet')."""
+        latest: Dict[str, Dict] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        e = json.loads(line)
+                        latest[e["url"]] = e
+        return [e for e in latest.values() if kind is None or e["kind"] == kind]
+
+
+# --------------Replay---------------
+
+_driver = None
+_tmp_dir = None
+
+
+def _init_replay_worker(tmp_dir: str) -> None:
+    """One headless browser per worker process, with no network access needed."""
+    global _driver, _tmp_dir
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1280,2000")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    _driver = webdriver.Chrome(options=options)
+    # pool workers leave through os._exit, so atexit would not close the browser
+    Finalize(None, _driver.quit, exitpriority=10)
+    _tmp_dir = tmp_dir
+    os.makedirs(tmp_dir, exist_ok=True)
+
+
+def _url_field(kind: str) -> str:
+    return "tweet_link" if kind == "tweet" else "url"
+
+
+def _parse_snapshot(root: str, entry: Dict) -> Dict:
+    html_path = os.path.join(_tmp_dir, f"{os.getpid()}.html")
+    with gzip.open(os.path.join(root, entry["path"]), "rt", encoding="utf-8") as src, \
+            open(html_path, "w", encoding="utf-8") as dst:
+        dst.write(src.read())
+    _driver.get(Path(html_path).resolve().as_uri())
+
+    kind = entry["kind"]
+    if kind == "fb_post":
+        from facebook_post_info_scraper import parse_post_page
+        fields = parse_post_page(_driver)
+    elif kind == "fb_vid":
+        from facebook_vid_info_scraper import parse_reel_page
+        fields = parse_reel_page(_driver, wait_seconds=2)
+    elif kind == "tweet":
+        from twitter_info_scraper import parse_tweet_page
+        fields = parse_tweet_page(_driver)
+    else:
+        raise ValueError(f"unknown snapshot kind: {kind}")
+
+    return {"news_id": entry["news_id"], _url_field(kind): entry["url"], **fields}
+
+
+def replay(store: SnapshotStore, kind: Optional[str] = None, workers: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Re-run the page parsing functions (parse_post_page, parse_reel_page,
+    parse_tweet_page) over every stored snapshot, fully offline, with one
+    headless browser per core. Yields records in index order; a snapshot
+    that fails to load or parse yields {news_id, url, error} instead of
+    ending the run.
+
+    Replay is only as faithful as the stored page: scripts are gone, and
+    stylesheets are there only if the snapshot was taken with capture()
+    and the browser let it read them. Without the page CSS every element
+    is laid out unstyled, so is_displayed() and .rect (used to pick the
+    comment / share numbers) can differ from the live page.
+    """
+    entries = store.entries(kind)
+    workers = workers or os.cpu_count() or 1
+    tmp_dir = os.path.join(store.root, "_replay_tmp")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_replay_worker, initargs=(tmp_dir,)) as pool:
+        futures = [pool.submit(_parse_snapshot, store.root, e) for e in entries]
+        for e, fut in zip(entries, futures):
+            try:
+                yield fut.result()
+            except Exception as err:
+                print(f"[REPLAY_ERROR] {e['path']}: {type(err).__name__}: {err}")
+                yield {"news_id": e["news_id"], _url_field(e["kind"]): e["url"], "error": f"{type(err).__name__}: {err}"}
+    elapsed = time.perf_counter() - start
+    print(f"replayed {len(entries)} snapshots in {elapsed:.0f} s with {workers} workers")
+
+
+# store = SnapshotStore("snapshots")
+# # capture while scraping
+# scrape_facebook_posts(url_df, driver, snapshots=store)   # the scrapers call store.capture(driver, ...)
+# # later, after changing a selector
+# records = list(replay(store, kind="fb_post"))
+# pd.DataFrame(records).to_csv("FB_posts_info_replayed.csv", index=False, encoding="utf-8-sig")
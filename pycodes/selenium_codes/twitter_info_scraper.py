@@ -17,21 +17,13 @@ from selenium.common.exceptions import (
     WebDriverException,
 )
 
-# ----------------------- Browser setup -----------------------
-# chrome_driver_path = os.getenv("chrome_driver_path")
-# path_to_brave = os.getenv("path_to_brave")
-# USER_DATA_DIR = os.getenv("USER_DATA_DIR")
-# PROFILE_NAME = "Profile 1"
-
-# options = Options()
-# options.binary_location = path_to_brave
-# options.add_argument(f"--user-data-dir={USER_DATA_DIR}")
-# options.add_argument(f"--profile-directory={PROFILE_NAME}")
-# # options.add_argument("--headless=new")  # uncomment if you want headless
-# # options.add_argument("--window-size=1280,1000")
+from run_journal import RunJournal
+from adaptive_waits import StepTimer, politeness_delay
 
-# service = Service(executable_path=chrome_driver_path)
-# driver = webdriver.Chrome(service=service, options=options)
+# ----------------------- Browser setup -----------------------
+# from browser_profiles import make_driver
+# # profile="lean": headless, images/video/fonts blocked, same logged-in user data dir
+# driver = make_driver(os.getenv("USER_DATA_DIR"), profile="full")
 
 ##----------------------------------------
 
@@ -54,15 +46,111 @@ def get_first_article(driver) -> object | None:
     except TimeoutException:
         return None
 
-def scrape_tweets(df: pd.DataFrame, driver) -> List[Dict[str, str]]:
+def parse_tweet_article(tweet_article) -> Dict[str, str]:
+    """
+    Username, text, engagement label and image of one tweet <article>.
+    Missing parts are None.
+    """
+    # -------- Username / link --------
+    username_link = None
+    username = None
+    try:
+        user_anchor = WebDriverWait(tweet_article, WAIT_SHORT).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-testid="User-Name"] a'))
+        )
+        username_link = user_anchor.get_attribute("href")
+        username = safe_text(user_anchor)
+    except (TimeoutException, NoSuchElementException, StaleElementReferenceException):
+        pass
+
+    # -------- Tweet text (Arabic-first, then fallback any language) --------
+    text = None
+    try:
+        # Arabic-specific
+        text_div = tweet_article.find_element(By.CSS_SELECTOR, 'div[dir="auto"][data-testid="tweetText"][lang="ar"]')
+        text = safe_text(text_div)
+    except NoSuchElementException:
+        # Fallback without lang filter (any language)
+        try:
+            text_div = tweet_article.find_element(By.CSS_SELECTOR, 'div[dir="auto"][data-testid="tweetText"]')
+            text = safe_text(text_div)
+        except NoSuchElementException:
+            text_div = None
+
+    # -------- Engagement (retweet button -> nearest ancestor with aria-label) --------
+    engagement_text = None
+    try:
+        retweet_btn = tweet_article.find_element(By.CSS_SELECTOR, 'button[data-testid="retweet"]')
+        # Try nearest ancestor with aria-label (up to a few levels)
+        ancestor_xpath_candidates = [
+            "./ancestor::*[@aria-label][1]",
+            "./ancestor::div[@aria-label][1]",
+            "./ancestor::*[@role='group'][@aria-label][1]",
+        ]
+        parent_with_aria = None
+        for xp in ancestor_xpath_candidates:
+            try:
+                parent_with_aria = retweet_btn.find_element(By.XPATH, xp)
+                if parent_with_aria:
+                    break
+            except NoSuchElementException:
+                continue
+
+        if parent_with_aria:
+            engagement_text = parent_with_aria.get_attribute("aria-label")
+    except NoSuchElementException:
+        pass
+
+    # -------- Image link --------
+    image_link = None
+    try:
+        img = tweet_article.find_element(By.CSS_SELECTOR, 'div[data-testid="tweetPhoto"] img')
+        image_link = img.get_attribute("src")
+    except:
+        pass
+
+    return {
+        "username_link": username_link,
+        "username": username,
+        "text": text,
+        "engagement_text": engagement_text,
+        "image_link": image_link
+    }
+
+def parse_tweet_page(driver) -> Dict[str, str]:
+    """parse_tweet_article on the first tweet of the open page (all None if there is none)."""
+    tweet_article = get_first_article(driver)
+    if not tweet_article:
+        return dict.fromkeys(["username_link", "username", "text", "engagement_text", "image_link"])
+    return parse_tweet_article(tweet_article)
+
+def scrape_tweets(df: pd.DataFrame, driver, journal=None, timer=None, snapshots=None, events=None) -> List[Dict[str, str]]:
+    """
+    Scrape the first tweet of every url in df['accounts'].
+    journal / timer / snapshots as in scrape_facebook_posts; with an EventStore
+    (fact_check_scraping/event_store.py), each url's outcome is recorded.
+    """
     out: List[Dict[str, str]] = []
+    timer = timer or StepTimer()
+
+    def emit(result, error_type="ok", stage="parse"):
+        out.append(result)
+        if journal is not None:
+            journal.append(result)
+        if events is not None:
+            events.log("tweet", result["news_id"], result["tweet_link"], error_type, stage,
+                       started_at=started_at, duration=time.time() - started_at)
 
     for index, row in df.iterrows():
         url = row.get("accounts")
         news_id = row.get("news_id")
 
+        if journal is not None and journal.is_done(news_id, url):
+            continue
+        started_at = time.time()
+
         if not isinstance(url, str) or not url.strip():
-            out.append({
+            emit({
                 "news_id": news_id,
                 "tweet_link": url,
                 "username_link": None,
@@ -70,17 +158,15 @@ def scrape_tweets(df: pd.DataFrame, driver) -> List[Dict[str, str]]:
                 "text": None,
                 "engagement_text": None,
                 "image_link": None
-            })
+            }, "EMPTY_URL", "input")
             continue
 
-        driver.get(url)
-
-        # Wait for page JS to settle a bit
-        time.sleep(1.0)
-
-        tweet_article = get_first_article(driver)
+        # get_first_article waits for the tweet node itself, no fixed settle time needed
+        with timer.step("load"):
+            driver.get(url)
+            tweet_article = get_first_article(driver)
         if not tweet_article:
-            out.append({
+            emit({
                 "news_id": news_id,
                 "tweet_link": url,
                 "username_link": None,
@@ -88,88 +174,24 @@ def scrape_tweets(df: pd.DataFrame, driver) -> List[Dict[str, str]]:
                 "text": None,
                 "engagement_text": None,
                 "image_link": None
-            })
+            }, "NO_TWEET", "load")
+            timer.end_page()
             continue
 
-        # -------- Username / link --------
-        username_link = None
-        username = None
-        try:
-            user_anchor = WebDriverWait(tweet_article, WAIT_SHORT).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-testid="User-Name"] a'))
-            )
-            username_link = user_anchor.get_attribute("href")
-            username = safe_text(user_anchor)
-        except (TimeoutException, NoSuchElementException, StaleElementReferenceException):
-            pass
-
-        # -------- Tweet text (Arabic-first, then fallback any language) --------
-        text = None
-        try:
-            # Arabic-specific
-            text_div = tweet_article.find_element(By.CSS_SELECTOR, 'div[dir="auto"][data-testid="tweetText"][lang="ar"]')
-            text = safe_text(text_div)
-        except NoSuchElementException:
-            # Fallback without lang filter (any language)
-            try:
-                text_div = tweet_article.find_element(By.CSS_SELECTOR, 'div[dir="auto"][data-testid="tweetText"]')
-                text = safe_text(text_div)
-            except NoSuchElementException:
-                text_div = None
+        with timer.step("extract"):
+            fields = parse_tweet_article(tweet_article)
 
-        # -------- Engagement (retweet button -> nearest ancestor with aria-label) --------
-        engagement_text = None
-        try:
-            retweet_btn = tweet_article.find_element(By.CSS_SELECTOR, 'button[data-testid="retweet"]')
-            # Try nearest ancestor with aria-label (up to a few levels)
-            ancestor_xpath_candidates = [
-                "./ancestor::*[@aria-label][1]",
-                "./ancestor::div[@aria-label][1]",
-                "./ancestor::*[@role='group'][@aria-label][1]",
-            ]
-            parent_with_aria = None
-            for xp in ancestor_xpath_candidates:
-                try:
-                    parent_with_aria = retweet_btn.find_element(By.XPATH, xp)
-                    if parent_with_aria:
-                        break
-                except NoSuchElementException:
-                    continue
-
-            if parent_with_aria:
-                engagement_text = parent_with_aria.get_attribute("aria-label")
-        except NoSuchElementException:
-            pass
+        result = {"news_id": news_id, "tweet_link": url, **fields}
+        emit(result)
+        print(result)
+        if snapshots is not None:
+            snapshots.capture(driver, url, news_id=news_id, kind="tweet")
 
-        # -------- Image link --------
-        image_link = None
-        try:
-            img = tweet_article.find_element(By.CSS_SELECTOR, 'div[data-testid="tweetPhoto"] img')
-            image_link = img.get_attribute("src")
-        except:
-            pass
-
-        out.append({
-            "news_id": news_id,
-            "tweet_link": url,
-            "username_link": username_link,
-            "username": username,
-            "text": text,
-            "engagement_text": engagement_text,
-            "image_link": image_link
-        })
-        print({
-            "news_id": news_id,
-            "tweet_link": url,
-            "username_link": username_link,
-            "username": username,
-            "text": text,
-            "engagement_text": engagement_text,
-            "image_link": image_link
-        })
-
-        time.sleep(5)
+        with timer.step("politeness"):
+            politeness_delay()
+        timer.end_page()
 
+    timer.report()
     return out
 
 def split_dataframe(df, chunk_size=50):
@@ -181,18 +203,14 @@ def split_dataframe(df, chunk_size=50):
 
 # -----------------------
 
+# # http_fetch_tier.tiered_scrape(url_df, driver, scrape_tweets, kind="tweet", journal=journal) reads public
+# # tweets from the embed JSON endpoint and opens only the rest in the browser
 # url_df = pd.read_csv("beam_twitter_accounts_info.csv")
-# url_dfs = split_dataframe(url_df, chunk_size=20)
-# sub_url_dfs = url_dfs[3:]
-# all_results = []
-
-# for i, subdf in enumerate(sub_url_dfs, 4):
-#     results = scrape_tweets(subdf, driver)
-#     result_df = pd.DataFrame(results)
-#     all_results.append(result_df)
-#     result_df.to_csv(f"Twitter_info_{i}.csv", index=False, encoding="utf-8-sig")
+# # no more hand-picked url_dfs[3:] after a crash: the journal skips what is done
+# with RunJournal("Twitter_info.jsonl", url_field="tweet_link") as journal:
+#     scrape_tweets(url_df, driver, journal=journal)
+#     all_results_df = journal.to_dataframe(url_df)
 
-# all_results_df = pd.concat(all_results, ignore_index=True)
 # all_results_df.to_csv("all_Twitter_info.csv", index=False, encoding="utf-8-sig")
 
 # driver.quit()
@@ -0,0 +1,183 @@
+import os
+import re
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import emoji
+import pandas as pd
+from pyarabic import normalize
+
+from arabic_stopwords import build_stopwords, count_and_remove
+
+
+# Define Arabic and English punctuation
+ARABIC_PUNCT = "،؛؟«»…“”‘’٭–—"
+ENGLISH_PUNCT = string.punctuation
+ALL_PUNCT = ARABIC_PUNCT + ENGLISH_PUNCT
+
+
+#----------------- the notebook's cleaning functions, unchanged ----------------------
+# (the reference the fused version is checked against)
+
+def remove_non_arabic_letters(text):
+    text = re.sub(r'[^\u0600-\u06FF\s]', '', text)    # Unicode range for Arabic letters and characters
+    text = re.sub(f"[{re.escape(ALL_PUNCT)}]", "", text)    # remove punctuation marks
+    return text
+
+def remove_emojis(text):
+    text = emoji.replace_emoji(text, replace=' ')
+    return text
+
+def remove_stopwords(text, stopwords):
+    text_words = text.split()
+    text_list = [word for word in text_words if word not in stopwords]
+    return ' '.join(text_list)
+
+def normalize_text(text):
+
+    # First use pyarabic normalization
+    text = normalize.normalize_searchtext(text)
+    # Additional custom normalization
+    text = re.sub(r'[ٰ]', '', text)  # Remove small alef
+    text = re.sub(r'[ك]', 'ك', text)  # Normalize kaf
+    text = re.sub(r'[ى]', 'ي', text)  # Normalize alef maqsura to ya
+    text = re.sub(r'[ة]', 'ه', text)  # Normalize ta marbuta to ha
+    
+    # Remove \r, \n, \t, and other whitespace characters
+    re.sub(r'\s', ' ', text)
+    # Replace any character repeated 3 or more times with a single occurrence
+    text = re.sub(r'(.)\1{2,}', r'\1', text)
+    return text
+
+def count_arabic_stopwords(text, stopwords):
+    words = text.split()
+    count = sum(1 for w in words if w in stopwords)
+    return count
+
+def reference_clean(text: str, stopwords) -> Tuple[str, int]:
+    """The notebook's cleaning cell for one text: (cleaned text, stopwords_count)."""
+    text = remove_non_arabic_letters(text)
+    text = remove_emojis(text)
+    text = normalize_text(text)
+    count = count_arabic_stopwords(text, stopwords)
+    return remove_stopwords(text, stopwords), count
+
+
+#----------------- fused cleaning ----------------------
+
+_URLS = re.compile(r"http\S+|www\S+|https\S+")
+_LATIN = re.compile(r"[A-Za-z]+")
+# removing the non-Arabic characters and then the punctuation is the same as removing either in one pass
+_NON_ARABIC_OR_PUNCT = re.compile(rf"[^\u0600-\u06FF\s]|[{re.escape(ALL_PUNCT)}]")
+# small alef removed, alef maqsura -> ya, ta marbuta -> ha (the kaf substitution maps kaf to itself)
+_LETTERS = str.maketrans({"\u0670": None, "\u0649": "\u064a", "\u0629": "\u0647"})
+_REPEATS = re.compile(r"(.)\1{2,}")
+
+
+def strip_urls_and_latin(text: str) -> str:
+    """Urls and English words removed (first step of the notebook, before the count features)."""
+    return _LATIN.sub("", _URLS.sub("", text))
+
+
+def clean_document(text: str, stopwords: FrozenSet[str]) -> Tuple[str, int]:
+    """
+    Same output as reference_clean in one pass over the text:
+    (cleaned text, number of stopwords removed).
+    """
+    text = _NON_ARABIC_OR_PUNCT.sub("", text)
+    # remove_emojis is not needed here: no emoji character is left after the line above
+    # (the notebook's whitespace re.sub is not applied either, its result was discarded)
+    text = normalize.normalize_searchtext(text).translate(_LETTERS)
+    return count_and_remove(_REPEATS.sub(r"\1", text), stopwords)
+
+
+_worker_stopwords: FrozenSet[str] = frozenset()
+
+
+def _init_worker(stopwords: FrozenSet[str]) -> None:
+    global _worker_stopwords
+    _worker_stopwords = stopwords
+
+
+def _clean_chunk(texts: List[str]) -> List[Tuple[str, int]]:
+    return [clean_document(t, _worker_stopwords) for t in texts]
+
+
+def clean_series(texts: pd.Series, stopwords: Optional[Iterable[str]] = None,
+                 workers: Optional[int] = None, chunksize: int = 2_000) -> pd.DataFrame:
+    """
+    Clean a text column. Returns a DataFrame with the same index and the
+    columns text and stopwords_count, i.e.
+        df[["text", "stopwords_count"]] = clean_series(df["text"])
+    Inputs larger than one chunk are spread over `workers` processes
+    (default: all cores); workers=1 runs in this process.
+    """
+    stopwords = frozenset(stopwords) if stopwords is not None else build_stopwords(normalize_text)
+    values = texts.tolist()
+    chunks = [values[i:i + chunksize] for i in range(0, len(values), chunksize)]
+    if workers == 1 or len(chunks) <= 1:
+        results = [clean_document(t, stopwords) for t in values]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(stopwords,)) as pool:
+            results = [r for chunk in pool.map(_clean_chunk, chunks) for r in chunk]
+    return pd.DataFrame(
+        {"text": [r[0] for r in results], "stopwords_count": [r[1] for r in results]},
+        index=texts.index,
+    )
+
+
+def check_identical(texts: Sequence[str], stopwords: Optional[Iterable[str]] = None, show: int = 5) -> List[int]:
+    """Positions where clean_document differs from the notebook functions (prints the first `show`)."""
+    stopwords = frozenset(stopwords) if stopwords is not None else build_stopwords(normalize_text)
+    stopwords_list = list(stopwords)
+    mismatches = []
+    for i, text in enumerate(texts):
+        expected = reference_clean(text, stopwords_list)
+        got = clean_document(text, stopwords)
+        if expected != got:
+            if len(mismatches) < show:
+                print(f"  {i}\n    notebook: {expected!r}\n    fused:    {got!r}")
+            mismatches.append(i)
+    print(f"{len(texts)} texts, {len(mismatches)} mismatches")
+    return mismatches
+
+
+def benchmark_cleaning(texts: pd.Series, workers: Optional[int] = None) -> Dict[str, float]:
+    """docs/sec of the notebook's .apply chain, clean_series in one process and clean_series over the pool."""
+    stopwords = build_stopwords(normalize_text)
+    stopwords_list = list(stopwords)
+    timings = {}
+
+    start = time.perf_counter()
+    s = texts.apply(remove_non_arabic_letters)
+    s = s.apply(remove_emojis)
+    s = s.apply(normalize_text)
+    s.apply(lambda text: count_arabic_stopwords(text, stopwords_list))
+    s.apply(lambda text: remove_stopwords(text, stopwords_list))
+    timings["notebook apply chain"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clean_series(texts, stopwords, workers=1)
+    timings["fused, 1 process"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clean_series(texts, stopwords, workers=workers)
+    timings[f"fused, {workers or os.cpu_count()} processes"] = time.perf_counter() - start
+
+    rates = {name: len(texts) / seconds for name, seconds in timings.items()}
+    for name, rate in rates.items():
+        print(f"{name:<24} {rate:10.0f} docs/sec")
+    return rates
+
+
+# #--------------This block is for starting the automation------------------------
+# if __name__ == "__main__":
+#     df = pd.read_csv("dateset_(with_second_round_real_fake).csv")
+#     df["text"] = df["text"].map(strip_urls_and_latin)
+#     ...  # count features and empty-text rows as in the notebook
+#     check_identical(df["text"].tolist())
+#     benchmark_cleaning(df["text"])
+#     df[["text", "stopwords_count"]] = clean_series(df["text"])
+# #------------------------------------------------------
@@ -0,0 +1,163 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from tashaphyne.stemming import ArabicLightStemmer
+
+
+# the notebook's stemming function, kept as the reference
+def Arabic_Light_Stemmer(text):
+    Arabic_Stemmer = ArabicLightStemmer()
+    # Handle NaN or non-string
+    if not isinstance(text, str):
+        return ""
+    # Tokenize properly
+    tokens = text.split()
+    stems = []
+    for token in tokens:
+        Arabic_Stemmer.light_stem(token)
+        stems.append(Arabic_Stemmer.get_stem())
+    return stems
+
+
+class CachedStemmer:
+    """
+    One ArabicLightStemmer with a bounded token -> stem LRU cache.
+    The stem of a token does not depend on its context, so a cached stem is
+    the same as stemming the token again.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.stemmer = ArabicLightStemmer()
+        self.stem = lru_cache(maxsize=maxsize)(self._stem)
+
+    def _stem(self, token: str) -> str:
+        self.stemmer.light_stem(token)
+        return self.stemmer.get_stem()
+
+    def stem_text(self, text) -> str:
+        """Same as " ".join(Arabic_Light_Stemmer(text)); for a few new posts at a time."""
+        if not isinstance(text, str):
+            return ""
+        return " ".join(self.stem(token) for token in text.split())
+
+    def stats(self) -> Dict[str, float]:
+        info = self.stem.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
+
+
+_worker_stemmer: Optional[CachedStemmer] = None
+
+
+def _init_worker() -> None:
+    global _worker_stemmer
+    _worker_stemmer = CachedStemmer()
+
+
+def _stem_chunk(tokens: List[str]) -> List[str]:
+    return [_worker_stemmer.stem(t) for t in tokens]
+
+
+def vocabulary(texts: pd.Series) -> List[str]:
+    """Distinct whitespace tokens of a text column (the notebook's vocab_before), in first-seen order."""
+    seen = {}
+    for text in texts.dropna():
+        for token in text.split():
+            seen[token] = None
+    return list(seen)
+
+
+def stem_vocabulary(tokens: Iterable[str], workers: Optional[int] = None, chunksize: int = 5_000,
+                    stemmer: Optional[CachedStemmer] = None) -> Dict[str, str]:
+    """
+    {token: stem} for every distinct token, each stemmed once. More tokens
+    than one chunk are split over `workers` processes with one stemmer
+    each; otherwise `stemmer` (or a new one) is used in this process.
+    """
+    tokens = list(dict.fromkeys(tokens))
+    chunks = [tokens[i:i + chunksize] for i in range(0, len(tokens), chunksize)]
+    if workers == 1 or len(chunks) <= 1:
+        stemmer = stemmer or CachedStemmer()
+        stems = [stemmer.stem(t) for t in tokens]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            stems = [s for chunk in pool.map(_stem_chunk, chunks) for s in chunk]
+    return dict(zip(tokens, stems))
+
+
+def stem_series(texts: pd.Series, mapping: Optional[Dict[str, str]] = None,
+                workers: Optional[int] = None) -> pd.Series:
+    """
+    The notebook's text_stem column: every document's tokens replaced by
+    their stem, non-text values become "". The distinct tokens are stemmed
+    once (or taken from `mapping`, e.g. the one used for the vocabulary
+    report) and mapped back to the documents through an index lookup.
+    """
+    token_lists = [text.split() if isinstance(text, str) else [] for text in texts]
+    flat = [token for tokens in token_lists for token in tokens]
+    codes, uniques = pd.factorize(pd.Series(flat, dtype=object))
+    if mapping is None or any(token not in mapping for token in uniques):
+        mapping = {**(mapping or {}), **stem_vocabulary(uniques, workers)}
+    stems = np.array([mapping[token] for token in uniques], dtype=object)[codes]
+
+    ends = np.cumsum([len(tokens) for tokens in token_lists])
+    starts = ends - [len(tokens) for tokens in token_lists]
+    return pd.Series([" ".join(stems[s:e]) for s, e in zip(starts, ends)], index=texts.index, dtype=object)
+
+
+def vocabulary_reduction(mapping: Dict[str, str]) -> Dict[str, float]:
+    """Vocabulary size before / after stemming, from a stem_vocabulary mapping of the whole column."""
+    before, after = len(mapping), len(set(mapping.values()))
+    reduction = 1 - after / before if before else 0.0
+    print("Vocabulary size before stemming:", before)
+    print("Vocabulary size after stemming:", after)
+    print(f"Vocabulary reduction: {reduction:.2%}")
+    return {"before": before, "after": after, "reduction": reduction}
+
+
+def benchmark_stemming(texts: pd.Series, workers: Optional[int] = None) -> Dict[str, float]:
+    """Wall time of the notebook's two stemming passes against one vocabulary pass + stem_series; checks they agree."""
+    timings = {}
+
+    start = time.perf_counter()
+    vocab_after = set()
+    for text in texts.dropna():
+        vocab_after.update(Arabic_Light_Stemmer(text))
+    expected = texts.apply(lambda x: " ".join(Arabic_Light_Stemmer(x)))
+    timings["notebook"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mapping = stem_vocabulary(vocabulary(texts), workers)
+    got = stem_series(texts, mapping)
+    timings["vocabulary + lookup"] = time.perf_counter() - start
+
+    mismatches = int((expected != got).sum())
+    if set(mapping.values()) != vocab_after:
+        print("vocabulary after stemming differs from the notebook")
+    for name, seconds in timings.items():
+        print(f"{name:<20} {seconds:8.2f} s")
+    print(f"speedup: {timings['notebook'] / timings['vocabulary + lookup']:.0f}x, {mismatches} mismatching rows")
+    return timings
+
+
+# #--------------This block is for starting the automation------------------------
+# if __name__ == "__main__":
+#     mapping = stem_vocabulary(vocabulary(df["text"]))
+#     vocabulary_reduction(mapping)
+#     df["text_stem"] = stem_series(df["text"], mapping)
+#
+#     # new posts at inference time
+#     stemmer = CachedStemmer()
+#     new_posts["text_stem"] = new_posts["text"].map(stemmer.stem_text)
+#     print(stemmer.stats())
+# #------------------------------------------------------
@@ -0,0 +1,84 @@
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import pandas as pd
+from nltk.corpus import stopwords as nltk_stopwords
+
+
+# The notebook checked every token with `in` on the stopword list, which
+# compares it with each stopword, and split every text twice (count, then
+# removal). count_and_remove does both in one split with a frozenset;
+# benchmark_stopwords times the two on the dataset and checks they agree.
+
+
+def build_stopwords(normalizer: Optional[Callable[[str], str]] = None) -> FrozenSet[str]:
+    """nltk's Arabic stopwords, passed through `normalizer` (arabic_cleaning.normalize_text in the notebook)."""
+    words = nltk_stopwords.words("arabic")
+    return frozenset(map(normalizer, words) if normalizer is not None else words)
+
+
+def save_stopwords(stopwords: Iterable[str], path: str) -> None:
+    """One stopword per line (sorted, utf-8); saved next to the model so inference uses the same set."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(sorted(set(stopwords))) + "\n")
+
+
+def load_stopwords(path: str) -> FrozenSet[str]:
+    with open(path, encoding="utf-8") as f:
+        return frozenset(line.rstrip("\n") for line in f if line.rstrip("\n"))
+
+
+def count_and_remove(text: str, stopwords: FrozenSet[str]) -> Tuple[str, int]:
+    """(text without stopwords, number of stopwords) from one split of the text."""
+    words = text.split()
+    kept = [w for w in words if w not in stopwords]
+    return " ".join(kept), len(words) - len(kept)
+
+
+def count_and_remove_series(texts: pd.Series, stopwords: Iterable[str]) -> pd.DataFrame:
+    """
+    count_and_remove over a text column; a DataFrame with the same index and
+    the columns text and stopwords_count:
+        df[["text", "stopwords_count"]] = count_and_remove_series(df["text"], stopwords)
+    """
+    stopwords = stopwords if isinstance(stopwords, frozenset) else frozenset(stopwords)
+    results = [count_and_remove(text, stopwords) for text in texts]
+    return pd.DataFrame(
+        {"text": [r[0] for r in results], "stopwords_count": [r[1] for r in results]},
+        index=texts.index,
+    )
+
+
+def benchmark_stopwords(texts: pd.Series, stopwords: Iterable[str]) -> Dict[str, float]:
+    """Notebook (list, count pass + removal pass) against count_and_remove_series; checks both give the same columns."""
+    stopwords_list = list(stopwords)
+    timings = {}
+
+    start = time.perf_counter()
+    counts = texts.apply(lambda text: sum(1 for w in text.split() if w in stopwords_list))
+    removed = texts.apply(lambda text: " ".join(w for w in text.split() if w not in stopwords_list))
+    timings["list, two passes"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fused = count_and_remove_series(texts, frozenset(stopwords_list))
+    timings["frozenset, one pass"] = time.perf_counter() - start
+
+    same = counts.equals(fused["stopwords_count"]) and removed.equals(fused["text"])
+    for name, seconds in timings.items():
+        print(f"{name:<20} {seconds:8.2f} s")
+    print(f"speedup: {timings['list, two passes'] / timings['frozenset, one pass']:.0f}x, identical: {same}")
+    return timings
+
+
+# #--------------This block is for starting the automation------------------------
+# if __name__ == "__main__":
+#     from arabic_cleaning import normalize_text
+#
+#     stopwords = build_stopwords(normalize_text)
+#     save_stopwords(stopwords, "models/arabic_stopwords.txt")
+#     benchmark_stopwords(df["text"], stopwords)
+#
+#     # inference, with the set saved next to the model
+#     stopwords = load_stopwords("models/arabic_stopwords.txt")
+#     new_posts[["text", "stopwords_count"]] = count_and_remove_series(new_posts["text"], stopwords)
+# #------------------------------------------------------
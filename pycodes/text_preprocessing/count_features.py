@@ -0,0 +1,150 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Sequence
+
+import emoji
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from arabic_cleaning import ALL_PUNCT, clean_document, normalize_text, reference_clean, strip_urls_and_latin
+from arabic_stemming import Arabic_Light_Stemmer, CachedStemmer
+from arabic_stopwords import build_stopwords
+
+
+# same order as quantity_features in the training notebook
+COUNT_FEATURES = ["hashtag_count", "emoji_count", "punct_count", "numeric_count", "stopwords_count", "word_count"]
+
+_NUMBERS = re.compile(r"\d+")
+_DROP_PUNCT = str.maketrans("", "", ALL_PUNCT)
+
+
+def document_counts(text, stopwords: frozenset, stemmer: CachedStemmer) -> List[int]:
+    """
+    The six count features of one raw (scraped) text:
+      hashtag / emoji / punct / numeric counts after urls and English words are removed,
+      stopwords_count of the cleaned text, word_count of its stemmed form.
+    """
+    text = strip_urls_and_latin(text if isinstance(text, str) else "")
+    cleaned, stopwords_count = clean_document(text, stopwords)
+    return [
+        text.count("#"),
+        emoji.emoji_count(text),
+        len(text) - len(text.translate(_DROP_PUNCT)),
+        sum(1 for _ in _NUMBERS.finditer(text)),
+        stopwords_count,
+        sum(1 for token in cleaned.split() if stemmer.stem(token)),
+    ]
+
+
+_worker_stopwords: frozenset = frozenset()
+_worker_stemmer: Optional[CachedStemmer] = None
+
+
+def _init_worker(stopwords: frozenset) -> None:
+    global _worker_stopwords, _worker_stemmer
+    _worker_stopwords = stopwords
+    _worker_stemmer = CachedStemmer()
+
+
+def _count_chunk(texts: List) -> List[List[int]]:
+    return [document_counts(t, _worker_stopwords, _worker_stemmer) for t in texts]
+
+
+def extract_counts(texts: Iterable, stopwords: Optional[Iterable[str]] = None, workers: Optional[int] = 1,
+                   chunksize: int = 2_000, stemmer: Optional[CachedStemmer] = None) -> np.ndarray:
+    """
+    (n_texts, 6) int32 array of COUNT_FEATURES. With workers != 1 and more
+    texts than one chunk, chunks are counted in a process pool (workers=None:
+    all cores), each worker with its own stemmer.
+    """
+    stopwords = frozenset(stopwords) if stopwords is not None else build_stopwords(normalize_text)
+    values = list(texts)
+    chunks = [values[i:i + chunksize] for i in range(0, len(values), chunksize)]
+    if workers == 1 or len(chunks) <= 1:
+        stemmer = stemmer or CachedStemmer()
+        rows = [document_counts(t, stopwords, stemmer) for t in values]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(stopwords,)) as pool:
+            rows = [r for chunk in pool.map(_count_chunk, chunks) for r in chunk]
+    return np.array(rows, dtype=np.int32).reshape(len(rows), len(COUNT_FEATURES))
+
+
+class CountFeatures(BaseEstimator, TransformerMixin):
+    """
+    The quantity features as a scikit-learn transformer on the raw text
+    column, so the model pipeline computes them the same way for newly
+    scraped posts:
+        ColumnTransformer([("quantity", Pipeline([("counts", CountFeatures()), ...]), "text"), ...])
+    `stopwords` defaults to the normalized nltk list; pass the set saved with
+    the model (arabic_stopwords.load_stopwords) at inference.
+    """
+
+    def __init__(self, stopwords: Optional[Iterable[str]] = None, n_jobs: Optional[int] = 1, chunksize: int = 2_000):
+        self.stopwords = stopwords
+        self.n_jobs = n_jobs
+        self.chunksize = chunksize
+
+    def fit(self, X, y=None):
+        self.stopwords_ = frozenset(self.stopwords) if self.stopwords is not None else build_stopwords(normalize_text)
+        self.stemmer_ = CachedStemmer()
+        self.n_features_out_ = len(COUNT_FEATURES)
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X.iloc[:, 0]
+        elif isinstance(X, np.ndarray) and X.ndim == 2:
+            X = X[:, 0]
+        return extract_counts(X, self.stopwords_, self.n_jobs, self.chunksize, self.stemmer_)
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        return np.array(COUNT_FEATURES, dtype=object)
+
+    def __getstate__(self):
+        # the stemmer (and its cache) is rebuilt on load rather than pickled with the model
+        state = super().__getstate__()
+        state.pop("stemmer_", None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if hasattr(self, "stopwords_"):
+            self.stemmer_ = CachedStemmer()
+
+
+def check_against_notebook(texts: Sequence, stopwords: Optional[Iterable[str]] = None, show: int = 5) -> List[int]:
+    """Positions where extract_counts differs from the notebook's separate passes (prints the first `show`)."""
+    stopwords = frozenset(stopwords) if stopwords is not None else build_stopwords(normalize_text)
+    stopwords_list = list(stopwords)
+    got = extract_counts(texts, stopwords)
+    mismatches = []
+    for i, raw in enumerate(texts):
+        text = strip_urls_and_latin(raw if isinstance(raw, str) else "")
+        cleaned, stopwords_count = reference_clean(text, stopwords_list)
+        expected = [
+            text.count("#"),
+            emoji.emoji_count(str(text)),
+            sum(1 for char in text if char in ALL_PUNCT),
+            len(re.findall(r'\d+', text)),
+            stopwords_count,
+            len(" ".join(Arabic_Light_Stemmer(cleaned)).split()),
+        ]
+        if expected != got[i].tolist():
+            if len(mismatches) < show:
+                print(f"  {i}\n    notebook: {expected}\n    extractor: {got[i].tolist()}")
+            mismatches.append(i)
+    print(f"{len(texts)} texts, {len(mismatches)} mismatches")
+    return mismatches
+
+
+# #--------------This block is for starting the automation------------------------
+# if __name__ == "__main__":
+#     df = pd.read_csv("dateset_(with_second_round_real_fake).csv")
+#     check_against_notebook(df["text"].tolist()[:2000])
+#     df[COUNT_FEATURES] = extract_counts(df["text"], workers=None)
+#
+#     # inside the model pipeline, on the raw text column
+#     from arabic_stopwords import load_stopwords
+#     counts = CountFeatures(stopwords=load_stopwords("models/arabic_stopwords.txt"))
+# #------------------------------------------------------